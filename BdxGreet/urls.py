@@ -8,8 +8,12 @@ from django.contrib.staticfiles.views import serve
 from django.urls import include, path, re_path
 from django.views.i18n import JavaScriptCatalog
 
+from core import views as core_views
+
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
+    # Catalogue JavaScript versionné (core.jsi18n) : hors préfixe de langue, la langue est dans l'URL
+    path('jsi18n/<str:lang>/<str:digest>.js', core_views.javascript_catalog, name='javascript-catalog-hashed'),
     re_path(
         r"^\.well-known/(?P<path>.*)$",
         serve,
@@ -25,6 +29,7 @@ urlpatterns += i18n_patterns(
     path('',include('cluster.urls')),
     path('',include('destination.urls')),
     path('',include('greeters.urls')),
+    path('',include('greet.urls')),
     
    
 ) + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -5,15 +5,15 @@ from crispy_forms.layout import (HTML, Column, Div, Field, Fieldset, Hidden,
                                  Layout, Row, Submit)
 from django import forms
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Group
-from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
-from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 
 from cluster.models import Cluster
 from core.mixins import CommaSeparatedFieldMixin, HelpTextTooltipMixin, FormFieldPermissionMixin
-from core.models import FieldPermission, Language_communication, Pays
+from core.field_permissions import get_permission_matrix
+from core.reference import ReferenceModelChoiceField, ReferenceModelMultipleChoiceField
+from core.roles import user_in_groups
+from core.user_picker import UserPickerSelect
 
 User = get_user_model()
 
@@ -45,14 +45,21 @@ class ClusterForm(CommaSeparatedFieldMixin, HelpTextTooltipMixin, forms.ModelFor
             'backup_mails_cluster', 'url_biblio_cluster', 'url_biblio_Greeter_cluster'
         ]
         widgets = {
-            'admin_cluster': forms.Select(attrs={'class': 'form-select'}),
+            # Sélecteur paginé (core.user_picker) : seule la valeur actuelle est rendue
+            'admin_cluster': UserPickerSelect('cluster', attrs={'class': 'form-select'}),
             'country_admin_cluster' : forms.Select(attrs={'class': 'form-select'}),
             'country_admin_alt_cluster' : forms.Select(attrs={'class': 'form-select'}),
-            'admin_alt_cluster': forms.Select(attrs={'class': 'form-select'}),
+            'admin_alt_cluster': UserPickerSelect('cluster', attrs={'class': 'form-select'}),
             'statut_cluster': forms.RadioSelect(),
             'langs_com': forms.CheckboxSelectMultiple(),
             'desc_cluster': forms.Textarea(attrs={'rows': 2}),
         }
+        # Choix servis par le registre des tables de référence (sans requête)
+        field_classes = {
+            'country_admin_cluster': ReferenceModelChoiceField,
+            'country_admin_alt_cluster': ReferenceModelChoiceField,
+            'langs_com': ReferenceModelMultipleChoiceField,
+        }
 
     comma_fields_config = {
         'experience_greeter': {'min': 2, 'max': 10},
@@ -77,23 +84,15 @@ class ClusterForm(CommaSeparatedFieldMixin, HelpTextTooltipMixin, forms.ModelFor
             )
 
         # Masquer les cases à cocher si l'utilisateur n'est pas dans un groupe autorisé
-        if self.user and not self.user.groups.filter(name__in=['SuperAdmin']).exists():
+        if self.user and not user_in_groups(self.user, 'SuperAdmin'):
             for field_name in self.editable_fields:
                 self.fields[f'can_edit_{field_name}'].widget = forms.HiddenInput()
 
         # Si l'utilisateur est autorisé et qu'on modifie un objet existant
-        if self.user and self.user.groups.filter(name__in=['SuperAdmin']).exists() and self.instance and self.instance.pk:
-            target_group = get_object_or_404(Group, name='Admin')
-            content_type = ContentType.objects.get_for_model(self.instance)
-            permissions = FieldPermission.objects.filter(
-                content_type=content_type,
-                object_id=self.instance.pk,
-                target_group=target_group,
-                app_name='cluster'
-            )
+        if self.user and user_in_groups(self.user, 'SuperAdmin') and self.instance and self.instance.pk:
+            permissions = get_permission_matrix(self.instance, 'Admin', 'cluster')
             for field_name in self.editable_fields:
-                permission = permissions.filter(field_name=field_name).first()
-                if permission and permission.is_editable:
+                if permissions.get(field_name):
                     self.fields[f'can_edit_{field_name}'].initial = True
 
         # Filtrer les utilisateurs éligibles pour admin_cluster et admin_alt_cluster
@@ -127,9 +126,6 @@ class ClusterForm(CommaSeparatedFieldMixin, HelpTextTooltipMixin, forms.ModelFor
             self.fields['admin_cluster'].initial = self.instance.admin_cluster
             self.fields['admin_alt_cluster'].initial = self.instance.admin_alt_cluster
 
-        self.fields['country_admin_cluster'].queryset = Pays.objects.all().order_by('nom_pays')
-        self.fields['country_admin_alt_cluster'].queryset = Pays.objects.all().order_by('nom_pays')
-
         self.apply_tooltips() #Appel du mixin HelpextTooltip
 
         # Configuration du layout avec crispy_forms
@@ -17,14 +17,16 @@ from cluster.models import (
     Reason_No_Response_Greeter, Reason_No_Response_Visitor, Notoriety
 )
 from destination.models import Destination
+from core.listing import ListQueryMixin
 from core.mixins import FormFieldPermissionMixin, RelatedModelsMixin
+from core.roles import user_in_groups
 from core.tasks import envoyer_email_creation_utilisateur
 
 User = get_user_model()
 
 class SuperAdminRequiredMixin(UserPassesTestMixin):
     def test_func(self):
-        return self.request.user.groups.filter(name='SuperAdmin').exists() 
+        return user_in_groups(self.request.user, 'SuperAdmin')
 
     def handle_no_permission(self):
         messages.error(self.request, _("Vous n'avez pas les droits nécessaires pour créer un cluster."))
@@ -124,19 +126,21 @@ class ClusterCreateView(LoginRequiredMixin, SuperAdminRequiredMixin, FormFieldPe
 class AuthorizationListRequiredMixin(UserPassesTestMixin):
 
     def test_func(self):
-        return self.request.user.groups.filter(
-            name__in=["SuperAdmin", "Admin"]
-        ).exists()
+        return user_in_groups(self.request.user, "SuperAdmin", "Admin")
 
     def handle_no_permission(self):
         messages.error(self.request, "Vous n'avez pas les droits nécessaires pour afficher la liste des clusters.")
         return redirect('login')
 
-class ClusterListView(AuthorizationListRequiredMixin,View):
-    
+class ClusterListView(AuthorizationListRequiredMixin, ListQueryMixin, View):
+    template_name = 'cluster/clusters_list.html'
+    context_object_name = 'clusters'
+    ordering_choices = {'code': ('code_cluster',), 'id': ('pk',)}
+    default_ordering = 'code'
+    json_fields = ('id', 'code_cluster', 'name_cluster')
+
     def get(self, request, *args, **kwargs):
-        clusters = Cluster.objects.all().order_by('code_cluster')
-        return render(request, 'cluster/clusters_list.html', {'clusters': clusters})   
+        return self.list_response(request, Cluster.objects.all())
 
 ###################################################################################################
 #Vue Détail d'un cluster
@@ -148,7 +152,7 @@ class SuperAdminOrAdminRequiredMixin(UserPassesTestMixin):
     # Autoriser les SuperAdmin ou les utilisateurs qui sont admin/admin_alt du cluster
         cluster = self.get_object()
         return (
-            self.request.user.groups.filter(name = 'SuperAdmin').exists() or
+            user_in_groups(self.request.user, 'SuperAdmin') or
             self.request.user == cluster.admin_cluster or
             self.request.user == cluster.admin_alt_cluster
             )
@@ -195,7 +199,7 @@ class SuperAdminRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         cluster = self.get_object()
         return (
-            self.request.user.groups.filter(name='SuperAdmin').exists() or
+            user_in_groups(self.request.user, 'SuperAdmin') or
             self.request.user == cluster.admin_cluster or
             self.request.user == cluster.admin_alt_cluster
         )
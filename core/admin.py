@@ -3,7 +3,7 @@ from django.contrib import admin
 from core.models import (Beneficiaire, Email_Mailjet, FieldPermission,
                          Language_communication, LangueDeepL,
                          LangueParlee, No_show, Pays, Periode, TrancheAge,
-                         Types_handicap)
+                         TranslationJob, TranslationMemory, Types_handicap)
 
 admin.site.register(Email_Mailjet)
 admin.site.register(LangueDeepL)
@@ -17,5 +17,5 @@ admin.site.register(TrancheAge)
 admin.site.register(Types_handicap)
 admin.site.register(Language_communication)
 admin.site.register(FieldPermission)
-
-
+admin.site.register(TranslationMemory)
+admin.site.register(TranslationJob)
@@ -0,0 +1,66 @@
+###################################################################################################
+# Paquet JSON des tables de référence, un par langue, servi à une URL portant l'empreinte
+# de son contenu (core/reference-data/<empreinte>.json) : navigateurs et proxys le gardent
+# indéfiniment, une modification d'une table change l'empreinte donc l'URL.
+# Construit à partir du registre core.reference, sans requête une fois les tables chargées.
+
+import hashlib
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+from django.utils.translation import get_language
+
+from core.reference import get_objects, get_snapshot
+
+# Clé du paquet -> (table de référence, champs ajoutés à id et name)
+BUNDLE_TABLES = {
+    'countries': ('core.Pays', ('code_iso',)),
+    'spoken_languages': ('core.LangueParlee', ('code_iso',)),
+    'periods': ('core.Periode', ()),
+    'age_ranges': ('core.TrancheAge', ()),
+    'disability_types': ('core.Types_handicap', ()),
+    'communication_languages': ('core.Language_communication', ('code',)),
+}
+
+# Paquets construits, par (langue, versions des tables) ; les versions périmées sont écartées
+_bundles = {}
+_lock = threading.Lock()
+
+
+def _versions():
+    # Version et date de chargement : un rechargement à expiration (REFERENCE_SNAPSHOT_TTL) reconstruit aussi le paquet
+    return tuple((snapshot.version, snapshot.loaded_at)
+                 for snapshot in (get_snapshot(label) for label, extra_fields in BUNDLE_TABLES.values()))
+
+
+def build_bundle():
+    """Contenu du paquet dans la langue active."""
+    return {
+        key: [
+            {'id': obj.pk, 'name': str(obj), **{field: getattr(obj, field) for field in extra_fields}}
+            for obj in get_objects(label)
+        ]
+        for key, (label, extra_fields) in BUNDLE_TABLES.items()
+    }
+
+
+def get_bundle():
+    """(empreinte, corps JSON) du paquet de la langue active."""
+    key = (get_language(), _versions())
+    bundle = _bundles.get(key)
+    if bundle is None:
+        body = json.dumps(build_bundle(), cls=DjangoJSONEncoder, ensure_ascii=False,
+                          separators=(',', ':')).encode()
+        bundle = (hashlib.sha256(body).hexdigest()[:16], body)
+        with _lock:
+            for stale in [cached for cached in _bundles if cached[0] == key[0]]:
+                del _bundles[stale]
+            _bundles[key] = bundle
+    return bundle
+
+
+def get_bundle_url():
+    digest, body = get_bundle()
+    return reverse('reference_bundle', args=[digest])
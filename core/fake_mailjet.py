@@ -0,0 +1,99 @@
+###################################################################################################
+# Faux serveur Mailjet local pour les tests : enregistre les appels Send v3.1 sans envoyer de courriel
+
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import override_settings
+
+
+class FakeMailjetServer:
+    """
+    Serveur HTTP local imitant l'API Send v3.1 de Mailjet.
+
+        with FakeMailjetServer() as fake:
+            send_messages([...])
+        fake.requests          # corps JSON reçus (un par appel HTTP)
+        fake.messages          # tous les messages reçus
+
+    Les adresses listées dans fail_emails reçoivent un statut 'error'.
+    Les rate_limit premiers appels sont refusés (HTTP 429, Retry-After: 0) sans être enregistrés.
+    """
+
+    def __init__(self, fail_emails=(), rate_limit=0):
+        self.fail_emails = set(fail_emails)
+        self.rate_limit = rate_limit
+        self.rate_limited = 0
+        self.requests = []
+        self._server = None
+        self._thread = None
+        self._settings = None
+
+    @property
+    def messages(self):
+        return [message for payload in self.requests for message in payload.get('Messages', [])]
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v3.1/"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if fake.rate_limited < fake.rate_limit:
+                    fake.rate_limited += 1
+                    body = json.dumps({'ErrorMessage': 'Too many requests'}).encode()
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                fake.requests.append(payload)
+
+                results = []
+                for message in payload.get('Messages', []):
+                    email = message['To'][0]['Email']
+                    if email in fake.fail_emails:
+                        results.append({'Status': 'error', 'CustomID': message.get('CustomID', ''),
+                                        'Errors': [{'ErrorMessage': 'Recipient rejected'}]})
+                    else:
+                        results.append({'Status': 'success', 'CustomID': message.get('CustomID', ''),
+                                        'To': [{'Email': email, 'MessageUUID': str(uuid.uuid4()),
+                                                'MessageID': len(fake.messages)}]})
+
+                body = json.dumps({'Messages': results}).encode()
+                status = 400 if any(result['Status'] == 'error' for result in results) else 200
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._settings = override_settings(MAILJET_API_URL=self.url)
+        self._settings.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self._settings.disable()
+        self._server.shutdown()
+        self._server.server_close()
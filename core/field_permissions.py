@@ -0,0 +1,103 @@
+###################################################################################################
+# Matrice des permissions de champs (FieldPermission) mise en cache et versionnée
+# Le cache n'est utilisé que s'il est partagé entre processus (Redis) : avec le cache mémoire
+# local, un processus ne verrait pas l'invalidation faite par un autre et appliquerait des
+# permissions périmées ; la matrice est alors relue en base à chaque appel.
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
+from core.models import FieldPermission
+from core.utils import is_shared_cache
+
+
+def _matrix_scope(content_type_id, object_id, target_group_id, app_name):
+    return f"{content_type_id}:{object_id}:{target_group_id}:{app_name}"
+
+
+def _version_key(scope):
+    return f"field_permissions:version:{scope}"
+
+
+def _matrix_key(scope, version):
+    return f"field_permissions:matrix:{version}:{scope}"
+
+
+def get_target_group_id(target_group_name):
+    """Identifiant du groupe cible, mis en cache (404 si le groupe n'existe pas)."""
+    key = f"field_permissions:group:{target_group_name}"
+    group_id = cache.get(key)
+    if group_id is None:
+        group_id = get_object_or_404(Group, name=target_group_name).pk
+        cache.set(key, group_id, getattr(settings, 'FIELD_PERMISSION_CACHE_TIMEOUT', 3600))
+    return group_id
+
+
+def invalidate_permission_matrix(content_type_id, object_id, target_group_id, app_name):
+    """Passe à une nouvelle version de la matrice : l'ancienne entrée n'est plus lue."""
+    key = _version_key(_matrix_scope(content_type_id, object_id, target_group_id, app_name))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def get_permission_matrix(obj, target_group_name, app_name):
+    """
+    Retourne {field_name: is_editable} pour l'objet, le groupe cible et l'application.
+    Lecture dans le cache partagé ; en cas d'absence (ou sans cache partagé), une seule requête FieldPermission.
+    """
+    content_type_id = ContentType.objects.get_for_model(obj).pk
+    target_group_id = get_target_group_id(target_group_name)
+    queryset = FieldPermission.objects.filter(
+        content_type_id=content_type_id,
+        object_id=obj.pk,
+        target_group_id=target_group_id,
+        app_name=app_name,
+    ).values_list('field_name', 'is_editable')
+    if not is_shared_cache():
+        return dict(queryset)
+
+    scope = _matrix_scope(content_type_id, obj.pk, target_group_id, app_name)
+    version = cache.get(_version_key(scope), 1)
+    matrix = cache.get(_matrix_key(scope, version))
+    if matrix is None:
+        matrix = dict(queryset)
+        cache.set(_matrix_key(scope, version), matrix,
+                  getattr(settings, 'FIELD_PERMISSION_CACHE_TIMEOUT', 3600))
+    return matrix
+
+
+def save_permission_matrix(obj, target_group_name, app_name, matrix, managed_fields=None):
+    """
+    Enregistre la matrice {field_name: is_editable} : suppression des champs qui ne sont plus
+    gérés (managed_fields, par défaut les clés de la matrice) puis un seul bulk_create
+    avec mise à jour en cas de conflit.
+    Le cache est invalidé après le commit de la transaction.
+    """
+    content_type_id = ContentType.objects.get_for_model(obj).pk
+    target_group_id = get_target_group_id(target_group_name)
+    lookup = {
+        'content_type_id': content_type_id,
+        'object_id': obj.pk,
+        'target_group_id': target_group_id,
+        'app_name': app_name,
+    }
+
+    with transaction.atomic():
+        managed_fields = list(matrix if managed_fields is None else managed_fields)
+        FieldPermission.objects.filter(**lookup).exclude(field_name__in=managed_fields).delete()
+        FieldPermission.objects.bulk_create(
+            [FieldPermission(field_name=field_name, is_editable=is_editable, **lookup)
+             for field_name, is_editable in matrix.items()],
+            update_conflicts=True,
+            unique_fields=['field_name', 'content_type', 'object_id', 'target_group', 'app_name'],
+            update_fields=['is_editable'],
+        )
+        transaction.on_commit(lambda: invalidate_permission_matrix(
+            content_type_id, obj.pk, target_group_id, app_name
+        ))
@@ -0,0 +1,144 @@
+###################################################################################################
+# Déclinaisons (renditions) des images téléversées : plusieurs tailles, WebP + JPEG,
+# stockées sous un chemin dérivé du contenu pour dédupliquer les fichiers identiques
+
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Tailles par défaut : nom -> (largeur, hauteur) maximales
+DEFAULT_RENDITION_SIZES = {
+    'thumb': (96, 96),
+    'card': (400, 400),
+    'full': (1200, 1200),
+}
+
+# Formats produits pour chaque taille (le premier est le format préféré, le dernier le repli)
+RENDITION_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 85, 'optimize': True, 'progressive': True},
+}
+
+
+def get_rendition_sizes():
+    return getattr(settings, 'IMAGE_RENDITION_SIZES', DEFAULT_RENDITION_SIZES)
+
+
+def content_hash(field_file):
+    """Empreinte SHA-256 du contenu du fichier (lecture par blocs)."""
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()
+
+
+def rendition_path(digest, name, size, extension):
+    width, height = size
+    return f"renditions/{digest[:2]}/{digest}/{name}-{width}x{height}.{extension}"
+
+
+def _manifest_from_storage(paths):
+    """Manifeste des déclinaisons déjà stockées (lecture des seuls en-têtes JPEG)."""
+    manifest = {}
+    for name, formats in paths.items():
+        with default_storage.open(formats['jpeg'], 'rb') as fichier, Image.open(fichier) as image:
+            manifest[name] = {'width': image.width, 'height': image.height, **formats}
+    return manifest
+
+
+def build_renditions(field_file):
+    """
+    Produit toutes les déclinaisons d'une image à partir d'un seul décodage.
+    Les fichiers déjà présents pour le même contenu ne sont pas réécrits.
+    Retourne le manifeste {nom: {'width', 'height', 'webp', 'jpeg'}}.
+    """
+    digest = content_hash(field_file)
+    sizes = get_rendition_sizes()
+
+    # Chemins attendus : si tous existent déjà (même contenu téléversé ailleurs), aucun décodage
+    paths = {
+        name: {extension: rendition_path(digest, name, size, extension) for extension in RENDITION_FORMATS}
+        for name, size in sizes.items()
+    }
+    if all(default_storage.exists(path) for formats in paths.values() for path in formats.values()):
+        return _manifest_from_storage(paths)
+
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as source:
+            # load() décode entièrement l'image et lève une erreur si le fichier est tronqué
+            source.load()
+            source = ImageOps.exif_transpose(source)
+            if source.mode not in ("RGB", "RGBA"):
+                source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+            manifest = {}
+            for name, size in sizes.items():
+                rendition = source.copy()
+                rendition.thumbnail(size, Image.LANCZOS)
+                manifest[name] = {'width': rendition.width, 'height': rendition.height}
+
+                for extension, options in RENDITION_FORMATS.items():
+                    path = paths[name][extension]
+                    manifest[name][extension] = path
+                    if default_storage.exists(path):
+                        continue
+                    image = rendition
+                    if options['format'] == 'JPEG' and image.mode != "RGB":
+                        image = image.convert("RGB")
+                    buffer = BytesIO()
+                    image.save(buffer, **options)
+                    default_storage.save(path, ContentFile(buffer.getvalue()))
+    finally:
+        field_file.close()
+
+    return manifest
+
+
+def rendition_url(manifest, name, extension='jpeg'):
+    """URL d'une déclinaison à partir du manifeste, ou None si elle n'existe pas."""
+    path = (manifest or {}).get(name, {}).get(extension)
+    return default_storage.url(path) if path else None
+
+###################################################################################################
+# API de modèle : champ <image>_renditions + méthodes d'accès
+
+
+class RenditionsMixin:
+    """
+    Mixin de modèle pour les ImageField déclinés.
+    Chaque champ image décliné possède un JSONField '<champ>_renditions'
+    contenant le manifeste produit par build_renditions.
+    """
+
+    def reset_renditions(self, field_name):
+        """
+        Image remplacée : vide le manifeste, à enregistrer avec la nouvelle image.
+        Jusqu'à la fin de la tâche de déclinaison, rendition_url sert l'image d'origine.
+        """
+        setattr(self, f"{field_name}_renditions", {})
+
+    def get_renditions(self, field_name):
+        return getattr(self, f"{field_name}_renditions", None) or {}
+
+    def rendition_url(self, field_name, name='card', extension='jpeg'):
+        """URL de la déclinaison demandée, ou de l'image d'origine à défaut."""
+        url = rendition_url(self.get_renditions(field_name), name, extension)
+        if url:
+            return url
+        field_file = getattr(self, field_name)
+        return field_file.url if field_file else ''
+
+    def rendition_sources(self, field_name, name='card'):
+        """Liste [(type MIME, URL)] dans l'ordre de préférence pour une balise <picture>."""
+        manifest = self.get_renditions(field_name)
+        urls = ((extension, rendition_url(manifest, name, extension)) for extension in RENDITION_FORMATS)
+        return [(f"image/{extension}", url) for extension, url in urls if url]
@@ -0,0 +1,88 @@
+import csv
+from itertools import islice
+
+from django.db import transaction
+
+from core.reference import invalidate_reference
+from core.tasks import translation_content_rows
+
+###################################################################################################
+# Import en masse des tables de référence (pays, langues...) depuis un fichier CSV
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_reference_csv(model, path, key_column, value_column, value_field,
+                         key_field='code_iso', delimiter=',', encoding='utf-8-sig',
+                         chunk_size=500, translate=True):
+    """
+    Importe un fichier CSV dans une table de référence en comparant chaque ligne
+    aux enregistrements existants (clé key_field).
+    Les créations et modifications sont appliquées par paquets (bulk_create / bulk_update)
+    et une seule tâche de traduction est planifiée pour les lignes dont le texte a changé.
+    Retourne un dictionnaire de statistiques.
+    """
+    # 1. État actuel de la table en une seule requête : {clé: (id, valeur)}
+    existing = {
+        key: (pk, value)
+        for pk, key, value in model.objects.values_list('pk', key_field, value_field)
+    }
+
+    to_create = {}
+    to_update = {}
+    unchanged = 0
+
+    # 2. Lecture du fichier en flux et comparaison ligne à ligne
+    with open(path, 'r', encoding=encoding) as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=delimiter)
+        for row in reader:
+            key = (row.get(key_column) or '').strip()
+            value = (row.get(value_column) or '').strip()
+            if not key:
+                continue
+            if key not in existing:
+                to_create[key] = value
+            elif existing[key][1] != value:
+                to_update[key] = value
+            else:
+                unchanged += 1
+
+    # 3. Application des changements par paquets
+    with transaction.atomic():
+        for chunk in _chunks(to_create.items(), chunk_size):
+            model.objects.bulk_create(
+                [model(**{key_field: key, value_field: value}) for key, value in chunk]
+            )
+
+        for chunk in _chunks(to_update.items(), chunk_size):
+            objects = []
+            for key, value in chunk:
+                obj = model(pk=existing[key][0], **{key_field: key})
+                setattr(obj, value_field, value)
+                objects.append(obj)
+            model.objects.bulk_update(objects, [value_field])
+
+        # bulk_create / bulk_update n'envoient pas post_save : version de la table incrémentée ici
+        if to_create or to_update:
+            transaction.on_commit(lambda: invalidate_reference(model))
+
+        # 4. Une seule tâche de traduction pour les lignes nouvelles ou modifiées
+        changed_keys = list(to_create) + list(to_update)
+        if translate and changed_keys:
+            changed_ids = []
+            for chunk in _chunks(changed_keys, chunk_size):
+                changed_ids.extend(
+                    model.objects.filter(**{f"{key_field}__in": chunk}).values_list('pk', flat=True)
+                )
+            transaction.on_commit(lambda: translation_content_rows.delay(
+                model._meta.app_label, model.__name__, changed_ids, value_field
+            ))
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'unchanged': unchanged,
+    }
@@ -0,0 +1,130 @@
+###################################################################################################
+# Catalogues JavaScript (djangojs) précompilés par langue, à URL portant l'empreinte du contenu
+#
+# `manage.py compile_js_catalogs` écrit jsi18n/<langue>.<empreinte>.js dans JS_CATALOG_DIR
+# (servi comme fichier statique, cache illimité) et un manifest.json. Sans cette étape,
+# le catalogue est rendu une fois par processus et servi par core.views.javascript_catalog,
+# lui aussi avec une empreinte dans l'URL et un cache illimité.
+# Chaque processus relit le manifeste quand sa date de modification change ; les fichiers de
+# la compilation précédente sont conservés pour les pages déjà servies qui y renvoient encore.
+
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpRequest
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import translation
+from django.views.i18n import JavaScriptCatalog
+
+MANIFEST_NAME = 'manifest.json'
+
+_catalogs = {}
+# (date de modification, contenu) du manifeste lu
+_manifest = None
+_lock = threading.Lock()
+
+
+def get_catalog_dir():
+    return getattr(settings, 'JS_CATALOG_DIR', os.path.join(settings.BASE_DIR, 'static', 'jsi18n'))
+
+
+def language_codes():
+    return [code for code, name in settings.LANGUAGES]
+
+
+def render_catalog(lang):
+    """Contenu du catalogue JavaScript d'une langue, tel que le produit la vue JavaScriptCatalog."""
+    request = HttpRequest()
+    request.method = 'GET'
+    with translation.override(lang):
+        return JavaScriptCatalog.as_view()(request).content
+
+
+def get_catalog(lang):
+    """(empreinte, contenu) du catalogue, rendu une fois par processus."""
+    catalog = _catalogs.get(lang)
+    if catalog is None:
+        body = render_catalog(lang)
+        catalog = (hashlib.sha256(body).hexdigest()[:16], body)
+        with _lock:
+            _catalogs[lang] = catalog
+    return catalog
+
+
+###################################################################################################
+# Précompilation
+
+def compile_catalogs():
+    """Écrit un fichier par langue et le manifeste ; retourne {langue: nom du fichier}."""
+    directory = get_catalog_dir()
+    os.makedirs(directory, exist_ok=True)
+    previous_manifest = _read_manifest(os.path.join(directory, MANIFEST_NAME))
+    manifest = {}
+    for lang in language_codes():
+        body = render_catalog(lang)
+        filename = f"{lang}.{hashlib.sha256(body).hexdigest()[:16]}.js"
+        # Compilations plus anciennes de cette langue ; la précédente reste servie
+        keep = {filename, previous_manifest.get(lang)}
+        for previous in os.listdir(directory):
+            if previous.startswith(f"{lang}.") and previous.endswith('.js') and previous not in keep:
+                os.remove(os.path.join(directory, previous))
+        with open(os.path.join(directory, filename), 'wb') as catalog_file:
+            catalog_file.write(body)
+        manifest[lang] = filename
+    # Remplacement atomique : un processus ne lit jamais un manifeste à moitié écrit
+    temporary = os.path.join(directory, f".{MANIFEST_NAME}.tmp")
+    with open(temporary, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    os.replace(temporary, os.path.join(directory, MANIFEST_NAME))
+    reset_catalogs()
+    return manifest
+
+
+def reset_catalogs():
+    global _manifest
+    with _lock:
+        _catalogs.clear()
+        _manifest = None
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_manifest():
+    """
+    Fichiers précompilés par langue ({} si compile_js_catalogs n'a pas été lancé).
+    Relu quand le fichier change (nouvelle compilation pendant que le processus tourne).
+    """
+    global _manifest
+    path = os.path.join(get_catalog_dir(), MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _manifest
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, _read_manifest(path) if mtime is not None else {})
+        with _lock:
+            _manifest = cached
+    return cached[1]
+
+
+def get_catalog_url(lang=None):
+    """URL du catalogue de la langue (active par défaut) : fichier statique précompilé, sinon la vue."""
+    lang = lang or translation.get_language()
+    if lang not in language_codes():
+        lang = settings.LANGUAGE_CODE
+    filename = get_manifest().get(lang)
+    if filename:
+        return static(f"jsi18n/{filename}")
+    digest, body = get_catalog(lang)
+    return reverse('javascript-catalog-hashed', args=[lang, digest])
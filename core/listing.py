@@ -0,0 +1,280 @@
+###################################################################################################
+# Couche commune des vues de liste : filtres côté serveur, tri sur colonnes indexées,
+# pagination par clé (seek) et variante JSON pour le front-end
+#
+# La pagination par clé reprend après la dernière ligne affichée (WHERE (col, pk) > (...))
+# au lieu d'un OFFSET : le coût d'une page ne dépend pas de sa position dans la liste.
+# Les valeurs venant de l'URL (filtres, curseur) passent par to_python du champ du modèle :
+# une valeur invalide est ignorée (liste non filtrée, première page) au lieu d'une erreur 500.
+# Le tri et le curseur portent sur la colonne réellement triée : <champ>_<langue> pour un champ
+# traduit (modeltranslation), NULL rangé en fin de tri croissant pour une colonne nullable.
+
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import JsonResponse
+from django.shortcuts import render
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname, get_language
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Valeurs de tri de la dernière ligne de la page précédente (None si le curseur est invalide)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def resolve_field(model, path):
+    """(champ, lookups restants) pour un chemin ORM, ex. 'user__code_dest_id' ou 'jours__contains'."""
+    parts = path.split('__')
+    field = None
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return field, '__'.join(parts[index:])
+        if field.is_relation:
+            model = field.related_model
+    return field, ''
+
+
+def to_python(model, path, value):
+    """Valeur convertie par le champ désigné (clé primaire cible pour une relation) ; ValidationError sinon."""
+    field, lookups = resolve_field(model, path)
+    if field is None:
+        raise ValidationError(f"Champ inconnu : {path}")
+    if lookups:
+        # Lookup (contains...) : la valeur est une chaîne libre
+        return value
+    if field.is_relation:
+        field = field.target_field
+    try:
+        return field.to_python(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Valeur invalide pour {path}")
+
+
+def _translated_fields(model):
+    try:
+        return translator.get_options_for_model(model).fields
+    except NotRegistered:
+        return {}
+
+
+def sort_column(model, column):
+    """Colonne réellement triée : modeltranslation trie un champ traduit sur <champ>_<langue> active."""
+    field, lookups = resolve_field(model, column)
+    if field is None or lookups or field.name not in _translated_fields(field.model):
+        return column
+    parts = column.split('__')
+    parts[-1] = build_localized_fieldname(parts[-1], get_language())
+    return '__'.join(parts)
+
+
+def sort_columns(model, columns):
+    return tuple(sort_column(model, column) for column in columns)
+
+
+def is_nullable(model, column):
+    field, lookups = resolve_field(model, column)
+    return field is not None and not lookups and field.null
+
+
+def clean_cursor_values(model, columns, values):
+    """Valeurs du curseur converties colonne par colonne, None si leur nombre ou leur type ne convient pas."""
+    if values is None or len(values) != len(columns):
+        return None
+    cleaned = []
+    for column, value in zip(columns, values):
+        if value is None:
+            # NULL n'est une position valide que sur une colonne nullable
+            if not is_nullable(model, column):
+                return None
+            cleaned.append(None)
+            continue
+        try:
+            cleaned.append(to_python(model, column, value))
+        except ValidationError:
+            return None
+    return cleaned
+
+
+def _after(column, value, descending, nullable):
+    """Lignes strictement après value sur une colonne (NULL en dernier en croissant, en premier en décroissant)."""
+    if value is None:
+        return Q(**{f"{column}__isnull": False}) if descending else None
+    condition = Q(**{f"{column}__{'lt' if descending else 'gt'}": value})
+    if nullable and not descending:
+        condition |= Q(**{f"{column}__isnull": True})
+    return condition
+
+
+def _equal(column, value):
+    return Q(**{f"{column}__isnull": True}) if value is None else Q(**{column: value})
+
+
+def keyset_filter(columns, values, descending=False, nullable=()):
+    """Condition « après la ligne (values) » dans l'ordre lexicographique des colonnes."""
+    nullable = set(nullable)
+    condition = Q()
+    for index, column in enumerate(columns):
+        step = _after(column, values[index], descending, column in nullable)
+        if step is None:
+            continue
+        for previous, value in zip(columns[:index], values[:index]):
+            step &= _equal(previous, value)
+        condition |= step
+    return condition
+
+
+def _order_by(column, descending, nullable):
+    if not nullable:
+        return f"-{column}" if descending else column
+    return F(column).desc(nulls_first=True) if descending else F(column).asc(nulls_last=True)
+
+
+def _row_value(row, column):
+    if isinstance(row, dict):
+        return row[column]
+    value = row
+    for name in column.split('__'):
+        value = value.pk if name == 'pk' else getattr(value, name)
+    return value
+
+
+class KeysetPage:
+    """Page d'une liste paginée par clé : lignes, curseur de la page suivante."""
+
+    def __init__(self, items, next_cursor, is_first):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def paginate_keyset(queryset, columns, cursor=None, page_size=20, descending=False):
+    """
+    Page suivant le curseur, triée sur columns (dont la dernière doit être unique et non nulle, en général pk).
+    Une ligne de plus est lue pour savoir s'il existe une page suivante.
+    Pour un queryset values(), les colonnes de sort_columns() doivent figurer parmi les champs lus.
+    """
+    model = queryset.model
+    columns = sort_columns(model, columns)
+    nullable = [column for column in columns if is_nullable(model, column)]
+    values = clean_cursor_values(model, columns, decode_cursor(cursor)) if cursor else None
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(columns, values, descending, nullable))
+    ordering = [_order_by(column, descending, column in nullable) for column in columns]
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(_row_value(rows[-1], column) for column in columns)
+    return KeysetPage(rows, next_cursor, values is None)
+
+
+class ListQueryMixin:
+    """
+    Vue de liste filtrée, triée et paginée par clé ; `?format=json` renvoie la même page en JSON.
+
+    filter_fields : paramètre GET -> lookup (ex. {'statut': 'statut_greeter'})
+    ordering_choices : clé de tri -> colonnes indexées, terminées par une colonne unique
+    select_related / prefetch_related : exactement les relations lues par le template
+    json_fields : champs values() de la variante JSON
+    """
+    template_name = None
+    context_object_name = 'object_list'
+    filter_fields = {}
+    ordering_choices = {'id': ('pk',)}
+    default_ordering = 'id'
+    page_size = 20
+    select_related = ()
+    prefetch_related = ()
+    json_fields = ()
+
+    def get_filters(self, request, model):
+        """Filtres de l'URL, convertis par les champs du modèle ; une valeur invalide est ignorée."""
+        filters = {}
+        for param, lookup in self.filter_fields.items():
+            value = request.GET.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                filters[param] = (lookup, to_python(model, lookup, value))
+            except ValidationError:
+                continue
+        return filters
+
+    def get_ordering(self, request):
+        """(clé, colonnes, décroissant) : '-clé' inverse le sens, une clé inconnue donne le tri par défaut."""
+        value = request.GET.get('tri', self.default_ordering)
+        key, descending = value.lstrip('-'), value.startswith('-')
+        if key not in self.ordering_choices:
+            key, descending = self.default_ordering, False
+        return key, self.ordering_choices[key], descending
+
+    def filter_queryset(self, queryset, filters):
+        # Égalité sur une seule valeur : un filtre sur une ManyToMany ne duplique pas les lignes
+        for lookup, value in filters.values():
+            queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+    def wants_json(self, request):
+        return request.GET.get('format') == 'json'
+
+    def list_response(self, request, queryset, extra_context=None):
+        filters = self.get_filters(request, queryset.model)
+        ordering_key, columns, descending = self.get_ordering(request)
+        queryset = self.filter_queryset(queryset, filters)
+        cursor = request.GET.get('curseur')
+
+        if self.wants_json(request):
+            fields = list(self.json_fields)
+            sorted_on = sort_columns(queryset.model, columns)
+            page = paginate_keyset(
+                queryset.values(*fields, *[column for column in sorted_on if column not in fields]),
+                columns, cursor, self.page_size, descending,
+            )
+            results = [{field: row[field] for field in fields} for row in page.items]
+            return JsonResponse({'results': results, 'next': page.next_cursor})
+
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        page = paginate_keyset(queryset, columns, cursor, self.page_size, descending)
+
+        # Paramètres conservés par les liens de pagination
+        query = request.GET.copy()
+        query.pop('curseur', None)
+        context = {
+            self.context_object_name: page.items,
+            'page': page,
+            'filters': {param: value for param, (lookup, value) in filters.items()},
+            'ordering': ('-' if descending else '') + ordering_key,
+            'querystring': query.urlencode(),
+        }
+        context.update(extra_context or {})
+        return render(request, self.template_name, context)
@@ -0,0 +1,203 @@
+###################################################################################################
+# Envoi groupé des courriels Mailjet (API Send v3.1) sur une session HTTP réutilisée
+
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# Nombre maximum de messages acceptés par Mailjet dans un seul appel Send v3.1
+MAILJET_MAX_MESSAGES = 50
+
+# Limitation de débit (HTTP 429) : nombre de nouveaux essais d'un paquet et attente maximale (secondes)
+MAILJET_MAX_RETRIES = 3
+MAILJET_MAX_RETRY_WAIT = 30
+
+_local = threading.local()
+
+
+def get_session():
+    """Session HTTP (keep-alive, pool de connexions) propre au thread courant."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.auth = (settings.MAILJET_API_KEY, settings.MAILJET_SECRET_KEY)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=getattr(settings, 'MAILJET_POOL_SIZE', 4))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
+
+
+def template_message(recipient_email, recipient_name, template_id, variables, custom_id=None):
+    """Construit un message Mailjet fondé sur un template."""
+    message = {
+        'From': None,
+        'To': [
+            {
+                'Email': recipient_email,
+                'Name': recipient_name,
+            }
+        ],
+        'TemplateID': template_id,
+        'TemplateLanguage': True,
+        'Variables': variables,
+    }
+    if custom_id is not None:
+        message['CustomID'] = str(custom_id)
+    return message
+
+
+def _message_results(messages, response):
+    """Associe à chaque message envoyé le statut renvoyé par Mailjet (même ordre)."""
+    try:
+        returned = response.json().get('Messages', [])
+    except ValueError:
+        returned = []
+
+    results = []
+    for index, message in enumerate(messages):
+        status = returned[index] if index < len(returned) else {}
+        results.append({
+            'email': message['To'][0]['Email'],
+            'custom_id': message.get('CustomID'),
+            'status': status.get('Status', 'error'),
+            'message_id': (status.get('To') or [{}])[0].get('MessageID'),
+            'errors': status.get('Errors', [] if status else [{'ErrorMessage': f"HTTP {response.status_code}"}]),
+        })
+    return results
+
+
+def _retry_after(response, attempt):
+    """Attente demandée par Mailjet (en-tête Retry-After), sinon attente exponentielle."""
+    try:
+        wait = float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        wait = 2 ** attempt
+    return max(0, min(wait, MAILJET_MAX_RETRY_WAIT))
+
+
+def _post_chunk(session, url, chunk):
+    """Un appel Send v3.1 ; un paquet refusé pour limitation de débit est renvoyé après l'attente."""
+    retries = getattr(settings, 'MAILJET_MAX_RETRIES', MAILJET_MAX_RETRIES)
+    for attempt in range(retries + 1):
+        response = session.post(url, json={'Messages': chunk}, timeout=30)
+        if response.status_code != 429 or attempt == retries:
+            return response
+        time.sleep(_retry_after(response, attempt))
+
+
+def send_messages(messages):
+    """
+    Envoie une liste de messages par paquets de MAILJET_MAX_MESSAGES,
+    un appel HTTP par paquet sur la session partagée (renvoyé en cas de HTTP 429).
+    Retourne la liste des statuts par message.
+    """
+    url = settings.MAILJET_API_URL.rstrip('/') + '/send'
+    session = get_session()
+
+    results = []
+    for start in range(0, len(messages), MAILJET_MAX_MESSAGES):
+        chunk = messages[start:start + MAILJET_MAX_MESSAGES]
+        response = _post_chunk(session, url, chunk)
+        results.extend(_message_results(chunk, response))
+    return results
+
+
+class MailjetBatch:
+    """
+    Accumule des messages template puis les envoie en un minimum d'appels.
+
+        with MailjetBatch() as batch:
+            batch.add(email, nom, template_id, variables)
+        batch.results  # statuts par message
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.results = []
+
+    def add(self, recipient_email, recipient_name, template_id, variables, custom_id=None):
+        self.messages.append(
+            template_message(recipient_email, recipient_name, template_id, variables, custom_id)
+        )
+
+    def send(self):
+        if self.messages:
+            self.results.extend(send_messages(self.messages))
+            self.messages = []
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.send()
+
+###################################################################################################
+# Registre des templates Mailjet : table Email_Mailjet chargée une fois par processus,
+# indexée par (code_email, lang_email) et invalidée sur post_save / post_delete.
+# La version est lue dans le cache Django : avec Redis (réglage par défaut) tous les processus
+# voient l'invalidation ; avec le cache mémoire local, seul le processus qui a modifié la table.
+# Dans tous les cas l'index est relu après MAILJET_TEMPLATES_TTL secondes.
+
+from django.core.cache import cache
+
+from core.models import Email_Mailjet
+
+TEMPLATES_VERSION_KEY = 'email_mailjet:version'
+
+_templates = {'version': None, 'index': None, 'loaded_at': 0}
+_templates_lock = threading.Lock()
+
+
+def get_templates_ttl():
+    return getattr(settings, 'MAILJET_TEMPLATES_TTL', 300)
+
+
+def _templates_version():
+    # Version partagée via le cache (Redis) : les autres processus rechargent au prochain appel
+    return cache.get(TEMPLATES_VERSION_KEY, 0)
+
+
+def _templates_index():
+    version = _templates_version()
+    with _templates_lock:
+        if (_templates['index'] is None or _templates['version'] != version
+                or time.monotonic() - _templates['loaded_at'] >= get_templates_ttl()):
+            _templates['index'] = {
+                (code_email, lang_email): id_mailjet_email
+                for code_email, lang_email, id_mailjet_email
+                in Email_Mailjet.objects.values_list('code_email', 'lang_email', 'id_mailjet_email')
+            }
+            _templates['version'] = version
+            _templates['loaded_at'] = time.monotonic()
+        return _templates['index']
+
+
+def invalidate_mailjet_templates():
+    try:
+        cache.incr(TEMPLATES_VERSION_KEY)
+    except ValueError:
+        cache.set(TEMPLATES_VERSION_KEY, 1, None)
+    with _templates_lock:
+        _templates['index'] = None
+
+
+def get_mailjet_template_id(code_email, lang=None, destination_lang=None):
+    """
+    Identifiant du template Mailjet pour (code_email, lang), avec repli sur la langue
+    par défaut de la destination puis sur settings.LANGUAGE_CODE.
+    Lève Email_Mailjet.DoesNotExist si aucun template ne correspond.
+    """
+    index = _templates_index()
+    for candidate in (lang, destination_lang, settings.LANGUAGE_CODE):
+        if candidate and (code_email, candidate) in index:
+            return index[(code_email, candidate)]
+
+    raise Email_Mailjet.DoesNotExist(
+        f"Template Mailjet '{code_email}' introuvable pour la langue '{lang}'"
+    )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from greet.rgpd import run_anonymisation
+
+
+class Command(BaseCommand):
+    help = "Anonymise les demandes de visite dont le délai RGPD (flux_rgpd_dest) est écoulé"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-rows', type=int, default=None,
+                            help="Nombre maximum de demandes traitées par destination pour ce passage")
+
+    def handle(self, *args, **kwargs):
+        report = run_anonymisation(max_rows_per_destination=kwargs['max_rows'])
+        for destination_id, stats in report['destinations'].items():
+            self.stdout.write(f"  Destination {destination_id} : {stats['rows']} anonymisées, "
+                              f"{stats['rows_per_second']} lignes/s, {stats['remaining']} restantes")
+        self.stdout.write(f"Durée : {report['seconds']} s ({report['rows_per_second']} lignes/s)")
+        self.stdout.write(f"Restant à traiter : {report['remaining']}")
+        self.stdout.write(self.style.SUCCESS(f"Demandes anonymisées : {report['rows']}"))
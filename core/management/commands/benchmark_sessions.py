@@ -0,0 +1,135 @@
+import random
+import statistics
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+# Moteurs comparés : ceux de SESSION_BACKEND, plus cached_db (écriture en base à chaque modification)
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'write_behind': 'core.sessions',
+    'cache': 'django.contrib.sessions.backends.cache',
+}
+
+
+class Command(BaseCommand):
+    help = ("Compare les moteurs de session (requêtes SQL et latence par requête authentifiée) "
+            "sous charge concurrente")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Nombre de clients simultanés")
+        parser.add_argument('--requests', type=int, default=200, help="Requêtes par client")
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help="Part des requêtes qui modifient la session")
+        parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+        parser.add_argument('--cache-url', default=None,
+                            help="Redis à utiliser (par défaut REDIS_CACHE_URL ; vide : cache mémoire local)")
+        parser.add_argument('--email', default=None, help="Utilisateur connecté (par défaut le premier actif)")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.filter(is_active=True)
+        user = (users.filter(email=options['email']) if options['email'] else users.order_by('pk')).first()
+        if user is None:
+            raise CommandError("Aucun utilisateur actif pour ouvrir les sessions.")
+
+        cache_url = options['cache_url'] if options['cache_url'] is not None else settings.REDIS_CACHE_URL
+        if cache_url:
+            cache_settings = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': cache_url}
+            self.stdout.write(f"Cache : Redis ({cache_url})")
+        else:
+            # Substitut local de Redis : un seul processus, les threads partagent le cache mémoire
+            cache_settings = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                              'LOCATION': 'benchmark-sessions'}
+            self.stdout.write("Cache : mémoire locale (substitut de Redis, REDIS_CACHE_URL vide)")
+        self.stdout.write(f"{options['threads']} clients x {options['requests']} requêtes, "
+                          f"{options['write_ratio']:.0%} d'écritures de session\n")
+
+        for name in options['engines']:
+            with override_settings(SESSION_ENGINE=ENGINES[name], CACHES={'default': cache_settings}):
+                stats = self.run_engine(user, options)
+            self.stdout.write(
+                f"  {name:<13} {stats['rps']:>8.0f} req/s   latence moy. {stats['mean_ms']:6.2f} ms   "
+                f"p95 {stats['p95_ms']:6.2f} ms   {stats['queries']:.2f} requêtes SQL/req   "
+                f"erreurs {stats['errors']}"
+            )
+
+    def run_engine(self, user, options):
+        store_class = import_module(settings.SESSION_ENGINE).SessionStore
+        session_keys = []
+        for index in range(options['threads']):
+            session = store_class()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.save()
+            session_keys.append(session.session_key)
+
+        def view(request):
+            request.user.pk
+            if random.random() < options['write_ratio']:
+                request.session['benchmark'] = time.time()
+            return HttpResponse()
+
+        handler = SessionMiddleware(AuthenticationMiddleware(view))
+        factory = RequestFactory()
+        latencies, query_counts, errors = [], [], []
+        lock = threading.Lock()
+
+        def client(session_key):
+            local_latencies, local_queries, local_errors = [], [], 0
+            count = [0]
+
+            def counter(execute, sql, params, many, context):
+                count[0] += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(counter):
+                for index in range(options['requests']):
+                    request = factory.get('/')
+                    request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+                    count[0] = 0
+                    start = time.perf_counter()
+                    try:
+                        handler(request)
+                    except Exception:
+                        local_errors += 1
+                        continue
+                    local_latencies.append(time.perf_counter() - start)
+                    local_queries.append(count[0])
+            connections.close_all()
+            with lock:
+                latencies.extend(local_latencies)
+                query_counts.extend(local_queries)
+                errors.append(local_errors)
+
+        threads = [threading.Thread(target=client, args=(key,)) for key in session_keys]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        for key in session_keys:
+            store_class(key).delete()
+
+        latencies.sort()
+        return {
+            'rps': len(latencies) / elapsed if elapsed else 0,
+            'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+            'queries': statistics.fmean(query_counts) if query_counts else 0,
+            'errors': sum(errors),
+        }
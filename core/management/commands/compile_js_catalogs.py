@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.jsi18n import compile_catalogs, get_catalog_dir
+
+
+class Command(BaseCommand):
+    help = "Précompile le catalogue JavaScript (djangojs) de chaque langue dans un fichier statique versionné"
+
+    def handle(self, *args, **kwargs):
+        manifest = compile_catalogs()
+        for lang, filename in manifest.items():
+            self.stdout.write(f"  {lang} : {filename}")
+        self.stdout.write(self.style.SUCCESS(f"Catalogues écrits dans {get_catalog_dir()} : {len(manifest)}"))
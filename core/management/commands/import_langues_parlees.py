@@ -1,25 +1,16 @@
-import csv
-
-from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from core.importers import import_reference_csv
 from core.models import LangueParlee
-from core.tasks import translation_content
 
 
 class Command(BaseCommand):
     help = "Importe les langues parlées depuis un fichier CSV"
 
     def handle(self, *args, **kwargs):
-        with open('data/langues_parlees.csv', 'r', encoding='utf-8-sig') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                langue, created = LangueParlee.objects.update_or_create(
-                   code_iso=row['Code ISO'])
-                langue.langue_parlee = row['Nom en français']
-                langue.save()
-            for langue in LangueParlee.objects.all():
-                translation_content.delay("core","LangueParlee", langue.id, "langue_parlee")
-                
-            
-        self.stdout.write(self.style.SUCCESS('Importation terminée avec succès.'))  
\ No newline at end of file
+        stats = import_reference_csv(
+            LangueParlee, 'data/langues_parlees.csv',
+            key_column='Code ISO', value_column='Nom en français', value_field='langue_parlee',
+        )
+        self.stdout.write(f"{stats['created']} créés, {stats['updated']} modifiés, {stats['unchanged']} inchangés.")
+        self.stdout.write(self.style.SUCCESS('Importation terminée avec succès.'))
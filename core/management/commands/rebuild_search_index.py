@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte (greeters, greet-types, destinations)"
+
+    def handle(self, *args, **kwargs):
+        counts = rebuild_search_index()
+        for source, count in counts.items():
+            self.stdout.write(f"  {source} : {count} objets indexés")
+        self.stdout.write(self.style.SUCCESS(f"Objets indexés : {sum(counts.values())}"))
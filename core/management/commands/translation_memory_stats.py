@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Length
+
+from core.models import TranslationMemory
+
+
+class Command(BaseCommand):
+    help = "Affiche les économies réalisées par la mémoire de traduction DeepL"
+
+    def handle(self, *args, **kwargs):
+        totals = TranslationMemory.objects.aggregate(
+            entries=Count('id'),
+            total_hits=Sum('hits'),
+            characters_translated=Sum(Length('source_text')),
+            characters_saved=Sum(F('hits') * Length('source_text')),
+        )
+        self.stdout.write(f"Entrées en mémoire : {totals['entries']}")
+        self.stdout.write(f"Caractères envoyés à DeepL : {totals['characters_translated'] or 0}")
+        self.stdout.write(f"Réutilisations (hits) : {totals['total_hits'] or 0}")
+        self.stdout.write(self.style.SUCCESS(f"Caractères économisés : {totals['characters_saved'] or 0}"))
+
+        by_lang = (TranslationMemory.objects.values('target_lang')
+                   .annotate(entries=Count('id'), total_hits=Sum('hits'))
+                   .order_by('target_lang'))
+        for row in by_lang:
+            self.stdout.write(f"  {row['target_lang']} : {row['entries']} entrées, {row['total_hits']} hits")
@@ -1,4 +1,3 @@
-# Dans le fichier de votre middleware
 import re
 
 from django.conf import settings
@@ -6,63 +5,95 @@ from django.http import HttpResponseRedirect
 from django.utils import translation
 from django.utils.deprecation import MiddlewareMixin
 
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
 
-class UserLanguageRedirectMiddleware(MiddlewareMixin):
+
+class UserLanguageMiddleware(MiddlewareMixin):
     """
-    Ce middleware vérifie si un utilisateur authentifié a une langue préférée
-    différente de celle de l'URL actuelle. Si c'est le cas, il le redirige
-    vers la même page, mais avec le préfixe de sa langue.
+    Applique la langue préférée (lang_com) d'un utilisateur authentifié quand le préfixe
+    de langue de l'URL est différent, avant la résolution de l'URL :
+
+    - navigation GET de premier niveau (page affichée dans le navigateur) : redirection
+      vers la même page avec le bon préfixe, pour que la barre d'adresse et les liens suivent ;
+    - autres requêtes (AJAX/JSON, formulaires POST) : la langue est activée et le préfixe
+      réécrit dans la requête, sans aller-retour réseau ;
+    - redirections émises par les vues (connexion, enregistrement de formulaire) : le préfixe
+      de l'adresse cible est corrigé, ce qui évite une seconde redirection à l'arrivée.
+
+    Les chemins sans préfixe de langue (static, media, i18n, .well-known) et le catalogue
+    JavaScript ne sont pas concernés. Placé après AuthenticationMiddleware.
     """
-    def process_request(self, request):
-        
-        # Ne rien faire si l'utilisateur n'est pas authentifié
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
-            return None
 
-        try:
-            # Langue préférée de l'utilisateur (ex: 'fr')
-            user_lang = request.user.lang_com
-        except AttributeError:
-            # L'utilisateur n'a pas de champ 'lang_com'
-            return None
+    # Chemins, après le préfixe de langue, servis dans la langue de l'URL (catalogue JS)
+    EXEMPT_LOCALIZED_PATHS = ('jsi18n/',)
 
-        if not user_lang:
-            return None # Le champ est défini mais vide
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Calculés une fois par processus
+        self.languages = frozenset(code for code, name in settings.LANGUAGES)
+        codes = '|'.join(re.escape(code) for code in sorted(self.languages, key=len, reverse=True))
+        self.prefix_re = re.compile(rf'^/({codes})/')
+        exempt = [settings.STATIC_URL, settings.MEDIA_URL, '/i18n/', '/.well-known/',
+                  *getattr(settings, 'USER_LANGUAGE_EXEMPT_PATHS', ())]
+        self.exempt_re = re.compile('^(?:%s)' % '|'.join(re.escape(path) for path in exempt if path))
 
-        # Langue actuelle de la requête, déterminée par LocaleMiddleware (ex: 'en')
-        current_lang = translation.get_language()
+    def preferred_language(self, request):
+        """Langue préférée de l'utilisateur si elle est valide (None sinon, ou si anonyme)."""
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        lang = getattr(user, 'lang_com', None)
+        return lang if lang in self.languages else None
 
-        # Si la langue de l'URL est déjà la bonne, on ne fait rien
-        if user_lang == current_lang:
+    def _prefixed(self, path):
+        """(langue du préfixe, reste du chemin) ou None si le chemin n'est pas à traduire."""
+        if self.exempt_re.match(path):
             return None
-            
-        # Vérifier si la langue de l'utilisateur est valide
-        if user_lang not in [lang[0] for lang in settings.LANGUAGES]:
+        match = self.prefix_re.match(path)
+        if match is None or path[match.end():].startswith(self.EXEMPT_LOCALIZED_PATHS):
             return None
+        return match.group(1), path[match.end():]
 
-        # Obtenir le chemin complet avec les paramètres GET (ex: /en/profil/?page=2)
-        full_path = request.get_full_path()
+    def is_navigation(self, request):
+        if request.method != 'GET' or request.GET.get('format') == 'json':
+            return False
+        mode = request.headers.get('Sec-Fetch-Mode')
+        if mode is not None:
+            return mode == 'navigate' and request.headers.get('Sec-Fetch-Dest', 'document') == 'document'
+        # Navigateurs sans en-têtes Fetch Metadata : une page HTML demandée hors AJAX
+        return (request.headers.get('X-Requested-With') != 'XMLHttpRequest'
+                and 'text/html' in request.headers.get('Accept', ''))
 
-        # Remplacer l'ancien préfixe de langue par le nouveau
-        # Gère /en/profil/ -> /fr/profil/
-        new_path = re.sub(f'^/{current_lang}/', f'/{user_lang}/', full_path)
-        
-        # Gère le cas où la langue actuelle était la langue par défaut
-        # sans préfixe (si PREFIX_DEFAULT_LANGUAGE = False)
-        # et que le chemin ne commence pas par un préfixe
-        if (current_lang == settings.LANGUAGE_CODE and 
-            not settings.PREFIX_DEFAULT_LANGUAGE and 
-            not full_path.startswith(f'/{current_lang}/')):
-            
-            # On vérifie que ce n'est pas une URL non-traduite (ex: /admin/, /i18n/)
-            # C'est une simplification ; idéalement, on vérifie si l'URL
-            # fait partie de i18n_patterns. Pour cet exemple, on suppose
-            # que si l'URL ne commence pas par un préfixe, c'est la langue par défaut.
-            new_path = f'/{user_lang}{full_path}'
+    def process_request(self, request):
+        lang = self.preferred_language(request)
+        if lang is None or lang == translation.get_language():
+            return None
+        prefixed = self._prefixed(request.path_info)
+        if prefixed is None or prefixed[0] == lang:
+            return None
 
+        path_info = f'/{lang}/{prefixed[1]}'
+        script_prefix = request.path[:len(request.path) - len(request.path_info)]
+        if self.is_navigation(request):
+            query = request.META.get('QUERY_STRING', '')
+            return HttpResponseRedirect(script_prefix + path_info + (f'?{query}' if query else ''))
 
-        # Si le remplacement a fonctionné et que le chemin a changé
-        if new_path != full_path:
-            return HttpResponseRedirect(new_path)
-            
+        # Résolution en place : i18n_patterns cherche le préfixe de la langue active
+        translation.activate(lang)
+        request.LANGUAGE_CODE = lang
+        request.path_info = path_info
+        request.path = script_prefix + path_info
         return None
+
+    def process_response(self, request, response):
+        if response.status_code not in REDIRECT_STATUSES or not response.has_header('Location'):
+            return response
+        # request.user peut avoir changé pendant la vue (connexion)
+        lang = self.preferred_language(request)
+        location = response['Location']
+        if lang is None or not location.startswith('/') or location.startswith('//'):
+            return response
+        prefixed = self._prefixed(location)
+        if prefixed is not None and prefixed[0] != lang:
+            response['Location'] = f'/{lang}/{prefixed[1]}'
+        return response
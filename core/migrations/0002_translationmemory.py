@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64, verbose_name='Empreinte du texte source')),
+                ('source_lang', models.CharField(default='auto', max_length=10, verbose_name='Langue source')),
+                ('target_lang', models.CharField(max_length=10, verbose_name='Langue cible')),
+                ('formality', models.CharField(default='default', max_length=20, verbose_name='Formalité')),
+                ('source_text', models.TextField(verbose_name='Texte source')),
+                ('translated_text', models.TextField(verbose_name='Texte traduit')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Nombre de réutilisations')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Mémoire de traduction',
+                'verbose_name_plural': 'Mémoires de traduction',
+                'unique_together': {('source_hash', 'source_lang', 'target_lang', 'formality')},
+            },
+        ),
+    ]
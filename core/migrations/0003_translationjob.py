@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_translationmemory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('app_label', models.CharField(max_length=100)),
+                ('model_name', models.CharField(max_length=100)),
+                ('object_id', models.PositiveIntegerField()),
+                ('field_name', models.CharField(max_length=100)),
+                ('source_hash', models.CharField(blank=True, default='', max_length=64, verbose_name='Empreinte du dernier texte traduit')),
+                ('pending_since', models.DateTimeField(blank=True, null=True, verbose_name='Tâche en attente depuis')),
+                ('translated_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de la dernière traduction')),
+            ],
+            options={
+                'verbose_name': 'Suivi de traduction',
+                'verbose_name_plural': 'Suivis de traduction',
+                'unique_together': {('app_label', 'model_name', 'object_id', 'field_name')},
+            },
+        ),
+    ]
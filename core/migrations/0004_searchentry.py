@@ -0,0 +1,78 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+# Index plein texte propres au moteur : PostgreSQL (tsvector + trigrammes) ou SQLite (FTS5)
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX core_searchentry_tsv ON core_searchentry "
+    "USING gin (to_tsvector('simple', title || ' ' || body))",
+    "CREATE INDEX core_searchentry_trgm ON core_searchentry USING gin (title gin_trgm_ops)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS core_searchentry_trgm",
+    "DROP INDEX IF EXISTS core_searchentry_tsv",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_searchentry_fts USING fts5("
+    "title, body, content='core_searchentry', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER core_searchentry_au AFTER UPDATE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO core_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_searchentry_au",
+    "DROP TRIGGER IF EXISTS core_searchentry_ad",
+    "DROP TRIGGER IF EXISTS core_searchentry_ai",
+    "DROP TABLE IF EXISTS core_searchentry_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRESQL_BACKWARD, 'sqlite': SQLITE_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_translationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20, verbose_name="Type d'objet")),
+                ('object_id', models.PositiveIntegerField()),
+                ('lang', models.CharField(blank=True, default='', max_length=10, verbose_name='Langue')),
+                ('link_id', models.PositiveIntegerField(verbose_name='Identifiant de la fiche liée')),
+                ('title', models.CharField(default='', max_length=255, verbose_name='Titre')),
+                ('body', models.TextField(blank=True, default='', verbose_name='Texte indexé')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': "Entrée de l'index de recherche",
+                'verbose_name_plural': 'Index de recherche',
+                'unique_together': {('source', 'object_id', 'lang')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -73,11 +73,8 @@ class CommaSeparatedFieldMixin:
 ###################################################################################################
 # Mixin Gestion des permissions des champs définis éditables dans un formulaire
 
-from django.shortcuts import get_object_or_404
-from django.contrib.contenttypes.models import ContentType
-from django.contrib.auth.models import Group
-# Assurez-vous d'importer votre modèle FieldPermission
-from core.models import FieldPermission 
+from core.field_permissions import get_permission_matrix, save_permission_matrix
+from core.roles import user_in_groups
 
 class FormFieldPermissionMixin:
     permission_groups = []  
@@ -92,56 +89,32 @@ class FormFieldPermissionMixin:
         if not self.permission_groups: # Indentation corrigée
             return False # Indentation corrigée
 
-        return user.groups.filter(name__in=self.permission_groups).exists() # Indentation corrigée
+        return user_in_groups(user, *self.permission_groups)
 
     def get_field_permissions(self, obj):
         if not self.target_group_name:
             raise ValueError("Le nom du groupe cible n'est pas défini.")
 
-        target_group = get_object_or_404(Group, name=self.target_group_name)
-        content_type = ContentType.objects.get_for_model(obj)
-        permissions = FieldPermission.objects.filter(
-            content_type=content_type,
-            object_id=obj.id,
-            app_name=self.app_name,
-            target_group=target_group
-        )
-        return {p.field_name: p.is_editable for p in permissions}
+        return get_permission_matrix(obj, self.target_group_name, self.app_name)
 
     # RENOMMÉ POUR CORRESPONDRE À LA VUE
     def update_field_permissions(self, obj, form):
         if not self.target_group_name or not self.app_name:
             raise ValueError("target_group_name et app_name doivent être définis.")
 
-        target_group = get_object_or_404(Group, name=self.target_group_name)
-        content_type = ContentType.objects.get_for_model(obj)
-        
         # Récupère la liste des champs gérables définie dans le formulaire
         current_editable_fields = getattr(form, 'editable_fields', [])
 
-        # 1. NETTOYAGE
-        FieldPermission.objects.filter(
-            content_type=content_type,
-            object_id=obj.id,
-            target_group=target_group,
-            app_name=self.app_name
-        ).exclude(field_name__in=current_editable_fields).delete()
-
-        # 2. MISE À JOUR / CRÉATION
-        for field_name in current_editable_fields:
-            permission_key = f'can_edit_{field_name}'
-            # Important : on vérifie si la clé existe dans cleaned_data
-            if permission_key in form.cleaned_data:
-                is_editable = form.cleaned_data.get(permission_key)
-                
-                FieldPermission.objects.update_or_create(
-                    field_name=field_name,
-                    content_type=content_type,
-                    object_id=obj.id,
-                    app_name=self.app_name,
-                    target_group=target_group,
-                    defaults={'is_editable': is_editable}
-                )
+        # Important : on ne retient que les champs dont la case est présente dans cleaned_data
+        matrix = {
+            field_name: form.cleaned_data.get(f'can_edit_{field_name}')
+            for field_name in current_editable_fields
+            if f'can_edit_{field_name}' in form.cleaned_data
+        }
+
+        # Nettoyage des champs non gérés puis mise à jour / création en un seul upsert
+        save_permission_matrix(obj, self.target_group_name, self.app_name, matrix,
+                               managed_fields=current_editable_fields)
             
             
 
@@ -150,11 +123,14 @@ class FormFieldPermissionMixin:
 # Mixin pour gérer la création/mise à jour des modèles liés à un autre modèle par des champs CharFied
 
 from django.db import transaction
-from core.tasks import translation_content
+from django.db.models import Count
+from core.tasks import translation_content_rows
 
 class RelatedModelsMixin:
     """
     Mixin pour gérer les relations ManyToMany via des champs texte (tags).
+    La synchronisation est ensembliste : un filter(__in) par modèle, un bulk_create
+    des nouveaux noms, un diff de la table de liaison et une seule requête pour les orphelins.
     Déclenche la traduction asynchrone via Celery après le commit de la transaction.
     """
     related_fields = {} 
@@ -166,56 +142,46 @@ class RelatedModelsMixin:
         instance = self.object
         
         for form_field, (model, m2m_field, model_attr) in self.related_fields.items():
-            # 1. Récupération des données du formulaire
-            data_string = form.cleaned_data.get(form_field, "")
-            
-            # 2. Identification des anciens objets pour le nettoyage des orphelins
-            old_objects_ids = list(getattr(instance, m2m_field).values_list('id', flat=True))
-            
-            # 3. Traitement des nouveaux noms saisis
-            names = [name.strip() for name in data_string.split(',') if name.strip()]
-            new_objects = []
-            
-            for name in names:
-                # Création ou récupération de l'objet lié
-                obj, created = model.objects.get_or_create(**{model_attr: name})
-                
-                # 4. Si l'objet est nouveau, on planifie la traduction
-                if created:
-                    # On prépare les données pour Celery
-                    app_label = obj._meta.app_label
-                    model_name = obj._meta.model_name
-                    obj_id = obj.pk
-                    field_name = model_attr
-
-                    # Utilisation de transaction.on_commit pour garantir que l'objet
-                    # existe en base de données avant que Celery ne tente de le lire.
-                    # On utilise des arguments par défaut (a=..., m=...) pour figer 
-                    # les valeurs dans la boucle.
-                    transaction.on_commit(
-                        lambda a=app_label, m=model_name, i=obj_id, f=field_name: 
-                        translation_content.delay(a, m, i, f)
+            # 1. Récupération des noms saisis (sans doublons, ordre conservé)
+            data_string = form.cleaned_data.get(form_field, "") or ""
+            names = list(dict.fromkeys(name.strip() for name in data_string.split(',') if name.strip()))
+
+            # 2. Résolution de tous les noms existants en une requête
+            objects_by_name = {}
+            for obj in model.objects.filter(**{f"{model_attr}__in": names}).order_by('pk'):
+                objects_by_name.setdefault(getattr(obj, model_attr), obj)
+
+            # 3. Création des noms manquants en une requête
+            created_objects = model.objects.bulk_create(
+                [model(**{model_attr: name}) for name in names if name not in objects_by_name]
+            )
+            for obj in created_objects:
+                objects_by_name[getattr(obj, model_attr)] = obj
+
+            # 4. Si des objets sont nouveaux, on planifie une seule tâche de traduction
+            # après le commit pour que les objets existent en base avant que Celery ne les lise.
+            if created_objects:
+                created_ids = [obj.pk for obj in created_objects]
+                transaction.on_commit(
+                    lambda model=model, ids=created_ids, attr=model_attr: translation_content_rows.delay(
+                        model._meta.app_label, model._meta.model_name, ids, attr
                     )
-                
-                new_objects.append(obj)
-            
-            # 5. Mise à jour de la relation ManyToMany de l'instance
-            getattr(instance, m2m_field).set(new_objects)
+                )
 
-            # 6. Suppression des orphelins (objets qui ne sont plus liés à rien)
-            new_objects_ids = [o.id for o in new_objects]
-            removed_ids = set(old_objects_ids) - set(new_objects_ids)
+            # 5. Diff de la table de liaison : ajout et retrait des seules lignes modifiées
+            relation = getattr(instance, m2m_field)
+            old_objects_ids = set(relation.values_list('id', flat=True))
+            new_objects_ids = {objects_by_name[name].pk for name in names}
 
+            added_ids = new_objects_ids - old_objects_ids
+            removed_ids = old_objects_ids - new_objects_ids
+            if added_ids:
+                relation.add(*added_ids)
             if removed_ids:
-                # Récupération dynamique de la relation inverse pour compter les liens
-                m2m_field_obj = instance._meta.get_field(m2m_field)
-                related_query_name = m2m_field_obj.related_query_name()
-
-                for orphan_id in removed_ids:
-                    try:
-                        orphan = model.objects.get(id=orphan_id)
-                        # On ne supprime que si cet objet n'est lié à aucun autre parent
-                        if getattr(orphan, related_query_name).count() == 0:
-                            orphan.delete()
-                    except model.DoesNotExist:
-                        continue
\ No newline at end of file
+                relation.remove(*removed_ids)
+
+                # 6. Suppression des orphelins (objets qui ne sont plus liés à rien) en une requête
+                related_query_name = instance._meta.get_field(m2m_field).related_query_name()
+                model.objects.filter(id__in=removed_ids).annotate(
+                    link_count=Count(related_query_name)
+                ).filter(link_count=0).delete()
@@ -134,3 +134,61 @@ class FieldPermission(models.Model):
 ###################################################################################################
 
 
+# Modèle Mémoire de traduction (cache persistant des traductions DeepL)
+
+class TranslationMemory(models.Model):
+    source_hash = models.CharField(max_length=64, verbose_name=_("Empreinte du texte source"))
+    source_lang = models.CharField(max_length=10, default="auto", verbose_name=_("Langue source"))
+    target_lang = models.CharField(max_length=10, verbose_name=_("Langue cible"))
+    formality = models.CharField(max_length=20, default="default", verbose_name=_("Formalité"))
+    source_text = models.TextField(verbose_name=_("Texte source"))
+    translated_text = models.TextField(verbose_name=_("Texte traduit"))
+    hits = models.PositiveIntegerField(default=0, verbose_name=_("Nombre de réutilisations"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('source_hash', 'source_lang', 'target_lang', 'formality')
+        verbose_name = "Mémoire de traduction"
+        verbose_name_plural = "Mémoires de traduction"
+
+    def __str__(self):
+        return f"{self.source_text[:50]} ({self.source_lang} -> {self.target_lang})"
+###################################################################################################
+# Modèle Suivi des traductions par champ (dédoublonnage des tâches de traduction)
+
+class TranslationJob(models.Model):
+    app_label = models.CharField(max_length=100)
+    model_name = models.CharField(max_length=100)
+    object_id = models.PositiveIntegerField()
+    field_name = models.CharField(max_length=100)
+    source_hash = models.CharField(max_length=64, blank=True, default="", verbose_name=_("Empreinte du dernier texte traduit"))
+    pending_since = models.DateTimeField(blank=True, null=True, verbose_name=_("Tâche en attente depuis"))
+    translated_at = models.DateTimeField(blank=True, null=True, verbose_name=_("Date de la dernière traduction"))
+
+    class Meta:
+        unique_together = ('app_label', 'model_name', 'object_id', 'field_name')
+        verbose_name = "Suivi de traduction"
+        verbose_name_plural = "Suivis de traduction"
+
+    def __str__(self):
+        return f"{self.app_label}.{self.model_name} #{self.object_id} - {self.field_name}"
+###################################################################################################
+# Modèle Index de recherche plein texte (core.search) : une ligne par objet et par langue
+
+class SearchEntry(models.Model):
+    source = models.CharField(max_length=20, verbose_name=_("Type d'objet"))
+    object_id = models.PositiveIntegerField()
+    lang = models.CharField(max_length=10, blank=True, default="", verbose_name=_("Langue"))
+    link_id = models.PositiveIntegerField(verbose_name=_("Identifiant de la fiche liée"))
+    title = models.CharField(max_length=255, default="", verbose_name=_("Titre"))
+    body = models.TextField(blank=True, default="", verbose_name=_("Texte indexé"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('source', 'object_id', 'lang')
+        verbose_name = "Entrée de l'index de recherche"
+        verbose_name_plural = "Index de recherche"
+
+    def __str__(self):
+        return f"{self.source} #{self.object_id} ({self.lang or '*'}) : {self.title}"
+###################################################################################################
@@ -0,0 +1,218 @@
+###################################################################################################
+# Registre des tables de référence (pays, langues, périodes, tranches d'âge...)
+# Chaque table est chargée une fois par processus avec toutes ses colonnes traduites
+# (modeltranslation) dans une structure immuable ; les formulaires en tirent leurs choix
+# et les libellés par id sans requête. Un numéro de version par table, dans le cache Django,
+# est incrémenté après le commit des signaux post_save/post_delete (core.signals) : chaque
+# processus recharge la table au premier accès qui suit. Une table chargée est de toute façon
+# relue après REFERENCE_SNAPSHOT_TTL secondes (perte du cache, modification hors ORM).
+
+import threading
+import time
+from types import MappingProxyType
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.forms.models import ModelChoiceIterator
+from django.utils.translation import get_language
+
+# Tables de référence : modèle -> champ de tri (libellé dans la langue active), None pour l'ordre des id
+REFERENCE_TABLES = {
+    'core.Pays': 'nom_pays',
+    'core.LangueParlee': None,
+    'core.LangueDeepL': None,
+    'core.Periode': None,
+    'core.TrancheAge': None,
+    'core.Types_handicap': None,
+    'core.No_show': None,
+    'core.Beneficiaire': None,
+    'core.Language_communication': None,
+}
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def get_snapshot_ttl():
+    return getattr(settings, 'REFERENCE_SNAPSHOT_TTL', 300)
+
+
+def _label(model):
+    return model._meta.label
+
+
+def _version_key(label):
+    return f"core:reference:{label}:version"
+
+
+def invalidate_reference(model):
+    """Une ligne de la table a changé : tous les processus rechargeront la table."""
+    key = _version_key(_label(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+class _Snapshot:
+    """Contenu d'une table à une version donnée : lignes brutes (tuples) indexées par id."""
+
+    def __init__(self, model, version, attnames, rows, ordering):
+        self.model = model
+        self.version = version
+        self.attnames = attnames
+        self.rows = rows
+        self.by_id = MappingProxyType({row[0]: row for row in rows})
+        self.ordering = ordering
+        self.loaded_at = time.monotonic()
+        # Ordre des id par langue, calculé au premier besoin
+        self.orders = {}
+
+    def is_current(self, version):
+        return self.version == version and time.monotonic() - self.loaded_at < get_snapshot_ttl()
+
+    def instance(self, row):
+        return self.model.from_db(router.db_for_read(self.model), self.attnames, row)
+
+    def ordered_ids(self):
+        if self.ordering is None:
+            return tuple(self.by_id)
+        lang = get_language()
+        order = self.orders.get(lang)
+        if order is None:
+            keyed = [(str(getattr(self.instance(row), self.ordering) or '').casefold(), row[0]) for row in self.rows]
+            order = self.orders[lang] = tuple(pk for key, pk in sorted(keyed))
+        return order
+
+
+def _load(model, version):
+    fields = [field for field in model._meta.concrete_fields]
+    # pk en tête : sert de clé de l'index
+    fields.sort(key=lambda field: not field.primary_key)
+    attnames = [field.attname for field in fields]
+    # Lecture brute (_base_manager) : toutes les colonnes <champ>_<langue>, sans réécriture par la langue active
+    rows = tuple(
+        tuple(instance.__dict__[attname] for attname in attnames)
+        for instance in model._base_manager.order_by('pk')
+    )
+    return _Snapshot(model, version, attnames, rows, REFERENCE_TABLES[_label(model)])
+
+
+def get_snapshot(model):
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    label = _label(model)
+    if label not in REFERENCE_TABLES:
+        raise LookupError(f"{label} n'est pas une table de référence")
+    version = cache.get(_version_key(label), 0)
+    snapshot = _snapshots.get(label)
+    if snapshot is None or not snapshot.is_current(version):
+        with _lock:
+            snapshot = _snapshots.get(label)
+            if snapshot is None or not snapshot.is_current(version):
+                snapshot = _snapshots[label] = _load(model, version)
+    return snapshot
+
+
+###################################################################################################
+# Lecture
+
+def get_objects(model, ids=None):
+    """Instances de la table (copies), triées ; ids restreint la liste."""
+    snapshot = get_snapshot(model)
+    return [snapshot.instance(snapshot.by_id[pk]) for pk in snapshot.ordered_ids() if ids is None or pk in ids]
+
+
+def get_object(model, pk):
+    snapshot = get_snapshot(model)
+    try:
+        row = snapshot.by_id.get(int(pk))
+    except (TypeError, ValueError):
+        return None
+    return snapshot.instance(row) if row is not None else None
+
+
+def get_label(model, pk, default=''):
+    """Libellé (__str__ dans la langue active) d'une ligne par son id."""
+    obj = get_object(model, pk)
+    return str(obj) if obj is not None else default
+
+
+def get_choices(model, ids=None):
+    return [(obj.pk, str(obj)) for obj in get_objects(model, ids)]
+
+
+def find_ids(model, field, values):
+    """Id des lignes dont le champ (non traduit, ex. 'code') vaut l'une des valeurs."""
+    snapshot = get_snapshot(model)
+    index = snapshot.attnames.index(field)
+    values = set(values)
+    return [row[0] for row in snapshot.rows if row[index] in values]
+
+
+###################################################################################################
+# Champs de formulaire servis par le registre
+# A déclarer dans Meta.field_classes (ou directement) ; limit_to(ids) remplace le filtrage du queryset.
+
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for obj in self.field.reference_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.reference_objects()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.reference_objects())
+
+
+class ReferenceFieldMixin:
+    iterator = ReferenceChoiceIterator
+    reference_ids = None
+
+    def limit_to(self, ids):
+        """Restreint les choix à ces id (le queryset suit, pour les usages hors formulaire)."""
+        self.reference_ids = frozenset(ids)
+        self.queryset = self.queryset.model._default_manager.filter(pk__in=self.reference_ids)
+
+    def reference_objects(self):
+        return get_objects(self.queryset.model, self.reference_ids)
+
+    def reference_object(self, value):
+        obj = get_object(self.queryset.model, value)
+        if obj is None or (self.reference_ids is not None and obj.pk not in self.reference_ids):
+            return None
+        return obj
+
+
+class ReferenceModelChoiceField(ReferenceFieldMixin, forms.ModelChoiceField):
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        obj = self.reference_object(getattr(value, 'pk', value))
+        if obj is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice',
+                                  params={'value': value})
+        return obj
+
+
+class ReferenceModelMultipleChoiceField(ReferenceFieldMixin, forms.ModelMultipleChoiceField):
+    def _check_values(self, value):
+        try:
+            value = frozenset(value)
+        except TypeError:
+            raise ValidationError(self.error_messages['invalid_list'], code='invalid_list')
+        objects = []
+        for pk in value:
+            obj = self.reference_object(pk)
+            if obj is None:
+                raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice',
+                                      params={'value': pk})
+            objects.append(obj)
+        return objects
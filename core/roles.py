@@ -0,0 +1,34 @@
+###################################################################################################
+# Résolution des rôles (groupes) d'un utilisateur, mémorisée sur l'objet utilisateur
+
+# Attribut de mémorisation posé sur l'instance utilisateur (request.user pour la durée de la requête)
+GROUPS_CACHE_ATTR = '_cached_group_names'
+
+
+def get_user_groups(user):
+    """
+    Retourne l'ensemble (frozenset) des noms de groupes de l'utilisateur.
+    Les groupes sont chargés en une seule requête puis mémorisés sur l'instance :
+    tous les mixins d'une même requête HTTP partagent ce résultat.
+    """
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    group_names = getattr(user, GROUPS_CACHE_ATTR, None)
+    if group_names is None:
+        group_names = frozenset(user.groups.values_list('name', flat=True))
+        setattr(user, GROUPS_CACHE_ATTR, group_names)
+    return group_names
+
+
+def user_in_groups(user, *group_names):
+    """Vrai si l'utilisateur appartient à au moins un des groupes donnés."""
+    return not get_user_groups(user).isdisjoint(group_names)
+
+
+def invalidate_user_groups(user):
+    """Oublie les groupes mémorisés (appelé sur m2m_changed de user.groups)."""
+    try:
+        delattr(user, GROUPS_CACHE_ATTR)
+    except AttributeError:
+        pass
@@ -0,0 +1,232 @@
+###################################################################################################
+# Recherche plein texte sur les greeters, greet-types et destinations
+# Chaque objet indexé a une ligne SearchEntry par langue traduite (ou une seule, lang='',
+# si aucun de ses champs n'est traduit), tenue à jour par les signaux (core.signals).
+# Moteur : PostgreSQL (tsvector + trigrammes), SQLite (FTS5), à défaut une recherche icontains.
+
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.translation import get_language
+from modeltranslation.translator import NotRegistered, translator
+from modeltranslation.utils import build_localized_fieldname
+
+from core.models import SearchEntry
+
+
+class SearchSource:
+    """
+    Description d'un modèle indexé : champs du titre et du corps (chemins 'a__b' autorisés)
+    et champ de la fiche vers laquelle pointe un résultat.
+    """
+
+    def __init__(self, key, model, title_fields, body_fields, link_field='pk', select_related=(),
+                 url_name=None):
+        self.key = key
+        self.model_label = model
+        self.title_fields = title_fields
+        self.body_fields = body_fields
+        self.link_field = link_field
+        self.select_related = select_related
+        self.url_name = url_name
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def _translated_fields(self, model):
+        try:
+            return translator.get_options_for_model(model).fields
+        except NotRegistered:
+            return {}
+
+    def languages(self):
+        """Codes de langue indexés : toutes les langues si un champ est traduit, sinon ''."""
+        model = self.model
+        for path in (*self.title_fields, *self.body_fields):
+            owner = model
+            *relations, name = path.split('__')
+            for relation in relations:
+                owner = owner._meta.get_field(relation).related_model
+            if name in self._translated_fields(owner):
+                return [code for code, label in settings.LANGUAGES]
+        return ['']
+
+    def _value(self, obj, path, lang):
+        *relations, name = path.split('__')
+        for relation in relations:
+            obj = getattr(obj, relation, None)
+            if obj is None:
+                return ''
+        if lang and name in self._translated_fields(type(obj)):
+            value = getattr(obj, build_localized_fieldname(name, lang), None) or getattr(obj, name, '')
+        else:
+            value = getattr(obj, name, '')
+        return str(value).strip() if value else ''
+
+    def entries(self, obj):
+        link_id = obj.pk if self.link_field == 'pk' else getattr(obj, self.link_field)
+        return [
+            SearchEntry(
+                source=self.key,
+                object_id=obj.pk,
+                lang=lang,
+                link_id=link_id,
+                title=' '.join(filter(None, (self._value(obj, path, lang) for path in self.title_fields)))[:255],
+                body=' '.join(filter(None, (self._value(obj, path, lang) for path in self.body_fields))),
+            )
+            for lang in self.languages()
+        ]
+
+
+SEARCH_SOURCES = {
+    source.key: source for source in (
+        SearchSource('greeter', 'greeters.Greeter',
+                     title_fields=('user__first_name', 'user__last_name'),
+                     body_fields=('city_greeter', 'bio_greeter'),
+                     select_related=('user',), url_name='greeter_detail'),
+        SearchSource('greettype', 'greeters.GreeterType',
+                     title_fields=('titre_greet_type',),
+                     body_fields=('list_places_greet_type', 'description_greet_type'),
+                     link_field='greeter_greet_type_id', url_name='greeter_detail'),
+        SearchSource('destination', 'destination.Destination',
+                     title_fields=('name_dest',),
+                     body_fields=('desc_dest',),
+                     url_name='destination_detail'),
+    )
+}
+
+
+###################################################################################################
+# Mise à jour de l'index
+
+def index_objects(source_key, objects):
+    """(Ré)indexe des objets d'une source : une écriture groupée, langues obsolètes supprimées."""
+    source = SEARCH_SOURCES[source_key]
+    entries = [entry for obj in objects for entry in source.entries(obj)]
+    if not entries:
+        return
+    with transaction.atomic():
+        SearchEntry.objects.filter(source=source_key, object_id__in={entry.object_id for entry in entries}).exclude(
+            lang__in=source.languages()
+        ).delete()
+        SearchEntry.objects.bulk_create(
+            entries, batch_size=500, update_conflicts=True,
+            unique_fields=['source', 'object_id', 'lang'], update_fields=['link_id', 'title', 'body'],
+        )
+
+
+def index_object_ids(source_key, object_ids):
+    source = SEARCH_SOURCES[source_key]
+    objects = source.model.objects.filter(pk__in=list(object_ids)).select_related(*source.select_related)
+    index_objects(source_key, objects)
+
+
+def unindex_object(source_key, object_id):
+    SearchEntry.objects.filter(source=source_key, object_id=object_id).delete()
+
+
+def rebuild_search_index(chunk_size=500):
+    """Reconstruit tout l'index (après une migration ou un import en masse)."""
+    counts = {}
+    for key, source in SEARCH_SOURCES.items():
+        SearchEntry.objects.filter(source=key).delete()
+        queryset = source.model.objects.select_related(*source.select_related).order_by('pk')
+        last_pk = 0
+        counts[key] = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            index_objects(key, chunk)
+            counts[key] += len(chunk)
+            last_pk = chunk[-1].pk
+    return counts
+
+
+###################################################################################################
+# Recherche
+
+def _terms(query):
+    return [term.lower() for term in re.findall(r'\w+', query or '')][:8]
+
+
+def _search_sqlite(terms, raw_query, sources, langs, limit):
+    # Chaque terme est recherché comme préfixe (frappe au clavier) ; bm25 classe les résultats
+    match = ' AND '.join(f'"{term}"*' for term in terms)
+    sql = (
+        "SELECT e.id FROM core_searchentry_fts f JOIN core_searchentry e ON e.id = f.rowid "
+        "WHERE core_searchentry_fts MATCH %s "
+        f"AND e.source IN ({', '.join(['%s'] * len(sources))}) "
+        f"AND e.lang IN ({', '.join(['%s'] * len(langs))}) "
+        "ORDER BY bm25(core_searchentry_fts, 5.0, 1.0) LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *sources, *langs, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_postgresql(terms, raw_query, sources, langs, limit):
+    # Plein texte en préfixe, complété par la similarité de trigrammes sur le titre (fautes de frappe)
+    tsquery = ' & '.join(f"{term}:*" for term in terms)
+    sql = (
+        "SELECT e.id FROM core_searchentry e "
+        "WHERE (to_tsvector('simple', e.title || ' ' || e.body) @@ to_tsquery('simple', %s) "
+        "OR e.title %% %s) "
+        "AND e.source = ANY(%s) AND e.lang = ANY(%s) "
+        "ORDER BY ts_rank(to_tsvector('simple', e.title || ' ' || e.body), to_tsquery('simple', %s)) "
+        "+ similarity(e.title, %s) DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [tsquery, raw_query, list(sources), list(langs), tsquery, raw_query, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_default(terms, raw_query, sources, langs, limit):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(body__icontains=term)
+    return list(
+        SearchEntry.objects.filter(condition, source__in=sources, lang__in=langs)
+        .order_by('title').values_list('pk', flat=True)[:limit]
+    )
+
+
+BACKENDS = {
+    'sqlite': _search_sqlite,
+    'postgresql': _search_postgresql,
+}
+
+
+def search(query, sources=None, lang=None, limit=10):
+    """
+    Recherche dans l'index : [{'source', 'object_id', 'link_id', 'title', 'url_name'}, ...]
+    dans l'ordre de pertinence, un résultat par objet (langue demandée, sinon entrée sans langue).
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    sources = [key for key in (sources or SEARCH_SOURCES) if key in SEARCH_SOURCES]
+    langs = [lang or get_language() or settings.LANGUAGE_CODE, '']
+    backend = BACKENDS.get(connection.vendor, _search_default)
+    ids = backend(terms, ' '.join(terms), sources, langs, limit)
+
+    entries = SearchEntry.objects.in_bulk(ids)
+    results = []
+    seen = set()
+    for entry_id in ids:
+        entry = entries.get(entry_id)
+        if entry is None or (entry.source, entry.object_id) in seen:
+            continue
+        seen.add((entry.source, entry.object_id))
+        results.append({
+            'source': entry.source,
+            'object_id': entry.object_id,
+            'link_id': entry.link_id,
+            'title': entry.title,
+            'url_name': SEARCH_SOURCES[entry.source].url_name,
+        })
+    return results
@@ -0,0 +1,62 @@
+###################################################################################################
+# Sessions servies depuis le cache, écrites en base en différé (SESSION_ENGINE = 'core.sessions')
+#
+# La lecture se fait dans le cache (Redis), la base n'étant lue qu'en cas d'absence.
+# Chaque modification est écrite dans le cache ; la base n'est mise à jour qu'à la création
+# de la session puis au plus une fois par SESSION_WRITE_BEHIND_INTERVAL secondes : si le cache
+# est perdu, on retrouve l'état de la dernière écriture en base.
+#
+# Réservé à un cache partagé entre processus (Redis) : avec le cache mémoire local, chaque
+# processus aurait sa propre copie des sessions. Avec le repli local (REDIS_CACHE_URL vide),
+# settings.py revient aux sessions en base (voir REDIS_CACHE_URL / SESSION_BACKEND).
+
+import logging
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+logger = logging.getLogger('django.contrib.sessions')
+
+KEY_PREFIX = 'core.sessions.write_behind'
+
+
+def get_write_interval():
+    return getattr(settings, 'SESSION_WRITE_BEHIND_INTERVAL', 300)
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def _persisted_key(self):
+        return f"{self.cache_key}:db"
+
+    def _save_db(self, must_create):
+        try:
+            super().save(must_create)
+        except UpdateError:
+            # Ligne supprimée entre deux écritures (clearsessions sur une date d'expiration ancienne)
+            super().save(must_create=True)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if must_create:
+            super().save(must_create=True)
+            self._cache.set(self._persisted_key(), 1, get_write_interval())
+            return
+        # Le marqueur expire après l'intervalle : la première écriture suivante va en base
+        if self._cache.add(self._persisted_key(), 1, get_write_interval()):
+            self._save_db(must_create=False)
+            return
+        try:
+            self._cache.set(self.cache_key, self._get_session(no_load=False), self.get_expiry_age())
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+            self._save_db(must_create=False)
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        session_key = session_key or self.session_key
+        if session_key:
+            self._cache.delete(f"{self.cache_key_prefix}{session_key}:db")
@@ -4,11 +4,13 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import m2m_changed, post_save, pre_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from core.mailjet import get_mailjet_template_id, invalidate_mailjet_templates
 from core.models import Email_Mailjet
+from core.roles import invalidate_user_groups
 from greeters.models import Greeter
 from users.tasks import reset_password, send_email_mailjet
 
@@ -22,7 +24,7 @@ def afficher_domaine_actuel(sender, instance, created, **kwargs):
         if request:
             current_site = get_current_site(request)
             code_email="SETPW"
-            id_template_mailjet= Email_Mailjet.objects.get(code_email=code_email, lang_email=instance.lang_com).id_mailjet_email
+            id_template_mailjet= get_mailjet_template_id(code_email, instance.lang_com)
             reset_password (instance.id,current_site, id_template_mailjet)
             print(f"_(Nouvel utilisateur créé sur le domaine : {current_site.domain})")
         else:
@@ -59,7 +61,7 @@ def notifier_modified_fields( sender, instance,created,**kwargs):
         recipient_email= instance.user.email
         recipient_name= instance.user.first_name + ' ' + instance.user.last_name
         code_email="MODFI"
-        id_template_mailjet= Email_Mailjet.objects.get(code_email=code_email, lang_email=instance.user.lang_com).id_mailjet_email
+        id_template_mailjet= get_mailjet_template_id(code_email, instance.user.lang_com)
         user_first_name = instance.user.first_name    
         vars ={'fields':fields ,'user_first_name':user_first_name}
         send_email_mailjet.delay(recipient_email, recipient_name,  id_template_mailjet, vars)
@@ -94,4 +96,361 @@ def auto_delete_file_on_change(sender, instance, **kwargs):
     new_file = instance.logo_dest
     if not old_file == new_file:
         if old_file and os.path.isfile(old_file.path):
-            os.remove(old_file.path)
\ No newline at end of file
+            os.remove(old_file.path)
+
+###################################################################################################
+# Signal permettant d'invalider les groupes mémorisés d'un utilisateur
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_groups_on_change(sender, instance, action, reverse, **kwargs):
+    """Oublie les groupes mémorisés quand les groupes d'un utilisateur changent."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # reverse=True : modification depuis le groupe (group.user_set), instance est un Group
+    if not reverse:
+        invalidate_user_groups(instance)
+
+###################################################################################################
+# Signaux de maintenance de l'index d'accès aux destinations
+
+from destination.access import (CLUSTER_ADMIN_GROUP, rebuild_destination_access,
+                                sync_destination_access, sync_user_access)
+
+
+@receiver(post_save, sender=Destination)
+def sync_destination_access_on_save(sender, instance, **kwargs):
+    """Recalcule les rôles de la destination (manager, référent, gestionnaires, financier, admin du cluster)."""
+    sync_destination_access([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def sync_user_access_on_save(sender, instance, update_fields=None, **kwargs):
+    """Recalcule le bit administrateur de cluster quand le cluster de l'utilisateur peut avoir changé."""
+    if update_fields is not None and 'code_cluster' not in update_fields:
+        return
+    sync_user_access([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def sync_user_access_on_groups_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recalcule le bit administrateur de cluster quand les membres du groupe Admin changent."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        sync_user_access([instance.pk])
+    elif instance.name == CLUSTER_ADMIN_GROUP:
+        # group.user_set.clear() : les anciens membres ne sont plus connus
+        if pk_set is None:
+            rebuild_destination_access()
+        else:
+            sync_user_access(pk_set)
+
+###################################################################################################
+# Invalidation de la matrice des permissions de champs (modifications hors formulaire, ex. admin)
+
+from core.field_permissions import invalidate_permission_matrix
+from core.models import FieldPermission
+
+
+@receiver([post_save, post_delete], sender=FieldPermission)
+def invalidate_field_permissions_on_change(sender, instance, **kwargs):
+    invalidate_permission_matrix(
+        instance.content_type_id, instance.object_id, instance.target_group_id, instance.app_name
+    )
+
+###################################################################################################
+# Invalidation du registre des templates Mailjet
+
+@receiver([post_save, post_delete], sender=Email_Mailjet)
+def invalidate_mailjet_templates_on_change(sender, **kwargs):
+    invalidate_mailjet_templates()
+
+###################################################################################################
+# Invalidation des ensembles de candidats du moteur d'appariement (greet.matching)
+
+from django.db.models import DEFERRED
+from django.db.models.signals import post_init
+from greet.matching import invalidate_candidate_sets
+from greeters.models import Indisponibility
+
+
+@receiver([post_save, post_delete], sender=Greeter)
+@receiver([post_save, post_delete], sender=Indisponibility)
+def invalidate_candidates_on_greeter_change(sender, **kwargs):
+    invalidate_candidate_sets()
+
+
+@receiver(m2m_changed, sender=Greeter.langues_parlées_greeter.through)
+@receiver(m2m_changed, sender=Greeter.disponibility_time_greeter.through)
+@receiver(m2m_changed, sender=Greeter.interest_greeter.through)
+@receiver(m2m_changed, sender=Greeter.list_places_greeter.through)
+def invalidate_candidates_on_greeter_m2m_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_candidate_sets()
+
+
+@receiver(post_init, sender=User)
+def remember_user_destination(sender, instance, **kwargs):
+    # Destination chargée, sans provoquer la lecture d'un champ différé
+    instance._matching_code_dest_id = instance.__dict__.get('code_dest_id', DEFERRED)
+
+
+@receiver(post_save, sender=User)
+def invalidate_candidates_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Seule la destination (code_dest) de l'utilisateur entre dans les profils d'appariement :
+    les autres enregistrements (connexion, nom, mot de passe...) ne touchent pas aux candidats.
+    Un utilisateur créé n'a pas encore de profil Greeter (sa création invalide elle-même).
+    """
+    previous = instance._matching_code_dest_id
+    instance._matching_code_dest_id = instance.code_dest_id
+    if created or (update_fields is not None and 'code_dest' not in update_fields):
+        return
+    if previous is not DEFERRED and previous == instance.code_dest_id:
+        return
+    invalidate_candidate_sets()
+
+###################################################################################################
+# Mise à jour incrémentale du mur C&G (greet.wall)
+
+from destination.models import Destination_data
+from greet.models import VisitRequest
+from greet.wall import WALL_SETTINGS_FIELDS, invalidate_wall, rebuild_wall, refresh_wall
+
+# Champs d'une demande de visite qui déterminent sa présence et son affichage sur le mur
+WALL_SOURCE_FIELDS = {'destination', 'state', 'greeter', 'walk_date', 'periode', 'group_size',
+                      'visitor_lang', 'disability'}
+
+
+@receiver(post_save, sender=VisitRequest)
+def refresh_wall_on_visit_request_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not WALL_SOURCE_FIELDS & set(update_fields):
+        return
+    refresh_wall([instance.pk])
+
+
+@receiver(m2m_changed, sender=VisitRequest.languages.through)
+@receiver(m2m_changed, sender=VisitRequest.interests.through)
+def refresh_wall_on_visit_request_m2m_change(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Modification depuis la langue ou le centre d'intérêt : demandes concernées
+        if pk_set:
+            refresh_wall(pk_set)
+    else:
+        refresh_wall([instance.pk])
+
+
+@receiver(post_delete, sender=VisitRequest)
+def invalidate_wall_on_visit_request_delete(sender, instance, **kwargs):
+    invalidate_wall(instance.destination_id)
+
+
+@receiver(pre_save, sender=Destination_data)
+def capture_wall_settings(sender, instance, update_fields=None, **kwargs):
+    """Paramètres C&G avant l'enregistrement, pour ne reconstruire le mur que s'ils changent."""
+    if update_fields is not None and not set(WALL_SETTINGS_FIELDS) & set(update_fields):
+        instance._wall_settings = None
+        return
+    # () pour une création : le mur est construit
+    instance._wall_settings = (sender.objects.filter(pk=instance.pk).values_list(
+        *WALL_SETTINGS_FIELDS
+    ).first() or ()) if instance.pk else ()
+
+
+@receiver(post_save, sender=Destination_data)
+def rebuild_wall_on_destination_data_change(sender, instance, **kwargs):
+    old_settings = getattr(instance, '_wall_settings', ())
+    if old_settings is None:
+        return
+    if old_settings == tuple(getattr(instance, field) for field in WALL_SETTINGS_FIELDS):
+        return
+    rebuild_wall(instance.code_dest_data_id)
+
+###################################################################################################
+# Déclinaisons de la photo des greet-types (modifiés depuis l'administration)
+
+from django.db import transaction
+from core.tasks import generate_image_renditions
+from greeters.models import GreeterType
+
+
+@receiver(pre_save, sender=GreeterType)
+def reset_greet_type_renditions(sender, instance, update_fields=None, **kwargs):
+    """Photo remplacée : le manifeste de l'ancienne photo est vidé dans le même enregistrement."""
+    if update_fields is not None and 'photo_greet_type' not in update_fields:
+        instance._photo_changed = False
+        return
+    old_name = sender.objects.filter(pk=instance.pk).values_list('photo_greet_type', flat=True).first() if instance.pk else None
+    instance._photo_changed = instance.photo_greet_type.name != old_name
+    if instance._photo_changed:
+        instance.reset_renditions('photo_greet_type')
+
+
+@receiver(post_save, sender=GreeterType)
+def generate_greet_type_renditions(sender, instance, **kwargs):
+    if getattr(instance, '_photo_changed', False) and instance.photo_greet_type:
+        transaction.on_commit(lambda: generate_image_renditions.delay(
+            app_label='greeters', model_name='GreeterType',
+            object_id=instance.pk, field_name='photo_greet_type'))
+
+###################################################################################################
+# Mise à jour de l'index de recherche plein texte (core.search)
+
+from core.search import index_object_ids, index_objects, unindex_object
+from greeters.models import GreeterType
+
+SEARCH_SENDERS = {Greeter: 'greeter', GreeterType: 'greettype', Destination: 'destination'}
+
+
+@receiver(post_save, sender=Greeter)
+@receiver(post_save, sender=GreeterType)
+@receiver(post_save, sender=Destination)
+def index_on_save(sender, instance, **kwargs):
+    index_objects(SEARCH_SENDERS[sender], [instance])
+
+
+@receiver(post_delete, sender=Greeter)
+@receiver(post_delete, sender=GreeterType)
+@receiver(post_delete, sender=Destination)
+def unindex_on_delete(sender, instance, **kwargs):
+    unindex_object(SEARCH_SENDERS[sender], instance.pk)
+
+
+@receiver(post_save, sender=User)
+def index_greeter_on_user_change(sender, instance, update_fields=None, **kwargs):
+    # Le nom d'un greeter est porté par son utilisateur ; on ignore la connexion
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    index_object_ids('greeter', Greeter.objects.filter(user=instance).values_list('pk', flat=True))
+
+###################################################################################################
+# Invalidation de la cascade cluster -> destination du formulaire Greeter (greeters.cascade)
+# Versions incrémentées après le commit : une requête concurrente ne reconstruit pas la liste
+# à partir de l'état d'avant la modification sous la nouvelle version.
+
+from cluster.models import Cluster, Experience_Greeter, InterestCenter
+from core.models import Language_communication, Pays
+from destination.models import List_places
+from django.db import transaction
+from greeters import cascade
+
+
+@receiver([post_save, post_delete], sender=Cluster)
+def invalidate_cascade_on_cluster_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda pk=instance.pk: cascade.invalidate_cluster(pk))
+
+
+@receiver(m2m_changed, sender=Cluster.interest_center.through)
+@receiver(m2m_changed, sender=Cluster.experience_greeter.through)
+def invalidate_cascade_on_cluster_m2m_change(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        transaction.on_commit(cascade.invalidate_all)
+    else:
+        transaction.on_commit(lambda pk=instance.pk: cascade.invalidate_cluster(pk))
+
+
+@receiver(m2m_changed, sender=Destination.list_places_dest.through)
+@receiver(m2m_changed, sender=Destination_data.langs_com_dest.through)
+def invalidate_cascade_on_destination_m2m_change(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        transaction.on_commit(cascade.invalidate_all)
+    elif isinstance(instance, Destination_data):
+        transaction.on_commit(lambda pk=instance.code_dest_data_id: cascade.invalidate_destination(pk))
+    else:
+        transaction.on_commit(lambda pk=instance.pk: cascade.invalidate_destination(pk))
+
+
+@receiver([post_save, post_delete], sender=Destination_data)
+def invalidate_cascade_on_destination_data_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda pk=instance.code_dest_data_id: cascade.invalidate_destination(pk))
+
+
+# Une destination figure dans la liste de son cluster (qui peut changer) : invalidation globale
+@receiver([post_save, post_delete], sender=Destination)
+@receiver([post_save, post_delete], sender=InterestCenter)
+@receiver([post_save, post_delete], sender=Experience_Greeter)
+@receiver([post_save, post_delete], sender=List_places)
+@receiver([post_save, post_delete], sender=Language_communication)
+@receiver([post_save, post_delete], sender=Pays)
+def invalidate_cascade_on_reference_change(sender, **kwargs):
+    transaction.on_commit(cascade.invalidate_all)
+
+###################################################################################################
+# Invalidation du sélecteur d'utilisateurs (core.user_picker)
+
+from core.user_picker import invalidate_user_picker
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_picker_on_user_change(sender, update_fields=None, **kwargs):
+    # Un utilisateur "Pending" créé via la modale doit apparaître aussitôt ; on ignore la connexion
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_user_picker()
+
+
+# Les titulaires des rôles d'une destination (index d'accès) changent avec la destination
+@receiver([post_save, post_delete], sender=Destination)
+def invalidate_user_picker_on_destination_change(sender, **kwargs):
+    invalidate_user_picker()
+
+###################################################################################################
+# Invalidation du registre des tables de référence (core.reference.REFERENCE_TABLES)
+
+from core.models import Beneficiaire, LangueDeepL, LangueParlee, No_show, Periode, TrancheAge, Types_handicap
+from django.db import transaction
+from core.reference import invalidate_reference
+
+
+@receiver([post_save, post_delete], sender=Pays)
+@receiver([post_save, post_delete], sender=LangueParlee)
+@receiver([post_save, post_delete], sender=LangueDeepL)
+@receiver([post_save, post_delete], sender=Periode)
+@receiver([post_save, post_delete], sender=TrancheAge)
+@receiver([post_save, post_delete], sender=Types_handicap)
+@receiver([post_save, post_delete], sender=No_show)
+@receiver([post_save, post_delete], sender=Beneficiaire)
+@receiver([post_save, post_delete], sender=Language_communication)
+def invalidate_reference_on_change(sender, **kwargs):
+    # Après le commit : un autre processus ne doit pas recharger la table avant que la ligne soit visible
+    transaction.on_commit(lambda: invalidate_reference(sender))
+
+###################################################################################################
+# Invalidation des tables de rotation des greeters (greet.rotation)
+
+from greet.rotation import greeter_destination_ids, invalidate_rotation
+
+
+@receiver(pre_save, sender=Greeter)
+@receiver(pre_save, sender=Destination)
+def capture_rotation_gap(sender, instance, update_fields=None, **kwargs):
+    """Paramètre d'écart avant l'enregistrement, pour n'invalider les tables que s'il change."""
+    field = 'frequency_greeter' if sender is Greeter else 'dispersion_param_dest'
+    if not instance.pk or (update_fields is not None and field not in update_fields):
+        # Création : aucune balade réservée ni ligne de rotation à invalider
+        instance._rotation_gap = None
+        return
+    instance._rotation_gap = (sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first(),)
+
+
+@receiver(post_save, sender=Greeter)
+def invalidate_rotation_on_greeter_change(sender, instance, **kwargs):
+    old_gap = getattr(instance, '_rotation_gap', None)
+    if old_gap is None or old_gap == (instance.frequency_greeter,):
+        return
+    transaction.on_commit(lambda pk=instance.pk: invalidate_rotation(greeter_destination_ids(pk)))
+
+
+@receiver(post_save, sender=Destination)
+def invalidate_rotation_on_destination_change(sender, instance, **kwargs):
+    old_gap = getattr(instance, '_rotation_gap', None)
+    if old_gap is None or old_gap == (instance.dispersion_param_dest,):
+        return
+    transaction.on_commit(lambda pk=instance.pk: invalidate_rotation([pk]))
@@ -1,8 +1,186 @@
+import logging
+from datetime import timedelta
+
 from celery import shared_task
 from django.apps import apps
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from core.translator import translate
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import TranslationJob
+from core.reference import invalidate_reference
+from core.translator import source_hash, translate_batch
+
+logger = logging.getLogger(__name__)
+
+###################################################################################################
+# Suivi des traductions : une seule tâche en attente par (app_label, model_name, object_id, field_name)
+
+def _translation_jobs(app_label, model_name, object_id, field_names):
+    return TranslationJob.objects.filter(
+        app_label=app_label,
+        model_name=model_name.lower(),
+        object_id=object_id,
+        field_name__in=field_names,
+    )
+
+
+def enqueue_translation(app_label, model_name, object_id, *field_names):
+    """
+    Planifie la traduction de champs d'un objet après le commit de la transaction.
+    Un champ qui a déjà une tâche en attente n'est pas replanifié : cette tâche lira
+    la dernière valeur saisie. Retourne la liste des champs effectivement planifiés.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'TRANSLATION_JOB_PENDING_TTL', 3600))
+    claimed = []
+
+    for field_name in field_names:
+        job, created = TranslationJob.objects.get_or_create(
+            app_label=app_label,
+            model_name=model_name.lower(),
+            object_id=object_id,
+            field_name=field_name,
+            defaults={'pending_since': now},
+        )
+        # Réservation atomique : seul le premier appel (ou une réservation expirée) planifie la tâche
+        if created or TranslationJob.objects.filter(pk=job.pk).filter(
+            Q(pending_since__isnull=True) | Q(pending_since__lt=stale)
+        ).update(pending_since=now):
+            claimed.append(field_name)
+
+    if not claimed:
+        return claimed
+
+    # Le délai regroupe les modifications successives rapides dans une seule traduction
+    countdown = getattr(settings, 'TRANSLATION_COALESCE_DELAY', 5)
+    if len(claimed) == 1:
+        transaction.on_commit(lambda: translation_content.apply_async(
+            (app_label, model_name, object_id, claimed[0]), countdown=countdown))
+    else:
+        transaction.on_commit(lambda: translation_content_batch.apply_async(
+            (app_label, model_name, object_id, claimed), countdown=countdown))
+    return claimed
+
+
+def _changed_source_hashes(app_label, model_name, objet, field_names):
+    """Retourne {champ: empreinte} pour les champs non vides dont le texte a changé depuis la dernière traduction."""
+    known_hashes = dict(
+        _translation_jobs(app_label, model_name, objet.pk, field_names).values_list('field_name', 'source_hash')
+    )
+    hashes = {}
+    for field_name in field_names:
+        text = getattr(objet, field_name, None)
+        if not text:
+            continue
+        text_hash = source_hash(text)
+        if known_hashes.get(field_name) != text_hash:
+            hashes[field_name] = text_hash
+    return hashes
+
+
+def _record_translation_jobs(app_label, model_name, objets, field_names):
+    """
+    Mémorise l'empreinte des textes traduits avec succès pour une liste d'objets.
+    L'empreinte est calculée après la sauvegarde car la traduction vers la langue
+    source peut elle-même réécrire le texte source.
+    """
+    now = timezone.now()
+    TranslationJob.objects.bulk_create(
+        [
+            TranslationJob(
+                app_label=app_label,
+                model_name=model_name.lower(),
+                object_id=objet.pk,
+                field_name=field_name,
+                source_hash=source_hash(getattr(objet, field_name)),
+                translated_at=now,
+            )
+            for objet in objets
+            for field_name in field_names
+            if getattr(objet, field_name, None)
+        ],
+        update_conflicts=True,
+        unique_fields=['app_label', 'model_name', 'object_id', 'field_name'],
+        update_fields=['source_hash', 'translated_at'],
+    )
+
+###################################################################################################
+# Traduction des champs d'un objet
+
+
+def translate_object_fields(objet, field_names):
+    """
+    Traduit plusieurs champs d'un objet dans toutes les langues du projet.
+    Un seul appel DeepL par langue (liste de textes) et une seule sauvegarde
+    limitée aux colonnes <champ>_<langue> modifiées.
+    Retourne la liste des colonnes mises à jour.
+    """
+    # Couples (champ, texte) à traduire, les champs vides sont ignorés
+    sources = [(field_name, getattr(objet, field_name, None)) for field_name in field_names]
+    sources = [(field_name, text) for field_name, text in sources if text]
+    if not sources:
+        return []
+
+    texts = [text for field_name, text in sources]
+    update_fields = []
+
+    # Regroupement par langue cible : un appel DeepL pour tous les champs
+    for lang_code in settings.LANGUAGES:
+        lang = lang_code[0]  # ex: 'en-us' ou 'fr'
+        translated_texts = translate_batch(texts, target_lang=lang.upper())
+
+        # Nom du champ de destination (ex: name_en_us, name_fr)
+        lang_suffix = lang.replace("-", "_")
+        for (field_name, original_text), translated_text in zip(sources, translated_texts):
+            target_field = f"{field_name}_{lang_suffix}"
+            if translated_text and hasattr(objet, target_field):
+                setattr(objet, target_field, translated_text)
+                update_fields.append(target_field)
+
+    # Sauvegarde unique des traductions
+    if update_fields:
+        objet.save(update_fields=update_fields)
+    return update_fields
+
+
+@shared_task(
+    bind=True,
+    max_retries=5,
+    # Re-tente automatiquement pour ces erreurs spécifiques
+    autoretry_for=(ObjectDoesNotExist, LookupError, Exception),
+    # Augmente le temps d'attente entre chaque essai (2s, 4s, 8s, 16s...)
+    retry_backoff=True, 
+    retry_backoff_max=600, # Max 10 minutes d'attente
+    retry_jitter=True      # Ajoute un léger délai aléatoire pour éviter les collisions
+)
+def translation_content_batch(self, app_label, model_name, object_id, field_names):
+    """
+    Tâche Celery pour traduire plusieurs champs d'un même objet en une seule fois.
+    Supporte les retries automatiques si la base de données n'est pas encore prête.
+    """
+    try:
+        Model = apps.get_model(app_label, model_name)
+    except LookupError as e:
+        raise ValueError(f"Modèle {app_label}.{model_name} introuvable : {e}")
+
+    # Libère les réservations avant la lecture : une saisie ultérieure replanifiera une tâche
+    _translation_jobs(app_label, model_name, object_id, field_names).update(pending_since=None)
+
+    # Déclenche autoretry si DoesNotExist
+    objet = Model.objects.get(pk=object_id)
+
+    # Seuls les champs dont le texte source a changé depuis la dernière traduction sont traduits
+    hashes = _changed_source_hashes(app_label, model_name, objet, field_names)
+    if not hashes:
+        return f"Aucun texte nouveau à traduire pour {model_name} (ID: {object_id})"
+
+    translate_object_fields(objet, list(hashes))
+    _record_translation_jobs(app_label, model_name, [objet], list(hashes))
+    return f"Traduction terminée avec succès pour {model_name} (ID: {object_id})"
+
 
 @shared_task(
     bind=True,
@@ -26,47 +204,93 @@ def translation_content(self, app_label, model_name, object_id, field_name):
         # Erreur critique de configuration : le modèle n'existe pas
         raise ValueError(f"Modèle {app_label}.{model_name} introuvable : {e}")
 
-    # 2. Récupération de l'objet (déclenche autoretry si DoesNotExist)
+    # 2. Libération de la réservation avant la lecture de l'objet
+    # Une saisie postérieure à cette lecture replanifiera une nouvelle tâche
+    _translation_jobs(app_label, model_name, object_id, [field_name]).update(pending_since=None)
+
+    # 3. Récupération de l'objet (déclenche autoretry si DoesNotExist)
     # C'est ici que l'erreur 'DoesNotExist' est capturée et transformée en retry
     objet = Model.objects.get(pk=object_id)
 
-    # 3. Récupération du texte original
-    original_text = getattr(objet, field_name, None)
-    if not original_text:
-        return f"Aucun texte à traduire pour {model_name} (ID: {object_id})"
+    # 4. Texte source inchangé depuis la dernière traduction réussie : rien à faire
+    hashes = _changed_source_hashes(app_label, model_name, objet, [field_name])
+    if not hashes:
+        return f"Aucun texte nouveau à traduire pour {model_name} (ID: {object_id})"
 
-    # 4. Boucle de traduction à travers les langues du projet
-    for lang_code in settings.LANGUAGES:
-        lang = lang_code[0]  # ex: 'en' ou 'fr-ca'
-        
-        # On ignore la langue source ou si la traduction est vide
-        translated_text = translate(original_text, target_lang=lang.upper())
-        
-        if not translated_text:
-            continue
+    # 5. Traduction dans toutes les langues et sauvegarde des seules colonnes traduites
+    translate_object_fields(objet, [field_name])
+    _record_translation_jobs(app_label, model_name, [objet], list(hashes))
+    
+    return f"Traduction terminée avec succès pour {model_name} (ID: {object_id})"
 
-        # 5. Préparation du nom du champ de destination (ex: name_en, name_fr_ca)
-        lang_suffix = lang.replace("-", "_")
-        target_field = f"{field_name}_{lang_suffix}"
+###################################################################################################
+# Traduction d'un même champ sur plusieurs objets (imports de données de référence)
+
+@shared_task(
+    bind=True,
+    max_retries=5,
+    # Re-tente automatiquement pour ces erreurs spécifiques
+    autoretry_for=(ObjectDoesNotExist, LookupError, Exception),
+    # Augmente le temps d'attente entre chaque essai (2s, 4s, 8s, 16s...)
+    retry_backoff=True, 
+    retry_backoff_max=600, # Max 10 minutes d'attente
+    retry_jitter=True      # Ajoute un léger délai aléatoire pour éviter les collisions
+)
+def translation_content_rows(self, app_label, model_name, object_ids, field_name):
+    """
+    Tâche Celery pour traduire un champ sur un ensemble d'objets d'un même modèle.
+    Les textes sont envoyés à DeepL par listes (un appel par langue et par paquet)
+    et les colonnes traduites sont écrites avec bulk_update.
+    """
+    try:
+        Model = apps.get_model(app_label, model_name)
+    except LookupError as e:
+        raise ValueError(f"Modèle {app_label}.{model_name} introuvable : {e}")
 
-        # 6. Mise à jour de l'attribut si le champ existe sur le modèle
-        if hasattr(objet, target_field):
-            setattr(objet, target_field, translated_text)
+    known_hashes = dict(
+        TranslationJob.objects.filter(
+            app_label=app_label,
+            model_name=model_name.lower(),
+            object_id__in=object_ids,
+            field_name=field_name,
+        ).values_list('object_id', 'source_hash')
+    )
+
+    # Seuls les objets dont le texte source a changé depuis la dernière traduction sont traduits
+    objets = [
+        objet for objet in Model.objects.filter(pk__in=object_ids)
+        if getattr(objet, field_name, None)
+        and known_hashes.get(objet.pk) != source_hash(getattr(objet, field_name))
+    ]
+    if not objets:
+        return f"Aucun texte nouveau à traduire pour {model_name}"
+
+    texts = [getattr(objet, field_name) for objet in objets]
+    update_fields = []
 
-    # 7. Sauvegarde finale des traductions
-    objet.save()
-    
-    return f"Traduction terminée avec succès pour {model_name} (ID: {object_id})"
+    for lang_code in settings.LANGUAGES:
+        lang = lang_code[0]
+        target_field = f"{field_name}_{lang.replace('-', '_')}"
+        if not hasattr(objets[0], target_field):
+            continue
+        translated_texts = translate_batch(texts, target_lang=lang.upper())
+        for objet, translated_text in zip(objets, translated_texts):
+            if translated_text:
+                setattr(objet, target_field, translated_text)
+        update_fields.append(target_field)
+
+    if update_fields:
+        Model.objects.bulk_update(objets, update_fields, batch_size=500)
+        # Pas de post_save après bulk_update : les tables de référence sont invalidées ici
+        transaction.on_commit(lambda: invalidate_reference(Model))
+    _record_translation_jobs(app_label, model_name, objets, [field_name])
+    return f"Traduction terminée avec succès pour {len(objets)} {model_name}"
 
 ###################################################################################################
 # Traduction d'un champ avec des items
 
 @shared_task
 def translation_content_items(app_label,model_name, objet_id, nom_champ):
-    print(app_label)
-    print(model_name)
-    print(objet_id)
-    print(nom_champ)
     try:
         Model = apps.get_model(app_label, model_name)
     except LookupError:
@@ -77,18 +301,18 @@ def translation_content_items(app_label,model_name, objet_id, nom_champ):
         raise ObjectDoesNotExist(f"L'objet avec l'ID {objet_id} n'existe pas dans le modèle {model_name}.") 
     # Récupérer la valeur du champ
     original_value = getattr(objet, nom_champ)
+    # Texte inchangé depuis la dernière traduction réussie
+    hashes = _changed_source_hashes(app_label, model_name, objet, [nom_champ])
     # Si la valeur n'est pas None ou vide
-    if original_value:
+    if original_value and hashes:
         # Séparer les items par virgule et nettoyer les espaces
         items = [item.strip() for item in original_value.split(",") if item.strip()]
+        update_fields = []
 
         for lang_code in settings.LANGUAGES:
             lang = lang_code[0]
-            # Traduire chaque item individuellement
-            translated_items = []
-            for item in items:
-                translated_item = translate(item, target_lang=lang_code[0].upper())
-                translated_items.append(translated_item)
+            # Traduire tous les items en un seul appel DeepL
+            translated_items = translate_batch(items, target_lang=lang.upper())
 
             # Reconstruire la chaîne traduite
             translated_text = ", ".join(translated_items)
@@ -99,37 +323,31 @@ def translation_content_items(app_label,model_name, objet_id, nom_champ):
 
             # Définir l'attribut traduit sur l'objet
             setattr(objet, f"{nom_champ}_{lang}", translated_text)
+            update_fields.append(f"{nom_champ}_{lang}")
 
-        # Sauvegarder l'objet
-        objet.save()
+        # Sauvegarder uniquement les colonnes traduites
+        objet.save(update_fields=update_fields)
+        _record_translation_jobs(app_label, model_name, [objet], [nom_champ])
 ###################################################################################################
 # Fonction d'appel à un template Mailjet
 
-from mailjet_rest import Client
+from core.mailjet import get_mailjet_template_id, send_messages, template_message
 
 
 @shared_task
 def send_email_mailjet (recipient_email,recipient_name, template_mailjet_id, vars):
-    template_id = template_mailjet_id
-    mailjet = Client (auth=(settings.MAILJET_API_KEY,settings.MAILJET_SECRET_KEY),version='v3.1')
-    data = {
-        'Messages':[
-            {
-                'From':None,
-                'TO' : [
-                    {
-                        'Email':recipient_email,
-                        'Name' : recipient_name,
-                    }
-                ],             
-                'TemplateID' : template_id,
-                'TemplateLanguage' : True,
-                'Variables': vars
-            }
-        ]
-    }
-    result = mailjet.send.create(data=data)
-    return result.status_code
+    results = send_messages([template_message(recipient_email, recipient_name, template_mailjet_id, vars)])
+    return results[0]['status']
+
+
+@shared_task
+def send_email_mailjet_batch(messages):
+    """
+    Envoie une liste de messages template (voir core.mailjet.template_message)
+    par paquets Send v3.1 sur une session HTTP réutilisée.
+    Retourne le statut de chaque message.
+    """
+    return send_messages(messages)
  ##################################################################################################
  # Fonction d'envoi du courriel  de creation d'un utilisateur
 
@@ -153,13 +371,10 @@ def envoyer_email_creation_utilisateur(user_id, request):
             
             from .models import Email_Mailjet
             try:
-                template = Email_Mailjet.objects.get(
-                    code_email=code_email,
-                    lang_email=user.lang_com
-                )
+                template_id = get_mailjet_template_id(code_email, user.lang_com)
                 
                 # Appel de votre fonction réelle de reset
-                reset_password(user.id, domain, template.id_mailjet_email)
+                reset_password(user.id, domain, template_id)
                 print(f"Email mis en file d'attente pour {user.email}")
                 
             except Email_Mailjet.DoesNotExist:
@@ -172,6 +387,35 @@ def envoyer_email_creation_utilisateur(user_id, request):
 
     # Enregistre la fonction send pour exécution APRES le commit
     transaction.on_commit(send)
+
+
+def envoyer_emails_creation_utilisateurs(user_ids, request):
+    """
+    Variante groupée de envoyer_email_creation_utilisateur : après le commit, les courriels
+    de création de mot de passe de tous les utilisateurs partent dans une seule tâche Mailjet.
+    """
+    domain = get_current_site(request).domain
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    def send():
+        from .models import Email_Mailjet
+        code_email = "SETPW"
+        messages = []
+        for user in User.objects.filter(id__in=user_ids):
+            try:
+                template_id = get_mailjet_template_id(code_email, user.lang_com)
+            except Email_Mailjet.DoesNotExist:
+                logger.warning("Template Mailjet '%s' introuvable pour la langue '%s' (utilisateur %s)",
+                               code_email, user.lang_com, user.pk)
+                continue
+            messages.append(password_message(user, domain, template_id))
+
+        if messages:
+            send_email_mailjet_batch.delay(messages)
+
+    transaction.on_commit(send)
 ###################################################################################################
 # Fonction permettant d'initialiser ou réinitialiser le mot de passe
 
@@ -187,8 +431,8 @@ from core.tasks import send_email_mailjet
 from users.models import CustomUser
 
 
-def reset_password(user_id, domain, template_mailjet_id):
-    user = CustomUser.objects.get(pk=user_id)
+def password_message(user, domain, template_mailjet_id):
+    """Message Mailjet contenant le lien d'initialisation du mot de passe."""
     token = default_token_generator.make_token(user)
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     path = reverse('password_reset_confirm', kwargs={'uidb64': uid, 'token': token})
@@ -197,58 +441,51 @@ def reset_password(user_id, domain, template_mailjet_id):
     protocol = 'http' if 'localhost' in domain or '127.0.0.1' in domain else 'https'
     creation_link = f"{protocol}://{domain}{path}"
     
-    recipient_email = user.email
     recipient_name = f"{user.first_name} {user.last_name}"
     vars = {'url_password': creation_link, 'user_first_name': user.first_name}
-    
-    send_email_mailjet.delay(recipient_email, recipient_name, template_mailjet_id, vars)
+    return template_message(user.email, recipient_name, template_mailjet_id, vars, custom_id=user.pk)
+
+
+def reset_password(user_id, domain, template_mailjet_id):
+    user = CustomUser.objects.get(pk=user_id)
+    send_email_mailjet_batch.delay([password_message(user, domain, template_mailjet_id)])
 ###################################################################################################
 
-#Vue Redimensionnement des imagesœ
+# Déclinaisons des images téléversées
 
 from celery import shared_task
 from django.conf import settings
-from PIL import Image, UnidentifiedImageError
-import os
+from PIL import UnidentifiedImageError
+
+from core.images import build_renditions
 
 @shared_task
-def resize_image_task(app_label, model_name, object_id, field_name, width, height):
+def generate_image_renditions(app_label, model_name, object_id, field_name):
+    """
+    Produit les déclinaisons (thumb/card/full, WebP + JPEG) d'un ImageField à partir
+    d'un seul décodage et enregistre le manifeste dans le champ '<field_name>_renditions'.
+    L'image d'origine n'est pas modifiée.
+    """
     try:
         Model = apps.get_model(app_label, model_name)
         obj = Model.objects.get(pk=object_id)
         image_field = getattr(obj, field_name)
-        
-        if not image_field or not os.path.exists(image_field.path):
+
+        if not image_field or not image_field.storage.exists(image_field.name):
             return "File not found"
 
-        img_path = image_field.path
-        
         try:
-            with Image.open(img_path) as img:
-                # 1. Vérification de l'intégrité (détecte les fichiers tronqués ou corrompus)
-                img.verify() 
+            manifest = build_renditions(image_field)
         except (UnidentifiedImageError, IOError, SyntaxError) as e:
-            # Si le fichier n'est pas une image, on peut décider de supprimer le fichier
-            # ou simplement loguer l'erreur.
-            return f"Invalid image file: {img_path}. Error: {e}"
+            return f"Invalid image file: {image_field.name}. Error: {e}"
 
-        # Note: img.verify() ferme le descripteur de fichier, on doit donc réouvrir
-        with Image.open(img_path) as img:
-            original_width, original_height = img.size
-            
-            # 2. Test de taille
-            if original_width <= width and original_height <= height:
-                return f"Skipped: {original_width}x{original_height} fits in {width}x{height}"
+        # update() : pas de signal post_save pour une simple écriture du manifeste,
+        # et seulement si l'image n'a pas été remplacée entre-temps
+        Model.objects.filter(pk=object_id, **{field_name: image_field.name}).update(
+            **{f"{field_name}_renditions": manifest}
+        )
+        return f"Success: {len(manifest)} renditions for {model_name} (ID: {object_id})"
 
-            # 3. Traitement
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            img.thumbnail((width, height))
-            img.save(img_path, quality=85, optimize=True)
-            
-        return f"Success: Resized {model_name} (ID: {object_id})"
-        
     except Exception as e:
         return f"System Error: {str(e)}"
     
@@ -0,0 +1,34 @@
+###################################################################################################
+# Balise de gabarit pour afficher la déclinaison adaptée d'une image (WebP puis repli JPEG)
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def rendition_url(obj, field_name, name='card', extension='jpeg'):
+    """{% rendition_url greeter 'photo' 'thumb' %} : URL de la déclinaison (ou de l'original)."""
+    return obj.rendition_url(field_name, name, extension)
+
+
+@register.simple_tag
+def picture(obj, field_name, name='card', alt='', **attrs):
+    """
+    {% picture destination 'logo_dest' 'card' alt=_('Logo') class='img-fluid' %}
+    Produit une balise <picture> : une <source> par format décliné et une <img> de repli.
+    """
+    manifest = obj.get_renditions(field_name).get(name, {})
+    sources = format_html_join(
+        '', '<source srcset="{}" type="{}">',
+        ((url, mime) for mime, url in obj.rendition_sources(field_name, name)),
+    )
+    size_attrs = {'width': manifest['width'], 'height': manifest['height']} if manifest else {}
+    img_attrs = format_html_join(
+        ' ', '{}="{}"', ({**size_attrs, **attrs}).items()
+    )
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}" loading="lazy" {}></picture>',
+        sources, obj.rendition_url(field_name, name, 'jpeg'), alt, img_attrs,
+    )
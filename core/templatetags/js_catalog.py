@@ -0,0 +1,14 @@
+###################################################################################################
+# Balise de gabarit donnant l'URL du catalogue JavaScript précompilé de la langue active (core.jsi18n)
+
+from django import template
+
+from core.jsi18n import get_catalog_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def javascript_catalog_url():
+    """{% javascript_catalog_url %} : remplace {% url 'javascript-catalog' %} (URL versionnée, cache illimité)."""
+    return get_catalog_url()
@@ -0,0 +1,14 @@
+###################################################################################################
+# Balise de gabarit donnant l'URL du paquet des tables de référence (core.bundle)
+
+from django import template
+
+from core.bundle import get_bundle_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def reference_bundle_url():
+    """{% reference_bundle_url %} : URL versionnée du paquet JSON de la langue active."""
+    return get_bundle_url()
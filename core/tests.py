@@ -1,3 +1,531 @@
-from django.test import TestCase
+import datetime
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django import forms
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from cluster.models import Cluster
+from core.fake_mailjet import FakeMailjetServer
+from core.importers import import_reference_csv
+from core.listing import ListQueryMixin, encode_cursor, paginate_keyset
+from core.mailjet import send_messages, template_message
+from core.reference import get_label
+from core.models import No_show, Pays, SearchEntry, TrancheAge, TranslationJob
+from core.search import SEARCH_SOURCES, SearchSource, index_objects, search
+from core.sessions import SessionStore
+from core.tasks import (enqueue_translation, send_email_mailjet_batch, translation_content,
+                        translation_content_batch, translation_content_rows)
+from core.user_picker import UserPickerSelect, pick_users
+from destination.models import Destination
+from greeters.models import Greeter
+
+User = get_user_model()
+
+
+def _messages(count, prefix='visiteur'):
+    return [template_message(f"{prefix}{index}@example.com", f"Visiteur {index}", 1000, {}, custom_id=index)
+            for index in range(count)]
+
+
+###################################################################################################
+# Envoi Mailjet par paquets (faux serveur local)
+
+class SendMessagesTests(TestCase):
+    def test_messages_are_sent_in_chunks_of_fifty(self):
+        with FakeMailjetServer() as fake:
+            results = send_messages(_messages(120))
+        self.assertEqual([len(payload['Messages']) for payload in fake.requests], [50, 50, 20])
+        self.assertEqual(len(results), 120)
+        self.assertTrue(all(result['status'] == 'success' for result in results))
+        self.assertEqual([result['custom_id'] for result in results], [str(index) for index in range(120)])
+
+    def test_rejected_recipient_gets_error_status(self):
+        messages = _messages(3)
+        with FakeMailjetServer(fail_emails=['visiteur1@example.com']):
+            results = send_messages(messages)
+        self.assertEqual([result['status'] for result in results], ['success', 'error', 'success'])
+        self.assertEqual(results[1]['errors'], [{'ErrorMessage': 'Recipient rejected'}])
+
+    def test_rate_limited_chunk_is_retried(self):
+        with FakeMailjetServer(rate_limit=2) as fake:
+            results = send_messages(_messages(60))
+        self.assertEqual(fake.rate_limited, 2)
+        self.assertEqual([len(payload['Messages']) for payload in fake.requests], [50, 10])
+        self.assertTrue(all(result['status'] == 'success' for result in results))
+
+    @override_settings(MAILJET_MAX_RETRIES=1)
+    def test_persistent_rate_limit_gives_error_status(self):
+        with FakeMailjetServer(rate_limit=5) as fake:
+            results = send_messages(_messages(2))
+        self.assertEqual(fake.rate_limited, 2)
+        self.assertEqual(fake.requests, [])
+        self.assertEqual([result['status'] for result in results], ['error', 'error'])
+        self.assertEqual(results[0]['errors'], [{'ErrorMessage': 'HTTP 429'}])
+
+    def test_batch_task(self):
+        with FakeMailjetServer() as fake:
+            results = send_email_mailjet_batch(_messages(51))
+        self.assertEqual(len(fake.requests), 2)
+        self.assertEqual(len(results), 51)
+
+
+###################################################################################################
+# Pagination par clé et filtres des vues de liste
+
+class UserListQuery(ListQueryMixin):
+    filter_fields = {'cluster': 'code_cluster_id', 'actif': 'is_active'}
+
+
+class KeysetPaginationTests(TestCase):
+    columns = ('last_name', 'first_name', 'pk')
+
+    @classmethod
+    def setUpTestData(cls):
+        for index, (first_name, last_name) in enumerate([
+            ('Anne', 'Martin'), ('Paul', 'Bernard'), ('Jeanne', 'Martin'), ('Louis', 'Durand'), ('Marie', 'Bernard'),
+        ]):
+            User.objects.create_user(f"user{index}@example.com", first_name, last_name)
+
+    def setUp(self):
+        self.queryset = User.objects.values('pk', 'first_name', 'last_name')
+
+    def _names(self, page):
+        return [(row['last_name'], row['first_name']) for row in page]
+
+    def test_pages_follow_the_ordering(self):
+        first = paginate_keyset(self.queryset, self.columns, page_size=2)
+        self.assertTrue(first.is_first)
+        self.assertEqual(self._names(first), [('Bernard', 'Marie'), ('Bernard', 'Paul')])
+        second = paginate_keyset(self.queryset, self.columns, first.next_cursor, page_size=2)
+        self.assertFalse(second.is_first)
+        self.assertEqual(self._names(second), [('Durand', 'Louis'), ('Martin', 'Anne')])
+        third = paginate_keyset(self.queryset, self.columns, second.next_cursor, page_size=2)
+        self.assertEqual(self._names(third), [('Martin', 'Jeanne')])
+        self.assertFalse(third.has_next)
+
+    def test_descending_pages(self):
+        first = paginate_keyset(self.queryset, self.columns, page_size=3, descending=True)
+        second = paginate_keyset(self.queryset, self.columns, first.next_cursor, page_size=3, descending=True)
+        self.assertEqual(self._names(first) + self._names(second), [
+            ('Martin', 'Jeanne'), ('Martin', 'Anne'), ('Durand', 'Louis'), ('Bernard', 'Paul'), ('Bernard', 'Marie'),
+        ])
+
+    def test_invalid_cursor_gives_first_page(self):
+        first = paginate_keyset(self.queryset, self.columns, page_size=2)
+        for cursor in ('pas-un-curseur', encode_cursor(['Martin', 'Anne']),
+                       encode_cursor(['Martin', 'Anne', 'abc']), encode_cursor(['Martin', None, 1])):
+            with self.subTest(cursor=cursor):
+                page = paginate_keyset(self.queryset, self.columns, cursor, page_size=2)
+                self.assertTrue(page.is_first)
+                self.assertEqual(page.items, first.items)
+
+    def test_nullable_column(self):
+        User.objects.filter(first_name__in=['Anne', 'Paul']).update(cellphone='0600000000')
+        User.objects.filter(first_name='Louis').update(cellphone='0500000000')
+        queryset = User.objects.values('pk', 'cellphone')
+        for descending in (False, True):
+            with self.subTest(descending=descending):
+                seen, cursor = [], None
+                while True:
+                    page = paginate_keyset(queryset, ('cellphone', 'pk'), cursor, page_size=2, descending=descending)
+                    seen.extend(row['pk'] for row in page)
+                    if not page.has_next:
+                        break
+                    cursor = page.next_cursor
+                expected = sorted(User.objects.values_list('cellphone', 'pk'),
+                                  key=lambda row: (row[0] is None, row[0] or '', row[1]), reverse=descending)
+                self.assertEqual(seen, [pk for cellphone, pk in expected])
+
+    def test_translated_column_in_other_language(self):
+        # Traductions absentes : le tri porte sur raison_noshow_en_us (NULL), pas sur le repli français
+        for reason in ('Pluie', 'Annulation', 'Retard', 'Maladie', 'Grève'):
+            No_show.objects.create(raison_noshow=reason)
+        No_show.objects.filter(raison_noshow_fr='Retard').update(raison_noshow_en_us='Delay')
+        with translation.override('en-us'):
+            seen, cursor = [], None
+            while True:
+                page = paginate_keyset(No_show.objects.all(), ('raison_noshow', 'pk'), cursor, page_size=2)
+                seen.extend(row.pk for row in page)
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+        delay = No_show.objects.get(raison_noshow_fr='Retard').pk
+        others = sorted(No_show.objects.exclude(pk=delay).values_list('pk', flat=True))
+        self.assertEqual(seen, [delay, *others])
+
+    def test_invalid_filter_value_is_ignored(self):
+        factory = RequestFactory()
+        filters = UserListQuery().get_filters(factory.get('/', {'actif': 'maybe', 'cluster': 'abc'}), User)
+        self.assertEqual(filters, {})
+        filters = UserListQuery().get_filters(factory.get('/', {'actif': '0', 'cluster': '3'}), User)
+        self.assertEqual(filters, {'actif': ('is_active', False), 'cluster': ('code_cluster_id', 3)})
+
+    def test_list_view_with_invalid_parameters(self):
+        admin = User.objects.create_superuser('admin@example.com', 'motdepasse', 'Admin', 'Test')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('user_list'), {'actif': 'maybe', 'curseur': '%%%', 'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 5)
+
+
+###################################################################################################
+# Périmètre du sélecteur d'utilisateurs
+
+class UserPickerScopeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        country = Pays.objects.create(code_iso='FRA', nom_pays='France')
+        cls.cluster = Cluster.objects.create(code_cluster='NA', name_cluster='Nouvelle-Aquitaine',
+                                             statut_cluster='Active')
+        other_cluster = Cluster.objects.create(code_cluster='OC', name_cluster='Occitanie',
+                                               statut_cluster='Active')
+        cls.destination = Destination.objects.create(code_cluster=cls.cluster, code_dest='BDX', name_dest='Bordeaux',
+                                                     country_dest=country, URL_retry_dest='https://example.com')
+        other_destination = Destination.objects.create(code_cluster=cls.cluster, code_dest='ARC',
+                                                       name_dest='Arcachon', country_dest=country,
+                                                       URL_retry_dest='https://example.com')
+
+        cls.cluster_user = User.objects.create_user('cluster@example.com', 'Claire', 'Cluster',
+                                                    code_cluster=cls.cluster)
+        cls.dest_user = User.objects.create_user('dest@example.com', 'Denis', 'Dest', code_cluster=cls.cluster,
+                                                 code_dest=cls.destination)
+        cls.other_dest_user = User.objects.create_user('arcachon@example.com', 'Alice', 'Arcachon',
+                                                       code_cluster=cls.cluster, code_dest=other_destination)
+        cls.other_cluster_user = User.objects.create_user('occitanie@example.com', 'Omar', 'Occitanie',
+                                                          code_cluster=other_cluster)
+        cls.pending_user = User.objects.create_user('attente@example.com', 'Paula', 'Attente', is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def _ids(self, page):
+        return {result['id'] for result in page['results']}
+
+    def test_destination_scope(self):
+        page = pick_users('destination', 'NA', 'BDX')
+        self.assertEqual(self._ids(page), {self.cluster_user.pk, self.dest_user.pk, self.pending_user.pk})
+
+    def test_cluster_scope(self):
+        page = pick_users('cluster', 'NA')
+        self.assertEqual(self._ids(page), {self.cluster_user.pk, self.pending_user.pk})
+
+    def test_selected_user_outside_scope_is_excluded(self):
+        page = pick_users('destination', 'NA', 'BDX', term='Claire',
+                          selected=[self.dest_user.pk, self.other_cluster_user.pk, self.other_dest_user.pk])
+        self.assertEqual(self._ids(page), {self.cluster_user.pk, self.dest_user.pk})
+
+    def test_pages_with_cursor(self):
+        seen, cursor = [], None
+        while True:
+            page = pick_users('destination', 'NA', 'BDX', limit=1, cursor=cursor)
+            self.assertEqual(len(page['results']), 1)
+            seen.extend(result['id'] for result in page['results'])
+            cursor = page['next']
+            if cursor is None:
+                break
+        # Tri (nom, prénom, id)
+        self.assertEqual(seen, [self.pending_user.pk, self.cluster_user.pk, self.dest_user.pk])
+
+    def test_widget_renders_current_value_only(self):
+        class RoleForm(forms.Form):
+            manager = forms.ModelChoiceField(queryset=User.objects.all(), required=False,
+                                             widget=UserPickerSelect('destination'))
+
+        form = RoleForm(initial={'manager': self.dest_user.pk})
+        with self.assertNumQueries(1):
+            html = str(form['manager'])
+        self.assertIn('data-user-picker="destination"', html)
+        self.assertIn(f'data-picker-url="{reverse("user_picker")}"', html)
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn(f'value="{self.dest_user.pk}" selected', html)
+        # Validation sur le queryset complet, hors des options rendues
+        self.assertTrue(RoleForm({'manager': self.other_cluster_user.pk}).is_valid())
+
+    def test_legacy_views_require_login(self):
+        for url in (reverse('ajax_filter_users'), reverse('get-users')):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'code_cluster': 'NA'})
+                self.assertEqual(response.status_code, 302)
+
+    def test_legacy_view_returns_scope(self):
+        self.client.force_login(self.dest_user)
+        response = self.client.get(reverse('ajax_filter_users'),
+                                   {'code_cluster': 'NA', 'code_dest': 'BDX', 'selected': self.other_cluster_user.pk})
+        self.assertEqual({result['id'] for result in response.json()},
+                         {self.cluster_user.pk, self.dest_user.pk, self.pending_user.pk})
+
+    def test_paginated_view(self):
+        self.client.force_login(self.dest_user)
+        response = self.client.get(reverse('user_picker'),
+                                   {'scope': 'destination', 'code_cluster': 'NA', 'code_dest': 'BDX', 'limit': 2})
+        page = response.json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNotNone(page['next'])
+        response = self.client.get(reverse('user_picker'), {'scope': 'destination', 'code_cluster': 'NA',
+                                                            'code_dest': 'BDX', 'limit': 2, 'cursor': page['next']})
+        self.assertEqual([result['id'] for result in response.json()['results']], [self.dest_user.pk])
+
+
+###################################################################################################
+# Index de recherche plein texte (FTS5 sous SQLite)
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Index FTS5 propre à SQLite")
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Pays.objects.create(code_iso='FRA', nom_pays='France')
+        cluster = Cluster.objects.create(code_cluster='NA', name_cluster='Nouvelle-Aquitaine', statut_cluster='Active')
+        cls.destination = Destination.objects.create(code_cluster=cluster, code_dest='BDX', name_dest='Bordeaux',
+                                                     desc_dest='Le port de la Lune', country_dest=cls.country,
+                                                     URL_retry_dest='https://example.com')
+        cls.user = User.objects.create_user('gaston@example.com', 'Gaston', 'Lagaffe', code_dest=cls.destination)
+        cls.greeter = Greeter.objects.create(user=cls.user, country_greeter=cls.country,
+                                             age_greeter=TrancheAge.objects.create(),
+                                             arrival_greeter=datetime.date(2024, 1, 1), city_greeter='Talence')
+
+    def _found(self, query, sources, lang=None):
+        return {result['object_id'] for result in search(query, sources=sources, lang=lang)}
+
+    def _fts_rows(self, term):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM core_searchentry_fts WHERE core_searchentry_fts MATCH %s",
+                           [f'"{term}"*'])
+            return cursor.fetchone()[0]
+
+    def assertIndexConsistent(self):
+        # La table FTS5 (contenu externe) doit refléter exactement core_searchentry
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO core_searchentry_fts(core_searchentry_fts, rank) "
+                           "VALUES ('integrity-check', 1)")
+
+    def test_index_search_delete_round_trip(self):
+        self.assertEqual(self._found('bordeaux', ['destination']), {self.destination.pk})
+        # Préfixe, sans accents ni casse
+        self.assertEqual(self._found('LUN', ['destination']), {self.destination.pk})
+        self.assertEqual(search('talence', sources=['greeter'])[0]['link_id'], self.greeter.pk)
+
+        destination = Destination.objects.create(code_cluster=self.destination.code_cluster, code_dest='ARC',
+                                                 name_dest='Arcachon', country_dest=self.country,
+                                                 URL_retry_dest='https://example.com')
+        self.assertEqual(self._found('arcachon', ['destination']), {destination.pk})
+        destination.delete()
+        self.assertEqual(self._found('arcachon', ['destination']), set())
+        self.assertEqual(self._fts_rows('arcachon'), 0)
+        self.assertIndexConsistent()
+
+    def test_upsert_updates_fulltext_index(self):
+        entry_id = SearchEntry.objects.get(source='destination', object_id=self.destination.pk).pk
+        self.destination.name_dest = 'Burdigala'
+        self.destination.save()
+        # Même ligne mise à jour (ON CONFLICT DO UPDATE) : le déclencheur UPDATE tient FTS5 à jour
+        self.assertEqual(SearchEntry.objects.get(source='destination', object_id=self.destination.pk).pk, entry_id)
+        self.assertEqual(self._found('burdigala', ['destination']), {self.destination.pk})
+        self.assertEqual(self._found('bordeaux', ['destination']), set())
+        self.assertEqual(self._fts_rows('bordeaux'), 0)
+        self.assertIndexConsistent()
+
+    def test_user_name_change_reindexes_greeter(self):
+        self.user.last_name = 'Prunelle'
+        self.user.save()
+        self.assertEqual(self._found('prunelle', ['greeter']), {self.greeter.pk})
+        self.assertEqual(self._found('lagaffe', ['greeter']), set())
+
+        # Connexion : pas de réindexation
+        with mock.patch('core.signals.index_object_ids') as index:
+            self.user.save(update_fields=['last_login'])
+        index.assert_not_called()
+
+    def test_entries_per_language(self):
+        # Source dont le titre est traduit : une entrée par langue, recherche dans la langue demandée
+        source = SearchSource('pays', 'core.Pays', title_fields=('nom_pays',), body_fields=())
+        with mock.patch.dict(SEARCH_SOURCES, {'pays': source}):
+            germany = Pays.objects.create(code_iso='DEU', nom_pays_fr='Allemagne', nom_pays_de='Deutschland',
+                                          nom_pays_en_us='Germany')
+            index_objects('pays', [germany])
+            self.assertEqual(
+                set(SearchEntry.objects.filter(source='pays').values_list('lang', 'title')),
+                {('fr', 'Allemagne'), ('de', 'Deutschland'), ('en-us', 'Germany'), ('es', 'Allemagne')},
+            )
+            self.assertEqual(self._found('deutschland', ['pays'], lang='de'), {germany.pk})
+            self.assertEqual(self._found('deutschland', ['pays'], lang='en-us'), set())
+            self.assertEqual(self._found('germany', ['pays'], lang='en-us'), {germany.pk})
+
+            # Source devenue non traduite : les entrées par langue sont remplacées
+            source.title_fields = ('code_iso',)
+            index_objects('pays', [germany])
+            self.assertEqual(list(SearchEntry.objects.filter(source='pays').values_list('lang', 'title')),
+                             [('', 'DEU')])
+            self.assertIndexConsistent()
+
+
+###################################################################################################
+# Import en masse des tables de référence
+
+class ImportReferenceCsvTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.france = Pays.objects.create(code_iso='FRA', nom_pays='France')
+        cls.germany = Pays.objects.create(code_iso='DEU', nom_pays='Germany')
+
+    def setUp(self):
+        cache.clear()
+
+    def _import(self, rows, **kwargs):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w', encoding='utf-8') as csvfile:
+            csvfile.write('Code_Iso;Nom\n' + ''.join(f"{key};{value}\n" for key, value in rows))
+        with mock.patch.object(translation_content_rows, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                stats = import_reference_csv(Pays, path, key_column='Code_Iso', value_column='Nom',
+                                             value_field='nom_pays', delimiter=';', **kwargs)
+        return stats, delay
+
+    def test_counts_and_changed_rows_translated(self):
+        # Table chargée avant l'import : elle doit être relue après le commit
+        self.assertEqual(get_label(Pays, self.germany.pk), 'Germany')
+        stats, delay = self._import([('FRA', 'France'), ('DEU', 'Allemagne'), ('ESP', 'Espagne'), ('', 'Vide')])
+        self.assertEqual(stats, {'created': 1, 'updated': 1, 'unchanged': 1})
+        spain = Pays.objects.get(code_iso='ESP')
+        delay.assert_called_once()
+        app_label, model_name, object_ids, field_name = delay.call_args.args
+        self.assertEqual((app_label, model_name, field_name), ('core', 'Pays', 'nom_pays'))
+        self.assertEqual(sorted(object_ids), sorted([self.germany.pk, spain.pk]))
+
+        self.assertEqual(get_label(Pays, self.germany.pk), 'Allemagne')
+        self.assertEqual(get_label(Pays, spain.pk), 'Espagne')
+
+    def test_unchanged_file_enqueues_nothing(self):
+        stats, delay = self._import([('FRA', 'France'), ('DEU', 'Germany')])
+        self.assertEqual(stats, {'created': 0, 'updated': 0, 'unchanged': 2})
+        delay.assert_not_called()
+
+    def test_translate_disabled(self):
+        stats, delay = self._import([('ITA', 'Italie')], translate=False)
+        self.assertEqual(stats['created'], 1)
+        delay.assert_not_called()
+
+
+###################################################################################################
+# Sessions écrites en base en différé (core.sessions)
+
+@override_settings(SESSION_WRITE_BEHIND_INTERVAL=300)
+class WriteBehindSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.session = SessionStore()
+        self.session['step'] = 1
+        self.session.save()
+
+    def _db_value(self):
+        return Session.objects.get(pk=self.session.session_key).get_decoded().get('step')
+
+    def _cached_value(self):
+        return SessionStore(self.session.session_key)['step']
+
+    def _save(self, value):
+        self.session['step'] = value
+        self.session.save()
+
+    def test_first_save_goes_to_database(self):
+        self.assertEqual(self._db_value(), 1)
+        self.assertTrue(cache.get(self.session._persisted_key()))
+
+    def test_later_saves_go_to_cache_within_interval(self):
+        with self.assertNumQueries(0):
+            self._save(2)
+            self._save(3)
+        self.assertEqual(self._db_value(), 1)
+        self.assertEqual(self._cached_value(), 3)
+
+    def test_database_written_after_marker_expires(self):
+        self._save(2)
+        with mock.patch('time.time', return_value=time.time() + 301):
+            self._save(3)
+            self.assertEqual(self._db_value(), 3)
+            # Nouveau marqueur : l'écriture suivante revient au cache seul
+            self._save(4)
+            self.assertEqual(self._db_value(), 3)
+            self.assertEqual(self._cached_value(), 4)
+
+    def test_deleted_row_is_recreated(self):
+        # Ligne supprimée en base (clearsessions) : UpdateError, la session est recréée
+        Session.objects.filter(pk=self.session.session_key).delete()
+        cache.delete(self.session._persisted_key())
+        self._save(2)
+        self.assertEqual(self._db_value(), 2)
+
+
+###################################################################################################
+# Planification des traductions (une tâche en attente par champ, DeepL évité si le texte est inchangé)
+
+def _translated(texts, target_lang, **kwargs):
+    return [f"[{target_lang}] {text}" for text in texts]
+
+
+class EnqueueTranslationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.no_show = No_show.objects.create(raison_noshow='Pluie')
+
+    def _enqueue(self, *field_names):
+        with mock.patch.object(translation_content, 'apply_async') as single, \
+                mock.patch.object(translation_content_batch, 'apply_async') as batch:
+            with self.captureOnCommitCallbacks(execute=True):
+                claimed = [enqueue_translation('core', 'No_show', self.no_show.pk, *field_names) for _ in range(3)]
+        return claimed, single, batch
+
+    def _translate(self):
+        with mock.patch('core.tasks.translate_batch', side_effect=_translated) as deepl:
+            translation_content('core', 'No_show', self.no_show.pk, 'raison_noshow')
+        return deepl
+
+    def test_repeated_enqueues_collapse_into_one_task(self):
+        claimed, single, batch = self._enqueue('raison_noshow')
+        self.assertEqual(claimed, [['raison_noshow'], [], []])
+        single.assert_called_once_with(('core', 'No_show', self.no_show.pk, 'raison_noshow'), countdown=5)
+        batch.assert_not_called()
+
+    def test_several_fields_in_one_batch_task(self):
+        claimed, single, batch = self._enqueue('raison_noshow', 'raison_noshow_fr')
+        self.assertEqual(claimed[0], ['raison_noshow', 'raison_noshow_fr'])
+        batch.assert_called_once_with(
+            ('core', 'No_show', self.no_show.pk, ['raison_noshow', 'raison_noshow_fr']), countdown=5
+        )
+        single.assert_not_called()
+
+    def test_enqueue_again_once_task_has_run(self):
+        self._enqueue('raison_noshow')
+        self._translate()
+        claimed, single, batch = self._enqueue('raison_noshow')
+        self.assertEqual(claimed[0], ['raison_noshow'])
+        single.assert_called_once()
+
+    @override_settings(TRANSLATION_JOB_PENDING_TTL=60)
+    def test_stale_reservation_is_claimed_again(self):
+        self._enqueue('raison_noshow')
+        TranslationJob.objects.update(pending_since=timezone.now() - datetime.timedelta(minutes=2))
+        claimed, single, batch = self._enqueue('raison_noshow')
+        self.assertEqual(claimed, [['raison_noshow'], [], []])
+        single.assert_called_once()
+
+    def test_unchanged_source_skips_deepl(self):
+        deepl = self._translate()
+        self.assertTrue(deepl.called)
+        self.no_show.refresh_from_db()
+        self.assertEqual(self.no_show.raison_noshow_de, '[DE] Pluie')
+
+        self.assertFalse(self._translate().called)
+
+        No_show.objects.filter(pk=self.no_show.pk).update(raison_noshow_fr='Orage')
+        self.assertTrue(self._translate().called)
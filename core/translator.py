@@ -1,19 +1,184 @@
-
+import hashlib
+import threading
 import time
+from collections import OrderedDict
 
 import deepl
 from deepl.exceptions import TooManyRequestsException
 from django.conf import settings
+from django.db.models import F
+
+from core.models import TranslationMemory
+
+# Nombre maximum de textes acceptés par DeepL dans un seul appel translate_text
+DEEPL_MAX_TEXTS = 50
 
 print(settings.DEEPL_API_KEY)
 translator = deepl.DeepLClient(settings.DEEPL_API_KEY)
-def translate(text, target_lang,retries=5, delay=2):
-    for attempt in range(retries):
-        try:
-            translate=translator.translate_text(text, target_lang=target_lang)
-            return translate.text
-        except TooManyRequestsException:
-            print(f"Erreur 429 trop de requêtes. Attente de {delay} secondes....")
-            time.sleep(delay)
-            delay *= 2
-    raise Exception("Echec de la traduction après plusieurs tentatives.")
+
+###################################################################################################
+# Mémoire de traduction : LRU en mémoire devant la table TranslationMemory
+
+_memory_lru = OrderedDict()
+_memory_lock = threading.Lock()
+
+# Compteurs du processus courant (lru_hits + db_hits = appels DeepL évités)
+memory_stats = {'lru_hits': 0, 'db_hits': 0, 'misses': 0, 'characters_saved': 0}
+
+
+def source_hash(text):
+    """Empreinte SHA-256 d'un texte source (clé de la mémoire et du suivi des traductions)."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _memory_key(text, source_lang, target_lang, formality):
+    return (source_hash(text), source_lang, target_lang, formality)
+
+
+def _lru_get(key):
+    with _memory_lock:
+        if key in _memory_lru:
+            _memory_lru.move_to_end(key)
+            return _memory_lru[key]
+    return None
+
+
+def _lru_set(key, translated_text):
+    max_size = getattr(settings, 'TRANSLATION_MEMORY_LRU_SIZE', 2048)
+    with _memory_lock:
+        _memory_lru[key] = translated_text
+        _memory_lru.move_to_end(key)
+        while len(_memory_lru) > max_size:
+            _memory_lru.popitem(last=False)
+
+
+def _count(**increments):
+    # Compteurs partagés entre les threads du worker : mis à jour sous le même verrou que le LRU
+    with _memory_lock:
+        for name, value in increments.items():
+            memory_stats[name] += value
+
+
+def get_memory_stats():
+    """Retourne une copie des compteurs de la mémoire de traduction du processus."""
+    with _memory_lock:
+        return dict(memory_stats, lru_size=len(_memory_lru))
+
+
+def clear_memory_lru():
+    with _memory_lock:
+        _memory_lru.clear()
+
+###################################################################################################
+# Appels DeepL
+
+def _deepl_translate(texts, target_lang, source_lang, formality, retries, delay):
+    """Appelle DeepL par paquets de DEEPL_MAX_TEXTS textes ; l'ordre est conservé."""
+    options = {}
+    if source_lang != "auto":
+        options['source_lang'] = source_lang
+    if formality != "default":
+        options['formality'] = formality
+
+    translations = []
+    for start in range(0, len(texts), DEEPL_MAX_TEXTS):
+        chunk = texts[start:start + DEEPL_MAX_TEXTS]
+        wait = delay
+        for attempt in range(retries):
+            try:
+                results = translator.translate_text(chunk, target_lang=target_lang, **options)
+                translations.extend(result.text for result in results)
+                break
+            except TooManyRequestsException:
+                print(f"Erreur 429 trop de requêtes. Attente de {wait} secondes....")
+                time.sleep(wait)
+                wait *= 2
+        else:
+            raise Exception("Echec de la traduction après plusieurs tentatives.")
+    return translations
+
+
+def translate(text, target_lang, source_lang=None, formality=None, retries=5, delay=2):
+    return translate_batch([text], target_lang, source_lang=source_lang, formality=formality,
+                           retries=retries, delay=delay)[0]
+
+###################################################################################################
+# Traduction d'une liste de textes vers une langue cible en un minimum d'appels DeepL
+
+def translate_batch(texts, target_lang, source_lang=None, formality=None, retries=5, delay=2):
+    """
+    Traduit une liste de textes vers target_lang en lisant d'abord la mémoire de traduction
+    (LRU du processus puis table TranslationMemory). Seuls les textes inconnus sont envoyés
+    à DeepL, en utilisant l'entrée liste. L'ordre des textes est conservé.
+    """
+    texts = list(texts)
+    target_lang = target_lang.upper()
+    source_lang = source_lang.upper() if source_lang else "auto"
+    formality = formality or "default"
+
+    keys = [_memory_key(text, source_lang, target_lang, formality) for text in texts]
+    translations = [None] * len(texts)
+
+    # 1. LRU du processus
+    missing = {}
+    lru_hits = characters_saved = 0
+    for index, key in enumerate(keys):
+        cached = _lru_get(key)
+        if cached is not None:
+            translations[index] = cached
+            lru_hits += 1
+            characters_saved += len(texts[index])
+        else:
+            missing.setdefault(key, []).append(index)
+    if lru_hits:
+        _count(lru_hits=lru_hits, characters_saved=characters_saved)
+
+    # 2. Table TranslationMemory (une requête pour tous les textes manquants)
+    if missing:
+        memories = TranslationMemory.objects.filter(
+            source_hash__in={key[0] for key in missing},
+            source_lang=source_lang,
+            target_lang=target_lang,
+            formality=formality,
+        )
+        found_ids = []
+        db_hits = characters_saved = 0
+        for memory in memories:
+            key = (memory.source_hash, source_lang, target_lang, formality)
+            indexes = missing.pop(key, None)
+            if indexes is None:
+                continue
+            found_ids.append(memory.id)
+            _lru_set(key, memory.translated_text)
+            for index in indexes:
+                translations[index] = memory.translated_text
+                db_hits += 1
+                characters_saved += len(texts[index])
+        if db_hits:
+            _count(db_hits=db_hits, characters_saved=characters_saved)
+        if found_ids:
+            TranslationMemory.objects.filter(id__in=found_ids).update(hits=F('hits') + 1)
+
+    # 3. DeepL pour les textes inconnus (chaque texte distinct n'est envoyé qu'une fois)
+    if missing:
+        missing_keys = list(missing)
+        source_texts = [texts[missing[key][0]] for key in missing_keys]
+        results = _deepl_translate(source_texts, target_lang, source_lang, formality, retries, delay)
+
+        new_memories = []
+        for key, source_text, translated_text in zip(missing_keys, source_texts, results):
+            _lru_set(key, translated_text)
+            for index in missing[key]:
+                translations[index] = translated_text
+            new_memories.append(TranslationMemory(
+                source_hash=key[0],
+                source_lang=source_lang,
+                target_lang=target_lang,
+                formality=formality,
+                source_text=source_text,
+                translated_text=translated_text,
+            ))
+        TranslationMemory.objects.bulk_create(new_memories, ignore_conflicts=True)
+        _count(misses=len(new_memories))
+
+    return translations
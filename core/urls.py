@@ -29,5 +29,8 @@ urlpatterns = [
     path('core/types_handicap/update/<int:pk>/',core_views.Types_handicapUpdateView.as_view(), name='types_handicap_update'),
     path('core/users_create/',core_views.CreateUserView.as_view(), name='create_user'), # Pour créer un utilisateur depuis un cluster
     path('core/get-languages/', get_languages, name='get-languages'),
+    path('core/reference-data/<str:digest>.json', core_views.reference_bundle, name='reference_bundle'), # Tables de référence, URL versionnée
     path('core/get-users/', core_views.AjaxUserHandlerView.as_view() , name='get-users'), # POur les users crées dans le cluster ou la destination
+    path('core/user-picker/', core_views.UserPickerView.as_view(), name='user_picker'), # Sélecteur d'utilisateurs paginé
+    path('core/search/', core_views.SearchView.as_view(), name='search'), # Recherche instantanée (greeters, greet-types, destinations)
 ]
\ No newline at end of file
@@ -0,0 +1,175 @@
+###################################################################################################
+# Sélecteur d'utilisateurs commun aux formulaires Cluster et Destination
+# (destination.views.AjaxFilterUsersView, core.views.AjaxUserHandlerView, core.views.UserPickerView)
+# Une requête : périmètre cluster/destination, recherche par préfixe, page limitée par clé
+# (nom, prénom, id) ; le résultat est gardé quelques secondes en cache par périmètre.
+# Les formulaires utilisent UserPickerSelect : seule la valeur actuelle est rendue, la recherche et
+# les pages suivantes sont chargées par static/js/user_picker.js depuis UserPickerView.
+
+import hashlib
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.translation import get_language
+from django.utils.translation import gettext as _
+
+from core.listing import paginate_keyset
+from destination.models import Destination, DestinationAccess
+
+User = get_user_model()
+
+VERSION_KEY = 'core:user_picker:version'
+
+# Périmètres : 'destination' (rôles d'une destination : utilisateurs du cluster sans destination
+# inclus, titulaires actuels des rôles) et 'cluster' (administrateurs de cluster, ou périmètre
+# strict de la destination quand elle est indiquée)
+SCOPES = ('destination', 'cluster')
+
+ORDERING = ('last_name', 'first_name', 'pk')
+
+
+def get_cache_timeout():
+    return getattr(settings, 'USER_PICKER_CACHE_TIMEOUT', 30)
+
+
+def get_max_limit():
+    return getattr(settings, 'USER_PICKER_MAX_LIMIT', 100)
+
+
+def invalidate_user_picker():
+    """Un utilisateur a été créé ou modifié : les pages en cache de tous les périmètres expirent."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def scope_filter(scope, cluster_code, code_dest=None):
+    """
+    Condition du périmètre ; les utilisateurs en attente (inactifs) sont toujours proposés.
+    La destination parente et les titulaires de rôles sont des sous-requêtes : une seule requête SQL.
+    """
+    query = Q(is_active=False)
+    if not cluster_code:
+        return query
+
+    active = Q(is_active=True, code_cluster__code_cluster=cluster_code)
+    if code_dest:
+        parent_codes = Destination.objects.filter(code_dest=code_dest).values('code_parent_dest')
+        dest_filter = Q(code_dest__code_dest=code_dest) | Q(code_dest__code_dest__in=parent_codes)
+
+    if scope == 'destination':
+        query |= active & ((dest_filter | Q(code_dest__isnull=True)) if code_dest else Q(code_dest__isnull=True))
+        if code_dest:
+            # Titulaires actuels d'un rôle sur la destination (index d'accès)
+            query |= Q(pk__in=DestinationAccess.objects.filter(
+                destination__code_dest=code_dest, roles__gt=0
+            ).values('user_id'))
+    elif code_dest:
+        query |= active & dest_filter
+    else:
+        query |= active & Q(code_dest__isnull=True)
+    return query
+
+
+def search_filter(term):
+    """Chaque mot doit commencer le nom, le prénom ou le courriel."""
+    query = Q()
+    for word in (term or '').split()[:4]:
+        query &= Q(last_name__istartswith=word) | Q(first_name__istartswith=word) | Q(email__istartswith=word)
+    return query
+
+
+def _label(user, with_status):
+    text = f"{user['first_name']} {user['last_name']}"
+    if with_status:
+        text += f" ({_('Actif') if user['is_active'] else _('En attente')})"
+    return text
+
+
+def pick_users(scope, cluster_code, code_dest=None, term='', limit=None, cursor=None, selected=(),
+               with_status=False):
+    """
+    Page de résultats {'results': [{'id', 'text', 'is_active'}], 'next': curseur}.
+    Les utilisateurs `selected` (valeurs actuelles du formulaire) figurent toujours en première page,
+    s'ils appartiennent au périmètre.
+    """
+    limit = max(1, min(int(limit or get_max_limit()), get_max_limit()))
+    selected = sorted({int(pk) for pk in selected if str(pk).isdigit()})
+    raw_key = '|'.join(str(part) for part in (
+        scope, cluster_code, code_dest, term, limit, cursor, selected, with_status, get_language()
+    ))
+    key = f"core:user_picker:{cache.get(VERSION_KEY, 0)}:{hashlib.md5(raw_key.encode()).hexdigest()}"
+    page = cache.get(key)
+    if page is not None:
+        return page
+
+    scope_query = scope_filter(scope, cluster_code, code_dest)
+    queryset = User.objects.filter(scope_query, search_filter(term)).values(
+        'pk', 'first_name', 'last_name', 'is_active'
+    )
+    rows = paginate_keyset(queryset, ORDERING, cursor, limit)
+    results = [{'id': row['pk'], 'text': _label(row, with_status), 'is_active': row['is_active']}
+               for row in rows.items]
+
+    missing = [pk for pk in selected if pk not in {result['id'] for result in results}]
+    if missing and rows.is_first:
+        # Valeurs actuelles hors de la recherche, mais jamais hors du périmètre
+        extra = User.objects.filter(scope_query, pk__in=missing).values(
+            'pk', 'first_name', 'last_name', 'is_active'
+        )
+        results = [{'id': row['pk'], 'text': _label(row, with_status), 'is_active': row['is_active']}
+                   for row in extra] + results
+
+    page = {'results': results, 'next': rows.next_cursor}
+    cache.set(key, page, get_cache_timeout())
+    return page
+
+
+def picker_params(request):
+    """Paramètres GET communs aux vues du sélecteur."""
+    return {
+        'cluster_code': request.GET.get('code_cluster'),
+        'code_dest': request.GET.get('code_dest') or None,
+        'term': request.GET.get('q', '').strip(),
+        'limit': request.GET.get('limit') if (request.GET.get('limit') or '').isdigit() else None,
+        'cursor': request.GET.get('cursor') or None,
+        'selected': request.GET.getlist('selected'),
+    }
+
+
+class UserPickerSelect(forms.Select):
+    """
+    Liste déroulante d'un sélecteur d'utilisateurs : rend la valeur actuelle seulement (une requête
+    sur sa clé) ; user_picker.js ajoute la recherche et charge les pages du périmètre `scope`.
+    Le queryset du champ ne sert plus qu'à la validation.
+    """
+
+    def __init__(self, scope, attrs=None):
+        super().__init__(attrs)
+        self.scope = scope
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs'].update({
+            'data-user-picker': self.scope,
+            'data-picker-url': reverse('user_picker'),
+        })
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        queryset = getattr(choices, 'queryset', None)
+        if queryset is None:
+            return super().optgroups(name, value, attrs)
+        current = [pk for pk in value if str(pk).isdigit()]
+        self.choices = [('', choices.field.empty_label)] if choices.field.empty_label is not None else []
+        self.choices += [choices.choice(obj) for obj in queryset.filter(pk__in=current)] if current else []
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
@@ -1,6 +1,7 @@
 # Identifiant unique pour les fichiers uploadés
 import os
 import uuid
+from django.conf import settings
 from django.db import models
 from django.utils.timezone import now
 from django.utils.text import slugify
@@ -37,3 +38,15 @@ def get_file_path(instance, filename):
     return os.path.join(f"uploads/{now().strftime('%Y/%m')}/", new_filename)
 
 ###################################################################################################
+# Cache partagé entre processus
+
+# Caches propres au processus : une invalidation n'y est vue que par le processus qui l'a faite
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias='default'):
+    """Vrai si le cache est commun à tous les processus (Redis...), faux pour le cache mémoire local."""
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_CACHE_BACKENDS
@@ -6,7 +6,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
 from django.db.models import Q
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext_lazy as _
@@ -17,11 +17,22 @@ from core.forms import (BeneficiaireCreationForm, Email_MailjetCreationForm,
                         LangueDeepLCreationForm,
                         No_showCreationForm, PeriodeCreationForm,
                         TrancheAgeCreationForm, Types_handicapCreationForm)
+from core.listing import ListQueryMixin
 from core.models import (Beneficiaire, Email_Mailjet,
                          Language_communication, LangueDeepL, No_show, Periode,
                          TrancheAge, Types_handicap)
-from core.tasks import envoyer_email_creation_utilisateur, translation_content
+from core.tasks import enqueue_translation, envoyer_email_creation_utilisateur
+from core.bundle import get_bundle
+from core.jsi18n import get_catalog, language_codes
+from core.reference import get_objects
 from core.translator import translate
+from core.user_picker import SCOPES, pick_users, picker_params
+
+
+class ReferenceListMixin(ListQueryMixin):
+    """Listes des données de référence : tri par libellé, pages plus longues."""
+    default_ordering = 'nom'
+    page_size = 50
 
 
 # Vue création d'un email_mAILJET
@@ -43,10 +54,14 @@ class Email_MailjetCreateView(View):
 ###################################################################################################
 
 # Vue liste des emails Mailjet
-class Email_MailjetListView(View):
+class Email_MailjetListView(ReferenceListMixin, View):
+    template_name = 'core/email_mailjet_list.html'
+    context_object_name = 'emails_Mailjet'
+    ordering_choices = {'nom': ('name_email', 'pk'), 'id': ('pk',)}
+    json_fields = ('id', 'code_email', 'name_email', 'lang_email', 'id_mailjet_email')
+
     def get(self, request, *args, **kwargs):
-        emails_Mailjet = Email_Mailjet.objects.all().order_by('name_email')
-        return render(request, 'core/email_mailjet_list.html', {'emails_Mailjet': emails_Mailjet})
+        return self.list_response(request, Email_Mailjet.objects.all())
 ###################################################################################################
 
 # Vue modification d'un email Mailjet
@@ -85,10 +100,14 @@ class LangueDeepLCreateView(View):
 ###################################################################################################
 
 # Vue liste des langues prises en charge par Deepl
-class LangueDeeplListView(View):
-    def get(self,request, *args,**kwargs):
-        langueDeepl= LangueDeepL.objects.all().order_by('nom_frncais')
-        return  render(request, 'core/langue_deepl_list.html', {'langs_deepl': langueDeepl})
+class LangueDeeplListView(ReferenceListMixin, View):
+    template_name = 'core/langue_deepl_list.html'
+    context_object_name = 'langs_deepl'
+    ordering_choices = {'nom': ('lang_deepl', 'pk'), 'id': ('pk',)}
+    json_fields = ('id', 'code_iso', 'lang_deepl')
+
+    def get(self, request, *args, **kwargs):
+        return self.list_response(request, LangueDeepL.objects.all())
 ###################################################################################################
 
 # Vue modification d'une langue prise en charge par Deepl
@@ -123,17 +142,21 @@ class No_showCreationView(View):
         form = No_showCreationForm(request.POST)
         if form.is_valid():
             no_show=form.save()
-            translation_content.delay("core","No_show", no_show.id,"raison_noshow")
+            enqueue_translation("core","No_show", no_show.id,"raison_noshow")
             messages.success(request, _("La raison de non réalisation {} a été créée.").format(no_show.raison_noshow))
             return redirect('no_show_list')
 ###################################################################################################
 
 # Vue Liste des raisons de non réalisation de l'expérience
 
-class No_showListView(View):
+class No_showListView(ReferenceListMixin, View):
+    template_name = 'core/no_show_list.html'
+    context_object_name = 'no_shows'
+    ordering_choices = {'nom': ('raison_noshow', 'pk'), 'id': ('pk',)}
+    json_fields = ('id', 'raison_noshow')
+
     def get(self, request, *args, **kwargs):
-        no_shows = No_show.objects.all().order_by('raison_noshow')
-        return render(request, 'core/no_show_list.html', {'no_shows': no_shows})
+        return self.list_response(request, No_show.objects.all())
 ###################################################################################################
 
 # Vue Modification d'une raison de non-réalisation de l'expérience
@@ -150,7 +173,7 @@ class No_showUpdateView(View):
         form = No_showCreationForm(request.POST)
         if form.is_valid():
             no_show=form.save()
-            translation_content.delay("core","No_show", no_show.id,"raison_noshow")
+            enqueue_translation("core","No_show", no_show.id,"raison_noshow")
             messages.success(request, _("La raison de non réalisation {} a été modifiée.").format(no_show.raison_noshow))
             return redirect('no_show_list')
 ###################################################################################################
@@ -167,7 +190,7 @@ class BeneficiaireCreationView(View):
         form = BeneficiaireCreationForm(request.POST)
         if form.is_valid:
             beneficiaire=form.save()
-            translation_content.delay("core","Beneficiaire", beneficiaire.id,"nom_beneficiaire")
+            enqueue_translation("core","Beneficiaire", beneficiaire.id,"nom_beneficiaire")
             messages.success(request, _("Le bénéficiaire {} a été créé.").format(beneficiaire.nom_beneficiaire))
             return redirect('beneficiaire_list')
 ###################################################################################################
@@ -186,17 +209,21 @@ class BeneficiaireUpdateView(View):
         form = BeneficiaireCreationForm(request.POST)
         if form.is_valid():
             beneficiaire=form.save()
-            translation_content.delay("core","Beneficiaire", beneficiaire.id,"nom_beneficiaire")
+            enqueue_translation("core","Beneficiaire", beneficiaire.id,"nom_beneficiaire")
             messages.success(request, _("Le bénéficiaire {} a été modifié.").format(beneficiaire.nom_beneficiaire))
             return redirect('beneficiaire_list')
 ###################################################################################################
 
 # Vue Liste des bénéficiaires des dons
 
-class BeneficiaireListView(View):
+class BeneficiaireListView(ReferenceListMixin, View):
+    template_name = 'core/beneficiaire_list.html'
+    context_object_name = 'beneficiaires'
+    ordering_choices = {'nom': ('nom_beneficiaire', 'pk'), 'id': ('pk',)}
+    json_fields = ('id', 'nom_beneficiaire')
+
     def get(self, request, *args, **kwargs):
-        beneficiaires = Beneficiaire.objects.all().order_by('nom_beneficiaire')
-        return render(request, 'core/beneficiaire_list.html', {'beneficiaires': beneficiaires})
+        return self.list_response(request, Beneficiaire.objects.all())
 ###################################################################################################
 
 # Vue Création d'une période de la journée    
@@ -211,17 +238,21 @@ class PeriodeCreationView(View):
         form = PeriodeCreationForm(request.POST)
         if form.is_valid():
             periode=form.save()
-            translation_content.delay("core","Periode", periode.id,"periode_journee")
+            enqueue_translation("core","Periode", periode.id,"periode_journee")
             messages.success(request, _("La pé'periode_createriode de la journée {} a été créée.").format(periode.periode_journee))    
             return redirect('periode_list')
 ###################################################################################################
 
 #Vue Liste des périodes de la journée
 
-class PeriodeListView(View):
+class PeriodeListView(ReferenceListMixin, View):
+    template_name = 'core/periode_list.html'
+    context_object_name = 'periodes'
+    ordering_choices = {'nom': ('periode_journee', 'pk'), 'id': ('pk',)}
+    json_fields = ('id', 'periode_journee')
+
     def get(self, request, *args, **kwargs):
-        periodes = Periode.objects.all().order_by('periode_journee')
-        return render(request, 'core/periode_list.html', {'periodes': periodes})    
+        return self.list_response(request, Periode.objects.all())
 ###################################################################################################
 
 #Vue Modification d'une période de la journée
@@ -237,7 +268,7 @@ class PeriodeUpdateView(View):
         form=PeriodeCreationForm(request.POST)
         if form.is_valid():
             periode=form.save()
-            translation_content.delay("core","Periode", periode.id,"periode_journee")
+            enqueue_translation("core","Periode", periode.id,"periode_journee")
             messages.success(request, _("La période de la journée {} a été modifiée.").format(periode.periode_journee))
             return redirect('periode_list')
 ###################################################################################################
@@ -254,17 +285,21 @@ class TrancheAgeCreationView(View):
         form = TrancheAgeCreationForm(request.POST)
         if form.is_valid():
             tranche_age=form.save()
-            translation_content.delay("core","TrancheAge", tranche_age.id,"tranche_age")
+            enqueue_translation("core","TrancheAge", tranche_age.id,"tranche_age")
             messages.success(request, _("La tranche d'âge {} a été créée.").format(tranche_age.tranche_age))
             return redirect ('tranche_age_list')
 ###################################################################################################
 
 # Vue Liste des tranches d'âges
 
-class TrancheAgeListView(View):
+class TrancheAgeListView(ReferenceListMixin, View):
+    template_name = 'core/tranche_age_list.html'
+    context_object_name = 'tranche_ages'
+    ordering_choices = {'nom': ('tranche_age', 'pk'), 'id': ('pk',)}
+    json_fields = ('id', 'tranche_age')
+
     def get(self, request, *args, **kwargs):
-        tranche_ages = TrancheAge.objects.all().order_by('tranche_age')
-        return render(request, 'core/tranche_age_list.html', {'tranche_ages': tranche_ages})
+        return self.list_response(request, TrancheAge.objects.all())
 ###################################################################################################
 
 # Vue Modification d'une tranche d'âge
@@ -281,7 +316,7 @@ class TrancheAgeUpdateView(View):
         form = TrancheAgeCreationForm(request.POST)
         if form.is_valid():
             tranche_age=form.save()
-            translation_content.delay("core","TrancheAge", tranche_age.id,"tranche_age")
+            enqueue_translation("core","TrancheAge", tranche_age.id,"tranche_age")
             messages.success(request, _("La tranche d'âge {} a été modifiée.").format(tranche_age.tranche))
             return redirect ('tranche_age_list')
 ###################################################################################################
@@ -298,17 +333,21 @@ class Types_handicapCreationView(View):
         form = Types_handicapCreationForm(request.POST  )
         if form.is_valid():
             type_handicap=form.save()
-            translation_content.delay("core","Types_handicap", type_handicap.id,"type_handicap")
+            enqueue_translation("core","Types_handicap", type_handicap.id,"type_handicap")
             messages.success(request, _("Le type de handicap {} a été créé.").format(type_handicap.type_handicap))
             return redirect('types_handicap_list')
 ###################################################################################################
 
 # Vue Liste des types de handicap
 
-class Types_handicapListView(View):
+class Types_handicapListView(ReferenceListMixin, View):
+    template_name = 'core/types_handicap_list.html'
+    context_object_name = 'types_handicap'
+    ordering_choices = {'nom': ('type_handicap', 'pk'), 'id': ('pk',)}
+    json_fields = ('id', 'type_handicap')
+
     def get(self, request, *args, **kwargs):
-        types_handicap = Types_handicap.objects.all().order_by('type_handicap')
-        return render(request, 'core/types_handicap_list.html', {'types_handicap': types_handicap}) 
+        return self.list_response(request, Types_handicap.objects.all())
 ###################################################################################################
 
 # Vue Modification d'un type de handicap 
@@ -325,7 +364,7 @@ class Types_handicapUpdateView(View):
         form = Types_handicapCreationForm(request.POST)
         if form.is_valid():
             type_handicap=form.save()
-            translation_content.delay("core","Types_handicap", type_handicap.id,"type_handicap")
+            enqueue_translation("core","Types_handicap", type_handicap.id,"type_handicap")
             messages.success(request, _("Le type de handicap {} a été modifié.").format(type_handicap.type_handicap))   
             return redirect('types_handicap_list')
 ###################################################################################################                                                                                     
@@ -408,8 +447,39 @@ class CreateUserView(View):
  # Vue Récupérer les langues de communication
 
 def get_languages(request):
-    languages = Language_communication.objects.all().values('code', 'name')
-    return JsonResponse(list(languages), safe=False)
+    # Registre des tables de référence : aucune requête
+    languages = [{'code': obj.code, 'name': obj.name} for obj in get_objects(Language_communication)]
+    return JsonResponse(languages, safe=False)
+
+
+###################################################################################################
+# Catalogue JavaScript d'une langue, rendu une fois par processus et mis en cache indéfiniment (core.jsi18n)
+
+def javascript_catalog(request, lang, digest):
+    if lang not in language_codes():
+        raise Http404
+    current, body = get_catalog(lang)
+    if digest != current:
+        response = redirect('javascript-catalog-hashed', lang, current)
+        response['Cache-Control'] = 'no-cache'
+        return response
+    response = HttpResponse(body, content_type='text/javascript; charset="utf-8"')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+###################################################################################################
+# Paquet JSON des tables de référence de la langue active, mis en cache indéfiniment (core.bundle)
+
+def reference_bundle(request, digest):
+    current, body = get_bundle()
+    response = HttpResponse(body, content_type='application/json')
+    if digest != current:
+        # Empreinte périmée (table modifiée depuis l'affichage de la page) : contenu actuel, sans mise en cache
+        response['Cache-Control'] = 'no-cache'
+    else:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 ###################################################################################################
  #Vue pour récuperer les utilisateurs créés dans les clusters ou destinations
@@ -419,65 +489,21 @@ from django.http import JsonResponse
 from django.views import View
 from django.db.models import Q
 from django.contrib.auth import get_user_model
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils.translation import gettext as _
 from destination.models import Destination
 
 User = get_user_model()
 
-class AjaxUserHandlerView(View):
+class AjaxUserHandlerView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
-        """Filtrage des utilisateurs selon le contexte Cluster/Dest."""
-        cluster_code = request.GET.get('code_cluster')
-        code_dest = request.GET.get('code_dest')
-        
-        # On récupère le type de formulaire si envoyé, sinon on le déduit
-        # Si code_dest est présent, on considère qu'on est en mode "destination"
-        is_dest_mode = bool(code_dest)
-
-        # 1. Base : Inclure systématiquement les utilisateurs "Pending" (inactifs)
-        # pour qu'ils apparaissent dès qu'ils sont créés via la modale
-        query = Q(is_active=False)
-        
-        # 2. Gestion des utilisateurs actifs selon le périmètre
-        if cluster_code:
-            if is_dest_mode:
-                # LOGIQUE STRICTE DESTINATION :
-                # On veut les actifs qui ont EXACTEMENT ce cluster ET cette destination
-                # On exclut ceux qui ont une destination vide ou nulle
-                active_filter = Q(
-                    is_active=True, 
-                    code_cluster__code_cluster=cluster_code,
-                    code_dest__code_dest=code_dest
-                )
-                
-                # Optionnel : Gestion de l'héritage (Parent) si nécessaire
-                dest_obj = Destination.objects.filter(code_dest=code_dest).first()
-                if dest_obj and dest_obj.code_parent_dest:
-                    active_filter |= Q(
-                        is_active=True,
-                        code_cluster__code_cluster=cluster_code,
-                        code_dest__code_dest=dest_obj.code_parent_dest.code_dest
-                    )
-            else:
-                # LOGIQUE CLUSTER (Si pas de code_dest fourni) :
-                # On prend les actifs du cluster qui n'ont PAS de destination
-                active_filter = Q(
-                    is_active=True, 
-                    code_cluster__code_cluster=cluster_code
-                ) & (Q(code_dest__isnull=True) | Q(code_dest__code_dest=''))
-            
-            query |= active_filter
-
-        # Exécution de la requête
-        users = User.objects.filter(query).distinct().order_by('first_name', 'last_name')
-        
-        results = [{
-            "id": user.id, 
-            "text": f"{user.first_name} {user.last_name} ({_('Actif') if user.is_active else _('En attente')})",
-            "is_active": user.is_active
-        } for user in users]
-        
-        return JsonResponse(results, safe=False)
+        """
+        Filtrage des utilisateurs selon le contexte Cluster/Dest (périmètre 'cluster' de core.user_picker) :
+        les "Pending" (inactifs) sont toujours inclus pour apparaître dès leur création via la modale.
+        Tableau JSON d'une page (limit, cursor) ; les formulaires passent par UserPickerView.
+        """
+        page = pick_users('cluster', with_status=True, **picker_params(request))
+        return JsonResponse(page['results'], safe=False)
 
     def post(self, request, *args, **kwargs):
         """Création d'un utilisateur 'Pending'."""
@@ -506,3 +532,36 @@ class AjaxUserHandlerView(View):
 
 ###################################################################################################
 
+
+###################################################################################################
+# Vue Recherche instantanée (greeters, greet-types, destinations) pour la saisie semi-automatique
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.urls import reverse
+
+from core.search import search
+
+
+class SearchView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        sources = request.GET.getlist('type') or None
+        try:
+            limit = min(int(request.GET.get('limit', 10)), 50)
+        except ValueError:
+            limit = 10
+        results = search(request.GET.get('q', ''), sources=sources, limit=limit)
+        for result in results:
+            url_name = result.pop('url_name')
+            result['url'] = reverse(url_name, args=[result['link_id']]) if url_name else None
+        return JsonResponse({'results': results})
+
+
+###################################################################################################
+# Sélecteur d'utilisateurs paginé (recherche par préfixe, curseur) pour les formulaires Cluster/Destination
+
+class UserPickerView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        scope = request.GET.get('scope', 'destination')
+        if scope not in SCOPES:
+            return JsonResponse({'erreur': _("Périmètre inconnu.")}, status=400)
+        return JsonResponse(pick_users(scope, with_status=scope == 'cluster', **picker_params(request)))
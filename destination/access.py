@@ -0,0 +1,108 @@
+###################################################################################################
+# Maintenance et lecture de l'index d'accès aux destinations (DestinationAccess)
+# Bit administrateur de cluster : membre du groupe Admin rattaché (user.code_cluster)
+# au cluster de la destination. Il dépend donc aussi de l'utilisateur : recalcul à
+# l'enregistrement de l'utilisateur et au changement de ses groupes (core.signals).
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+
+from core.roles import user_in_groups
+from destination.models import Destination, DestinationAccess
+
+User = get_user_model()
+
+CLUSTER_ADMIN_GROUP = 'Admin'
+
+
+def _cluster_admins(cluster_ids):
+    """{id du cluster: [id des membres du groupe Admin rattachés au cluster]}"""
+    admins = {}
+    for user_id, cluster_id in User.objects.filter(
+        groups__name=CLUSTER_ADMIN_GROUP, code_cluster_id__in=cluster_ids
+    ).values_list('pk', 'code_cluster_id').distinct():
+        admins.setdefault(cluster_id, []).append(user_id)
+    return admins
+
+
+def sync_destination_access(destination_ids):
+    """
+    Recalcule les lignes de l'index pour les destinations données :
+    deux requêtes de lecture, une suppression et un bulk_create.
+    """
+    destination_ids = list(destination_ids)
+    if not destination_ids:
+        return
+
+    role_bits = list(DestinationAccess.ROLE_FIELDS.items())
+    rows = list(Destination.objects.filter(pk__in=destination_ids).values(
+        'pk', 'code_cluster_id', *[field for field, bit in role_bits]
+    ))
+    admins = _cluster_admins({row['code_cluster_id'] for row in rows})
+
+    masks = {}
+    for row in rows:
+        for field, bit in role_bits:
+            if row[field]:
+                key = (row[field], row['pk'])
+                masks[key] = masks.get(key, 0) | bit
+        for user_id in admins.get(row['code_cluster_id'], ()):
+            key = (user_id, row['pk'])
+            masks[key] = masks.get(key, 0) | DestinationAccess.CLUSTER_ADMIN
+
+    with transaction.atomic():
+        DestinationAccess.objects.filter(destination_id__in=destination_ids).delete()
+        DestinationAccess.objects.bulk_create([
+            DestinationAccess(user_id=user_id, destination_id=destination_id, roles=roles)
+            for (user_id, destination_id), roles in masks.items()
+        ])
+
+
+def sync_user_access(user_ids):
+    """
+    Recalcule le bit administrateur de cluster des utilisateurs donnés (cluster ou groupes modifiés) :
+    destinations de leur cluster s'ils sont Admin, et celles où ils ont encore ce bit.
+    """
+    user_ids = list(user_ids)
+    admin_clusters = User.objects.filter(
+        pk__in=user_ids, groups__name=CLUSTER_ADMIN_GROUP
+    ).values('code_cluster_id')
+    admin_rows = DestinationAccess.objects.annotate(
+        admin_bit=F('roles').bitand(DestinationAccess.CLUSTER_ADMIN)
+    ).filter(user_id__in=user_ids, admin_bit__gt=0).values('destination_id')
+    sync_destination_access(Destination.objects.filter(
+        Q(code_cluster_id__in=admin_clusters) | Q(pk__in=admin_rows)
+    ).values_list('pk', flat=True))
+
+
+def rebuild_destination_access():
+    """Reconstruit l'index complet (reprise de données)."""
+    sync_destination_access(Destination.objects.values_list('pk', flat=True))
+
+
+def _access_rows(user, base_roles):
+    """
+    Lignes de l'index de l'utilisateur ayant au moins un des rôles demandés.
+    Le bit administrateur de cluster ne compte que pour les membres actuels du groupe Admin.
+    """
+    mask = base_roles
+    if user_in_groups(user, CLUSTER_ADMIN_GROUP):
+        mask |= DestinationAccess.CLUSTER_ADMIN
+    return DestinationAccess.objects.annotate(
+        matching_roles=F('roles').bitand(mask)
+    ).filter(user=user, matching_roles__gt=0)
+
+
+def accessible_destinations(user, base_roles=DestinationAccess.READ_ROLES):
+    """Destinations accessibles à l'utilisateur pour les rôles donnés (une requête indexée)."""
+    return Destination.objects.filter(
+        pk__in=_access_rows(user, base_roles).values('destination_id')
+    )
+
+
+def has_destination_access(user, destination_id, base_roles=DestinationAccess.READ_ROLES):
+    """Vrai si l'utilisateur a l'un des rôles donnés sur la destination."""
+    if user_in_groups(user, 'SuperAdmin'):
+        return True
+    return _access_rows(user, base_roles).filter(destination_id=destination_id).exists()
@@ -14,7 +14,9 @@ from django.core.validators import FileExtensionValidator
 from django.urls import reverse
 from cluster.models import Cluster
 from core.mixins import CommaSeparatedFieldMixin, HelpTextTooltipMixin
-from core.models import FieldPermission, Language_communication, Pays
+from core.models import FieldPermission
+from core.reference import ReferenceModelChoiceField, ReferenceModelMultipleChoiceField
+from core.user_picker import UserPickerSelect
 from destination.models import Destination, Destination_data, Destination_flux
 
 from django.utils.safestring import mark_safe
@@ -76,6 +78,16 @@ class DestinationForm(HelpTextTooltipMixin, CommaSeparatedFieldMixin, forms.Mode
             'adress_dest': forms.Textarea(attrs={'rows': 2}),
             'disability_libelle_dest': forms.Textarea(attrs={'rows': 3}),
             'logo_dest': ImagePreviewWidget(),
+            # Sélecteurs paginés (core.user_picker) : seule la valeur actuelle est rendue
+            'manager_dest': UserPickerSelect('destination'),
+            'referent_dest': UserPickerSelect('destination'),
+            'matcher_dest': UserPickerSelect('destination'),
+            'matcher_alt_dest': UserPickerSelect('destination'),
+            'finance_dest': UserPickerSelect('destination'),
+        }
+        # Choix servis par le registre des tables de référence (sans requête)
+        field_classes = {
+            'country_dest': ReferenceModelChoiceField,
         }
 
     comma_fields_config = {
@@ -282,6 +294,13 @@ class DestinationDataForm(HelpTextTooltipMixin, forms.ModelForm):
             'texte_avis_fermeture_dest': forms.Textarea(attrs={'rows': 2}),
             'texte_avis_mail_dest': forms.Textarea(attrs={'rows': 2}),
         }
+        # Choix servis par le registre des tables de référence (sans requête)
+        field_classes = {
+            'beneficiaire_don_dest': ReferenceModelChoiceField,
+            'langs_com_dest': ReferenceModelMultipleChoiceField,
+            'lang_default_dest': ReferenceModelChoiceField,
+            'langs_parlee_dest': ReferenceModelMultipleChoiceField,
+        }
 
     
     def __init__(self, *args,  **kwargs):
@@ -304,13 +323,10 @@ class DestinationDataForm(HelpTextTooltipMixin, forms.ModelForm):
 
         super().__init__(*args, **kwargs)
         
-        if cluster:
-            cluster_langs_ids=cluster.langs_com.values_list('code', flat=True)
-            self.fields['langs_com_dest'].queryset = Language_communication.objects.filter(code__in=cluster_langs_ids)
-            self.fields['lang_default_dest'].queryset = Language_communication.objects.filter(code__in=cluster_langs_ids)
-        else:
-            self.fields['langs_com_dest'].queryset = Language_communication.objects.none()
-            self.fields['lang_default_dest'].queryset = Language_communication.objects.none()        
+        # Langues du cluster : une requête sur la table d'association, les libellés viennent du registre
+        cluster_langs_ids = list(cluster.langs_com.values_list('id', flat=True)) if cluster else []
+        self.fields['langs_com_dest'].limit_to(cluster_langs_ids)
+        self.fields['lang_default_dest'].limit_to(cluster_langs_ids)
         
         self.apply_tooltips() #Appel du mixin HelpextTooltip
 
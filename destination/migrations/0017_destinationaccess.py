@@ -0,0 +1,59 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+ROLE_BITS = (
+    ('manager_dest', 1),
+    ('referent_dest', 2),
+    ('matcher_dest', 4),
+    ('matcher_alt_dest', 8),
+    ('finance_dest', 16),
+    ('code_cluster__admin_cluster', 32),
+    ('code_cluster__admin_alt_cluster', 32),
+)
+
+
+def build_destination_access(apps, schema_editor):
+    Destination = apps.get_model('destination', 'Destination')
+    DestinationAccess = apps.get_model('destination', 'DestinationAccess')
+
+    masks = {}
+    for row in Destination.objects.values('pk', *[field for field, bit in ROLE_BITS]):
+        for field, bit in ROLE_BITS:
+            if row[field]:
+                key = (row[field], row['pk'])
+                masks[key] = masks.get(key, 0) | bit
+
+    DestinationAccess.objects.bulk_create([
+        DestinationAccess(user_id=user_id, destination_id=destination_id, roles=roles)
+        for (user_id, destination_id), roles in masks.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destination', '0016_alter_destination_data_flag_noanswer_visitor_dest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DestinationAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('roles', models.PositiveSmallIntegerField(default=0, verbose_name='Rôles')),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_index', to='destination.destination')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='destination_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Accès destination',
+                'verbose_name_plural': 'Accès destinations',
+                'unique_together': {('user', 'destination')},
+            },
+        ),
+        migrations.RunPython(build_destination_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destination', '0017_destinationaccess'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='logo_dest_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
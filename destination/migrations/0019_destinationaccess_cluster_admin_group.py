@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:02
+
+from django.conf import settings
+from django.db import migrations
+
+
+ROLE_BITS = (
+    ('manager_dest', 1),
+    ('referent_dest', 2),
+    ('matcher_dest', 4),
+    ('matcher_alt_dest', 8),
+    ('finance_dest', 16),
+)
+CLUSTER_ADMIN = 32
+
+
+def rebuild_destination_access(apps, schema_editor):
+    # Bit administrateur de cluster : membres du groupe Admin rattachés au cluster de la destination
+    # (et non plus admin_cluster / admin_alt_cluster du cluster)
+    Destination = apps.get_model('destination', 'Destination')
+    DestinationAccess = apps.get_model('destination', 'DestinationAccess')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    admins = {}
+    for user_id, cluster_id in User.objects.filter(
+        groups__name='Admin', code_cluster__isnull=False
+    ).values_list('pk', 'code_cluster_id').distinct():
+        admins.setdefault(cluster_id, []).append(user_id)
+
+    masks = {}
+    for row in Destination.objects.values('pk', 'code_cluster_id', *[field for field, bit in ROLE_BITS]):
+        for field, bit in ROLE_BITS:
+            if row[field]:
+                key = (row[field], row['pk'])
+                masks[key] = masks.get(key, 0) | bit
+        for user_id in admins.get(row['code_cluster_id'], ()):
+            key = (user_id, row['pk'])
+            masks[key] = masks.get(key, 0) | CLUSTER_ADMIN
+
+    DestinationAccess.objects.all().delete()
+    DestinationAccess.objects.bulk_create([
+        DestinationAccess(user_id=user_id, destination_id=destination_id, roles=roles)
+        for (user_id, destination_id), roles in masks.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destination', '0018_image_renditions'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_destination_access, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,8 @@
 from django.contrib.auth.mixins import AccessMixin
 from django.core.exceptions import PermissionDenied
 
+from core.roles import get_user_groups
+
 
 class OnlyGestionnaireMixin(AccessMixin):
     """
@@ -24,7 +26,7 @@ class OnlyGestionnaireMixin(AccessMixin):
         if not user.is_authenticated:
             return False
 
-        user_groups = user.groups.all().values_list('name', flat=True)
+        user_groups = get_user_groups(user)
 
         is_gestionnaire = 'Gestionnaire' in user_groups
         has_higher_privilege = any(group in user_groups for group in self.higher_privilege_groups)
@@ -7,6 +7,7 @@ from modeltranslation.translator import (TranslationOptions, register,
                                          translator)
 
 from cluster.models import Cluster, InterestCenter
+from core.images import RenditionsMixin
 from core.models import (Beneficiaire,  Language_communication,
                          LangueDeepL, LangueParlee, No_show, Pays, Periode,
                          TrancheAge, Types_handicap)
@@ -15,7 +16,7 @@ from core.utils import get_file_path
 User=get_user_model()
 
 # Modèle Destination base 
-class Destination(models.Model):
+class Destination(RenditionsMixin, models.Model):
     choices = (
         ('Drafts', _("Brouillon")),
         ('Active', _("Actif")),
@@ -33,6 +34,7 @@ class Destination(models.Model):
     region_dest=models.CharField(max_length=50, default=" ",blank=True,null= True, verbose_name=_("Région"),help_text=_("Saisir la région de la destination"))
     country_dest=models.ForeignKey(Pays, on_delete=models.PROTECT, verbose_name=_("Pays"),related_name='country_dest',help_text=_("Sélectionner le pays de la destination"))
     logo_dest=models.ImageField(upload_to=get_file_path,default='logos/default.jpg',verbose_name=_('Logo'),blank=True, null=True,help_text=_("Taille : 250 px *250 px"))
+    logo_dest_renditions=models.JSONField(default=dict, blank=True, editable=False)
     libelle_email_dest=models.CharField(max_length=50, default=" ", verbose_name=_("Libellé courriel émetteur "),help_text=_("Saisir le libellé des courriels émetteurs de la destination"))
     statut_dest=models.CharField(max_length=15, choices=choices, default="Drafts",help_text=_("Saisir le statut dela destination"),verbose_name=_("Statut"))
     manager_dest=models.ForeignKey(User,on_delete=models.SET_NULL,related_name="manager_name_dest",null=True, verbose_name=_("Nom du manager"),help_text=_("Saisir le nom du manager de la destination"))
@@ -175,3 +177,40 @@ class Destination_flux(models.Model):
 ###################################################################################################
 
 
+# Index d'accès aux destinations : (utilisateur, destination) -> masque de rôles
+
+class DestinationAccess(models.Model):
+    # Bits du masque de rôles
+    MANAGER = 1
+    REFERENT = 2
+    MATCHER = 4
+    MATCHER_ALT = 8
+    FINANCE = 16
+    CLUSTER_ADMIN = 32
+
+    # Correspondance champ de Destination -> bit de rôle
+    ROLE_FIELDS = {
+        'manager_dest': MANAGER,
+        'referent_dest': REFERENT,
+        'matcher_dest': MATCHER,
+        'matcher_alt_dest': MATCHER_ALT,
+        'finance_dest': FINANCE,
+    }
+
+    # Rôles donnant accès en lecture et en modification à une destination
+    READ_ROLES = MANAGER | REFERENT | MATCHER | MATCHER_ALT | FINANCE
+    UPDATE_ROLES = REFERENT | MATCHER | MATCHER_ALT
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='destination_access')
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='access_index')
+    roles = models.PositiveSmallIntegerField(default=0, verbose_name=_("Rôles"))
+
+    class Meta:
+        unique_together = ('user', 'destination')
+        verbose_name = "Accès destination"
+        verbose_name_plural = "Accès destinations"
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.destination_id} ({self.roles})"
+
+###################################################################################################
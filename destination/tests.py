@@ -1,3 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from cluster.models import Cluster
+from core.models import Pays
+from destination.access import accessible_destinations, has_destination_access
+from destination.models import Destination, DestinationAccess
+
+User = get_user_model()
+
+
+###################################################################################################
+# Index d'accès aux destinations (destination.access, signaux de core.signals)
+
+class DestinationAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_group = Group.objects.create(name='Admin')
+        cls.manager_group = Group.objects.create(name='Manager')
+        country = Pays.objects.create(code_iso='FRA', nom_pays='France')
+        cls.cluster = Cluster.objects.create(code_cluster='NA', name_cluster='Nouvelle-Aquitaine',
+                                             statut_cluster='Active')
+        cls.other_cluster = Cluster.objects.create(code_cluster='OC', name_cluster='Occitanie',
+                                                   statut_cluster='Active')
+        cls.users = {
+            name: User.objects.create_user(f"{name}@example.com", name.capitalize(), 'Test')
+            for name in ('manager', 'referent', 'matcher', 'matcher_alt', 'finance', 'admin', 'outsider')
+        }
+        cls.destination = Destination.objects.create(
+            code_cluster=cls.cluster, code_dest='BDX', name_dest='Bordeaux', country_dest=country,
+            URL_retry_dest='https://example.com', **{
+                f"{name}_dest": cls.users[name] for name in ('manager', 'referent', 'matcher', 'matcher_alt', 'finance')
+            },
+        )
+        cls.other_destination = Destination.objects.create(
+            code_cluster=cls.other_cluster, code_dest='TLS', name_dest='Toulouse', country_dest=country,
+            URL_retry_dest='https://example.com',
+        )
+
+    def _roles(self, user, destination=None):
+        destination = destination or self.destination
+        return DestinationAccess.objects.filter(user=user, destination=destination).values_list(
+            'roles', flat=True
+        ).first() or 0
+
+    def test_role_bits(self):
+        for name, bit in (('manager', DestinationAccess.MANAGER), ('referent', DestinationAccess.REFERENT),
+                          ('matcher', DestinationAccess.MATCHER), ('matcher_alt', DestinationAccess.MATCHER_ALT),
+                          ('finance', DestinationAccess.FINANCE)):
+            with self.subTest(role=name):
+                self.assertEqual(self._roles(self.users[name]), bit)
+        self.assertEqual(self._roles(self.users['outsider']), 0)
+
+    def test_role_change_on_destination_save(self):
+        self.destination.manager_dest = self.users['referent']
+        self.destination.save()
+        self.assertEqual(self._roles(self.users['referent']), DestinationAccess.REFERENT | DestinationAccess.MANAGER)
+        self.assertEqual(self._roles(self.users['manager']), 0)
+
+    def test_cluster_admin_from_group_and_cluster(self):
+        admin = self.users['admin']
+        admin.code_cluster = self.cluster
+        admin.save()
+        # Rattaché au cluster mais hors du groupe Admin
+        self.assertEqual(self._roles(admin), 0)
+
+        admin.groups.add(self.admin_group)
+        self.assertEqual(self._roles(admin), DestinationAccess.CLUSTER_ADMIN)
+        self.assertEqual(self._roles(admin, self.other_destination), 0)
+
+        # Changement de cluster : le bit suit le nouveau cluster
+        admin.code_cluster = self.other_cluster
+        admin.save(update_fields=['code_cluster'])
+        self.assertEqual(self._roles(admin), 0)
+        self.assertEqual(self._roles(admin, self.other_destination), DestinationAccess.CLUSTER_ADMIN)
+
+        admin.groups.remove(self.admin_group)
+        self.assertEqual(self._roles(admin, self.other_destination), 0)
+
+    def test_cluster_admin_revoked_from_group_side(self):
+        admin = self.users['admin']
+        admin.code_cluster = self.cluster
+        admin.save()
+        self.admin_group.user_set.add(admin)
+        self.assertEqual(self._roles(admin), DestinationAccess.CLUSTER_ADMIN)
+        self.admin_group.user_set.remove(admin)
+        self.assertEqual(self._roles(admin), 0)
+
+        self.admin_group.user_set.add(admin)
+        self.admin_group.user_set.clear()
+        self.assertEqual(self._roles(admin), 0)
+
+    def test_save_without_cluster_keeps_index(self):
+        admin = self.users['admin']
+        admin.code_cluster = self.cluster
+        admin.save()
+        admin.groups.add(self.admin_group)
+        with self.assertNumQueries(1):
+            admin.save(update_fields=['last_login'])
+        self.assertEqual(self._roles(admin), DestinationAccess.CLUSTER_ADMIN)
+
+    def test_list_and_detail_agree(self):
+        admin = self.users['admin']
+        admin.code_cluster = self.cluster
+        admin.save()
+        admin.groups.add(self.admin_group)
+        for user in self.users.values():
+            user.groups.add(self.manager_group)
+
+        destinations = Destination.objects.all()
+        for name, user in self.users.items():
+            with self.subTest(user=name):
+                listed = set(accessible_destinations(user).values_list('pk', flat=True))
+                allowed = {destination.pk for destination in destinations
+                           if has_destination_access(user, destination.pk)}
+                self.assertEqual(listed, allowed)
+
+                self.client.force_login(user)
+                response = self.client.get(reverse('destinations_list'), {'format': 'json'})
+                self.assertEqual({row['id'] for row in response.json()['results']}, listed)
+                for destination in destinations:
+                    response = self.client.get(reverse('destination_detail', args=[destination.pk]))
+                    self.assertEqual(response.status_code, 200 if destination.pk in listed else 302)
+        self.assertEqual(set(accessible_destinations(self.users['outsider'])), set())
+        self.assertEqual(set(accessible_destinations(admin)), {self.destination})
@@ -10,12 +10,16 @@ from django.views import View
 from django.views.generic import DetailView
 from django.views.generic.edit import CreateView, UpdateView
 from django.views.generic import DetailView
+from core.listing import ListQueryMixin
 from core.mixins import RelatedModelsMixin, HelpTextTooltipMixin
 from core.models import FieldPermission
-from core.tasks import translation_content, translation_content_items
-from core.translation import DestinationTranslationOptions
+from core.roles import get_user_groups, user_in_groups
+from core.tasks import enqueue_translation
+from core.user_picker import pick_users, picker_params
+from core.translation import DestinationTranslationOptions, Destination_dataTranslationOptions
 from destination.forms import DestinationForm, DestinationDataForm, DestinationFluxForm
-from destination.models import Destination, Destination_data, Destination_flux,List_places
+from destination.access import accessible_destinations, has_destination_access
+from destination.models import Destination, DestinationAccess, Destination_data, Destination_flux,List_places
 from PIL import Image
 import os
 from django.db.models import Q   
@@ -23,7 +27,7 @@ from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.urls import reverse
 from django.db import transaction
-from core.tasks import envoyer_email_creation_utilisateur, resize_image_task
+from core.tasks import envoyer_emails_creation_utilisateurs, generate_image_renditions
 from destination.mixins import OnlyGestionnaireMixin
 
 User=get_user_model()
@@ -33,7 +37,7 @@ User=get_user_model()
 class SuperAdminRequiredMixin(UserPassesTestMixin):
     
     def test_func(self):
-        return self.request.user.groups.filter(name__in=['SuperAdmin', 'Admin']).exists() 
+        return user_in_groups(self.request.user, 'SuperAdmin', 'Admin')
 
     def handle_no_permission(self):
         django_messages.error(self.request, "Vous n'avez pas les droits nécessaires pour créer une destination.")
@@ -111,29 +115,22 @@ class DestinationCreateView(LoginRequiredMixin, SuperAdminRequiredMixin, HelpTex
                         users_to_notify.add(user_obj)
 
                         
-                for user_obj in users_to_notify:
-                    # Email via Celery (on_commit est préférable pour éviter les Race Conditions)
-                    transaction.on_commit(
-                        lambda u_id=user_obj.id: envoyer_email_creation_utilisateur(u_id, self.request)
-                    )        
+                # Emails via une seule tâche Celery groupée, planifiée après le commit
+                envoyer_emails_creation_utilisateurs([user_obj.id for user_obj in users_to_notify], self.request)
                         
                         
 
                 # D. Traduction des types de handicap et logo
               
                 if dest.disability_libelle_dest:
-                    transaction.on_commit(
-                        lambda: translation_content.delay("destination", "Destination", dest.id, "disability_libelle_dest")
-                    )
+                    enqueue_translation("destination", "Destination", dest.id, "disability_libelle_dest")
                 if dest.logo_dest:
                     transaction.on_commit(lambda: 
-                        resize_image_task.delay(
+                        generate_image_renditions.delay(
                             app_label='destination', 
                             model_name='Destination', 
                             object_id=dest.id, 
-                            field_name='logo_dest', 
-                            width=200, 
-                            height=200
+                            field_name='logo_dest'
                         )
                     )       
                 
@@ -174,29 +171,13 @@ class CreateRelatedDataModelsView(LoginRequiredMixin, SuperAdminRequiredMixin, V
             destination_data.save()
             data_form.save_m2m()  # Sauvegarder les relations ManyToMany
 
-            # Traduction des champs 
-            if destination_data.donation_text_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "donation_text_dest")
-            if destination_data.param_comment_visitor_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "param_comment_visitor_dest")
-            if destination_data.libelle_form_coche1_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "libelle_form_coche1_dest")
-            if destination_data.lib_url_form_coche1_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "lib_url_form_coche1_dest")
-            if  destination_data.libelle_form_coche2_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "libelle_form_coche2_dest")
-            if  destination_data.lib_url_form_coche2_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "lib_url_form_coche2_dest")
-            if  destination_data.libelle_form_coche3_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "libelle_form_coche3_dest")
-            if  destination_data.lib_url_form_coche3_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "lib_url_form_coche3_dest")
-            if  destination_data.texte_avis_fermeture_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "texte_avis_fermeture_dest")
-            if destination_data.tagline_mail_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "tagline_mail_dest")
-            if destination_data.titre_avis_mail_dest:
-                translation_content.delay("destination","Destination_data", destination_data.id, "titre_avis_mail_dest")
+            # Traduction des champs : une seule tâche pour tous les champs renseignés
+            fields_to_translate = [
+                field for field in Destination_dataTranslationOptions.fields
+                if getattr(destination_data, field)
+            ]
+            if fields_to_translate:
+                enqueue_translation("destination","Destination_data", destination_data.id, *fields_to_translate)
 
             return redirect('create_related_flux', destination_id=destination.id)
 
@@ -255,31 +236,34 @@ class CreateRelatedFluxModelsView(LoginRequiredMixin, SuperAdminRequiredMixin, V
 ###################################################################################################
 # Vue Liste des destinations
  
-class DestinationListView(LoginRequiredMixin, View):
+class DestinationListView(LoginRequiredMixin, ListQueryMixin, View):
     template_name = 'destination/destinations_list.html'
+    context_object_name = 'destinations'
+    filter_fields = {'cluster': 'code_cluster_id'}
+    ordering_choices = {'code': ('code_dest',), 'id': ('pk',)}
+    default_ordering = 'code'
+    select_related = ('code_cluster',)
+    json_fields = ('id', 'code_dest', 'name_dest', 'code_cluster__code_cluster')
 
     def get(self, request, *args, **kwargs):
         user=request.user
-        is_super_admin = user.groups.filter(name='SuperAdmin').exists()
-        is_admin = user.groups.filter(name='Admin').exists()
-        is_referent = user.groups.filter(name='Referent').exists()
-        is_gestionnaire = user.groups.filter(name='Gestionnaire').exists()
-        is_financier = user.groups.filter(name='Financier').exists()
-        is_manager = user.groups.filter(name='Manager').exists()
+        user_groups = get_user_groups(user)
+        is_super_admin = 'SuperAdmin' in user_groups
+        is_admin = 'Admin' in user_groups
+        is_referent = 'Referent' in user_groups
+        is_gestionnaire = 'Gestionnaire' in user_groups
+        is_financier = 'Financier' in user_groups
+        is_manager = 'Manager' in user_groups
 
         if is_super_admin:
             destinations = Destination.objects.all()
-        elif is_admin :
-            user_code_cluster = user.code_cluster
-            print("user_code_cluster:", user_code_cluster)
-            destinations = Destination.objects.filter(code_cluster__code_cluster=user_code_cluster)
-        elif is_referent or is_gestionnaire or is_financier or is_manager:
-            destinations = Destination.objects.filter(Q(manager_dest=user) | Q(referent_dest=user) | Q(matcher_dest=user) | Q(matcher_alt_dest=user) | Q(finance_dest=user))        
+        elif is_admin or is_referent or is_gestionnaire or is_financier or is_manager:
+            # Lecture de l'index d'accès (rôles de destination et administrateur de cluster)
+            destinations = accessible_destinations(user)
         else:
             django_messages.error(request, _("Vous n'avez pas les droits nécessaires pour consulter la liste des destinations."))
             return redirect('login')  
-        context = {'destinations': destinations, 'title': _("Liste des destinations")}
-        return render(request, self.template_name, context) 
+        return self.list_response(request, destinations, {'title': _("Liste des destinations")})
     
 ###################################################################################################
 
@@ -289,19 +273,8 @@ class AuthorizedRequiredReadDestinationMixin(UserPassesTestMixin):
     
 
     def test_func(self):
-    # Autoriser les SuperAdmin ou les utilisateurs qui sont admin du cluster
-        destination = self.get_object()
-        
-        return (
-            self.request.user.groups.filter(name = 'SuperAdmin').exists() or
-            (self.request.user.groups.filter(name = 'Admin').exists() and
-            self.request.user.code_cluster == destination.code_cluster.code_cluster) or
-            self.request.user == destination.manager_dest or
-            self.request.user == destination.referent_dest or
-            self.request.user == destination.matcher_dest or
-            self.request.user == destination.matcher_alt_dest or
-            self.request.user == destination.finance_dest
-            )
+    # Autoriser les SuperAdmin, les admin du cluster ou les utilisateurs ayant un rôle sur la destination
+        return has_destination_access(self.request.user, self.kwargs['pk'])
 
     def handle_no_permission(self):
         django_messages.error(self.request, _("Vous n'avez pas les droits nécessaires pour consulter cette destination."))
@@ -333,54 +306,17 @@ from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
 
-class AjaxFilterUsersView(View):
-    def get(self, request, *args, **kwargs):
-        cluster_code = request.GET.get('code_cluster')
-        code_dest = request.GET.get('code_dest')
-        print("Cluster code (AJAX):", cluster_code)
-        print("Code destination (AJAX):", code_dest)
+class AjaxFilterUsersView(LoginRequiredMixin, View):
+    """
+    Utilisateurs proposés pour les rôles d'une destination (périmètre 'destination' de core.user_picker).
+    Tableau JSON d'une page (limit, cursor) ; le formulaire passe par UserPickerView.
+    """
 
-        if not cluster_code:
+    def get(self, request, *args, **kwargs):
+        params = picker_params(request)
+        if not params['cluster_code']:
             return JsonResponse([], safe=False)
-
-        # Récupération du code parent (sécurité héritage)
-        parent_code = None
-        if code_dest:
-            from .models import Destination
-            dest_obj = Destination.objects.filter(code_dest=code_dest).first()
-            if dest_obj and dest_obj.code_parent_dest:
-                parent_code = dest_obj.code_parent_dest.code_dest
-
-        # CONSTRUCTION DE LA QUERY
-        # 1. Les Pendings : Critère de fiabilité absolue selon votre workflow
-        query_pending = Q(is_active=False)
-
-        # 2. Les Actifs autorisés : Doivent être dans le même Cluster
-        # ET (être dans la destination actuelle OU la destination parente)
-        query_authorized_active = Q(
-            is_active=True,
-            code_cluster__code_cluster=cluster_code
-        )
-        
-        dest_filter = Q(code_dest__code_dest=code_dest) | Q(code_dest__isnull=True)
-        if parent_code:
-            dest_filter |= Q(code_dest__code_dest=parent_code)
-            
-        query_authorized_active &= dest_filter
-
-        # Union des deux groupes
-        users = User.objects.filter(query_pending | query_authorized_active).distinct().order_by('last_name', 'first_name')
-        
-        results = [
-            {
-                "id": user.id, 
-                "text": f"{user.first_name} {user.last_name}",
-                "is_active": user.is_active
-            } 
-            for user in users
-        ]
-        
-        return JsonResponse(results, safe=False)
+        return JsonResponse(pick_users('destination', **params)['results'], safe=False)
 
 ###################################################################################################
 # AJAX pour récuperer les manager, référent et finance de la destination parent pour une destination donnée
@@ -421,26 +357,17 @@ class AuthorizedRequiredUpdateDestinationMixin(UserPassesTestMixin):
         obj = self.get_object()
         if isinstance(self, DestinationUpdateView):
         # Ici obj est une 'Destination'
-            destination = obj
+            destination_id = obj.pk
         elif isinstance(self, DestinationDataUpdateView):
         # Ici obj est un 'DestinationData', on remonte à la destination parente
-        # (Adaptez 'destination' selon le nom de votre ForeignKey dans DestinationData)
-            destination = obj.code_dest_data
+            destination_id = obj.code_dest_data_id
         elif isinstance(self, DestinationFluxUpdateView):
         # Ici obj est un 'DestinationFlux', on remonte à la destination parente 
-            destination = obj.code_dest_flux 
+            destination_id = obj.code_dest_flux_id
         else:
             return False
-            
-        
-        return (
-            self.request.user.groups.filter(name = 'SuperAdmin').exists() or
-            (self.request.user.groups.filter(name = 'Admin').exists() and
-            self.request.user.code_cluster == destination.code_cluster.code_cluster) or
-            self.request.user == destination.referent_dest or
-            self.request.user == destination.matcher_dest or
-            self.request.user == destination.matcher_alt_dest
-            )
+
+        return has_destination_access(self.request.user, destination_id, DestinationAccess.UPDATE_ROLES)
 
     def handle_no_permission(self):
         django_messages.error(self.request, _("Vous n'avez pas les droits nécessaires pour éditer cette destination."))
@@ -486,12 +413,12 @@ class DestinationUpdateView(LoginRequiredMixin, AuthorizedRequiredUpdateDestinat
         user = self.request.user
         destination = self.get_object() # Récupère l'objet Destination en cours d'édition
         # Vérification SuperAdmin
-        is_super_admin = user.groups.filter(name='SuperAdmin').exists()
+        is_super_admin = user_in_groups(user, 'SuperAdmin')
         
         # Vérification Admin de Cluster
         is_admin_cluster_match = (
-            user.groups.filter(name='Admin').exists() and
-            user.code_cluster == destination.code_cluster.code_cluster
+            user_in_groups(user, 'Admin') and
+            has_destination_access(user, destination.pk, 0)
         )
         
         # Le champ est autorisé à l'édition si l'une des conditions est vraie
@@ -538,7 +465,9 @@ class DestinationUpdateView(LoginRequiredMixin, AuthorizedRequiredUpdateDestinat
                 # 1. Instance avant modification
                 old_instance = Destination.objects.get(pk=self.object.pk)
                 
-                # 2. Sauvegarde de l'instance actuelle
+                # 2. Sauvegarde de l'instance actuelle (manifeste de l'ancien logo vidé dans le même enregistrement)
+                if 'logo_dest' in form.changed_data:
+                    form.instance.reset_renditions('logo_dest')
                 dest = form.save()
                 
                 h_cluster = self.request.POST.get('code_cluster_hidden')
@@ -598,26 +527,21 @@ class DestinationUpdateView(LoginRequiredMixin, AuthorizedRequiredUpdateDestinat
 
                 # Les destinataires sont ceux qui sont dans la nouvelle liste mais PAS dans l'ancienne
                 to_notify = new_users_ids - old_users_ids
-                for user_id in to_notify:
-                    envoyer_email_creation_utilisateur(user_id, self.request)
+                envoyer_emails_creation_utilisateurs(to_notify, self.request)
 
                 # 6. IMAGE ET TRADUCTION
                 if 'logo_dest' in form.changed_data and dest.logo_dest:
                     transaction.on_commit(lambda: 
-                        resize_image_task.delay(
+                        generate_image_renditions.delay(
                             app_label='destination', 
                             model_name='Destination', 
                             object_id=dest.id, 
-                            field_name='logo_dest', 
-                            width=200, 
-                            height=200
+                            field_name='logo_dest'
                         )
                     )
 
                 if 'disability_libelle_dest' in form.changed_data and dest.disability_libelle_dest:
-                    transaction.on_commit(
-                        lambda: translation_content.delay("destination", "Destination", dest.id, "disability_libelle_dest")
-                    )
+                    enqueue_translation("destination", "Destination", dest.id, "disability_libelle_dest")
 
                 django_messages.success(self.request, _("Destination mise à jour avec succès."))
                 return redirect(self.success_url)
@@ -1,3 +1,8 @@
 from django.contrib import admin
 
-# Register your models here.
+from greet.models import AnonymisationWatermark, GreeterRotation, VisitRequest, WallEntry
+
+admin.site.register(GreeterRotation)
+admin.site.register(VisitRequest)
+admin.site.register(AnonymisationWatermark)
+admin.site.register(WallEntry)
@@ -0,0 +1,242 @@
+###################################################################################################
+# Moteur d'appariement visiteur -> greeters
+# Pour chaque destination, les greeters actifs sont précalculés sous forme de bitsets
+# (langues, jours, périodes, centres d'intérêt, lieux) : une demande est évaluée par
+# de simples ET binaires sur quelques centaines de profils en mémoire.
+
+import threading
+
+from django.core.cache import cache
+
+from greet.rotation import get_rotation_table
+from greeters.models import Greeter, Indisponibility
+
+CANDIDATES_VERSION_KEY = 'greet:candidates:version'
+
+# Jours de Greeter.choices_day dans l'ordre de date.weekday() (lundi = 0)
+WEEKDAYS = [day for day, label in Greeter.choices_day]
+
+# Pondération du score de classement
+SCORE_INTEREST = 3
+SCORE_PLACE = 2
+SCORE_LANGUAGE = 1
+
+_candidate_sets = {}
+_candidate_lock = threading.Lock()
+
+
+class GreeterProfile:
+    """Profil d'un greeter réduit à des entiers (bitsets) et à ses périodes d'indisponibilité."""
+
+    __slots__ = (
+        'greeter_id', 'languages', 'days', 'periods', 'interests', 'places',
+        'handicap', 'max_participants', 'arrival', 'departure', 'unavailable',
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    def is_available(self, date):
+        if self.arrival and date < self.arrival:
+            return False
+        if self.departure and date > self.departure:
+            return False
+        for start, end in self.unavailable:
+            if (start is None or start <= date) and (end is None or date <= end):
+                return False
+        return True
+
+
+class CandidateSet:
+    """Greeters actifs d'une destination et correspondance identifiant -> position de bit."""
+
+    def __init__(self, destination_id, profiles, bit_positions):
+        self.destination_id = destination_id
+        self.profiles = profiles
+        self.bit_positions = bit_positions
+
+    def mask(self, dimension, ids):
+        """Bitset des identifiants demandés (les identifiants inconnus n'ont pas de bit)."""
+        positions = self.bit_positions[dimension]
+        mask = 0
+        for object_id in ids:
+            if object_id in positions:
+                mask |= 1 << positions[object_id]
+        return mask
+
+
+def _bit_positions(rows):
+    """Attribue une position de bit compacte à chaque identifiant lié."""
+    positions = {}
+    for greeter_id, object_id in rows:
+        positions.setdefault(object_id, len(positions))
+    return positions
+
+
+def _masks(rows, positions):
+    masks = {}
+    for greeter_id, object_id in rows:
+        masks[greeter_id] = masks.get(greeter_id, 0) | (1 << positions[object_id])
+    return masks
+
+
+def build_candidate_set(destination_id):
+    """
+    Construit les profils des greeters actifs de la destination :
+    une requête pour les greeters, une par relation ManyToMany et une pour les indisponibilités.
+    """
+    greeters = list(
+        Greeter.objects.filter(user__code_dest_id=destination_id, statut_greeter='Active')
+        .values(
+            'id', 'disponibility_day_greeter', 'handicap_greeter', 'max_participants_greeter',
+            'indisponibilty', 'begin_indisponibility', 'end_indisponibility',
+            'arrival_greeter', 'departure_greeter',
+        )
+    )
+    greeter_ids = [greeter['id'] for greeter in greeters]
+
+    relations = {
+        'languages': (Greeter.langues_parlées_greeter.through, 'langueparlee_id'),
+        'periods': (Greeter.disponibility_time_greeter.through, 'periode_id'),
+        'interests': (Greeter.interest_greeter.through, 'interestcenter_id'),
+        'places': (Greeter.list_places_greeter.through, 'list_places_id'),
+    }
+    bit_positions = {}
+    masks = {}
+    for dimension, (through, column) in relations.items():
+        rows = list(through.objects.filter(greeter_id__in=greeter_ids).values_list('greeter_id', column))
+        bit_positions[dimension] = _bit_positions(rows)
+        masks[dimension] = _masks(rows, bit_positions[dimension])
+
+    unavailable = {}
+    for greeter_id, start, end in Indisponibility.objects.filter(
+        greeter_indisponibility_id__in=greeter_ids
+    ).values_list('greeter_indisponibility_id', 'start_date_indisponibility', 'end_date_indisponibility'):
+        if start or end:
+            unavailable.setdefault(greeter_id, []).append((start, end))
+
+    profiles = []
+    for greeter in greeters:
+        greeter_id = greeter['id']
+        days = 0
+        for day in greeter['disponibility_day_greeter'] or []:
+            day = day.strip()
+            if day in WEEKDAYS:
+                days |= 1 << WEEKDAYS.index(day)
+
+        ranges = list(unavailable.get(greeter_id, []))
+        # Case « Indisponible » : sur la période indiquée, ou sans limite si aucune date
+        if greeter['indisponibilty']:
+            ranges.append((greeter['begin_indisponibility'], greeter['end_indisponibility']))
+
+        profiles.append(GreeterProfile(
+            greeter_id=greeter_id,
+            languages=masks['languages'].get(greeter_id, 0),
+            days=days,
+            periods=masks['periods'].get(greeter_id, 0),
+            interests=masks['interests'].get(greeter_id, 0),
+            places=masks['places'].get(greeter_id, 0),
+            handicap=greeter['handicap_greeter'],
+            max_participants=greeter['max_participants_greeter'],
+            arrival=greeter['arrival_greeter'],
+            departure=greeter['departure_greeter'],
+            unavailable=ranges,
+        ))
+
+    return CandidateSet(destination_id, profiles, bit_positions)
+
+
+def get_candidate_set(destination_id):
+    """Ensemble de candidats de la destination, mis en cache dans le processus."""
+    version = cache.get(CANDIDATES_VERSION_KEY, 0)
+    with _candidate_lock:
+        cached = _candidate_sets.get(destination_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    candidate_set = build_candidate_set(destination_id)
+    with _candidate_lock:
+        _candidate_sets[destination_id] = (version, candidate_set)
+    return candidate_set
+
+
+def invalidate_candidate_sets():
+    """Invalide les ensembles de candidats de tous les processus (modification d'un greeter)."""
+    try:
+        cache.incr(CANDIDATES_VERSION_KEY)
+    except ValueError:
+        cache.set(CANDIDATES_VERSION_KEY, 1, None)
+    with _candidate_lock:
+        _candidate_sets.clear()
+
+
+def match_greeters(destination_id, date, periode_id=None, group_size=1, languages=(),
+                   interests=(), places=(), disability=False, limit=None, rotation=True):
+    """
+    Retourne les greeters éligibles pour une demande de visite, classés par score décroissant :
+    [{'greeter_id', 'score', 'languages', 'interests', 'places'}, ...]
+
+    Contraintes : jour et période disponibles, date hors indisponibilité et dans la présence
+    du greeter, taille du groupe, handicap accepté si nécessaire, au moins une langue commune
+    (si des langues sont demandées).
+    Score : centres d'intérêt communs, puis lieux communs, puis langues communes.
+    Avec rotation=True, les greeters dont l'intervalle entre deux balades n'est pas écoulé
+    sont exclus et, à score égal, le moins récemment sollicité passe en premier.
+    """
+    candidate_set = get_candidate_set(destination_id)
+    rotation_table = get_rotation_table(destination_id) if rotation else None
+
+    day_mask = 1 << date.weekday()
+    period_mask = candidate_set.mask('periods', [periode_id]) if periode_id else 0
+    language_mask = candidate_set.mask('languages', languages)
+    interest_mask = candidate_set.mask('interests', interests)
+    place_mask = candidate_set.mask('places', places)
+
+    if periode_id and not period_mask:
+        return []
+    if languages and not language_mask:
+        return []
+
+    matches = []
+    for profile in candidate_set.profiles:
+        if not profile.days & day_mask:
+            continue
+        if period_mask and not profile.periods & period_mask:
+            continue
+        if group_size > profile.max_participants:
+            continue
+        if disability and not profile.handicap:
+            continue
+        common_languages = (profile.languages & language_mask).bit_count()
+        if languages and not common_languages:
+            continue
+        if not profile.is_available(date):
+            continue
+        if rotation_table and not rotation_table.is_eligible(profile.greeter_id, date):
+            continue
+
+        common_interests = (profile.interests & interest_mask).bit_count()
+        common_places = (profile.places & place_mask).bit_count()
+        matches.append({
+            'greeter_id': profile.greeter_id,
+            'score': (SCORE_INTEREST * common_interests
+                      + SCORE_PLACE * common_places
+                      + SCORE_LANGUAGE * common_languages),
+            'languages': common_languages,
+            'interests': common_interests,
+            'places': common_places,
+        })
+
+    if rotation_table:
+        matches.sort(key=lambda match: (-match['score'], rotation_table.lru_key(match['greeter_id']),
+                                        match['greeter_id']))
+    else:
+        matches.sort(key=lambda match: (-match['score'], match['greeter_id']))
+    return matches[:limit] if limit else matches
+
+
+def matched_greeters(matches):
+    """Objets Greeter correspondant à un résultat de match_greeters, dans l'ordre du classement."""
+    greeters = Greeter.objects.select_related('user').in_bulk([match['greeter_id'] for match in matches])
+    return [greeters[match['greeter_id']] for match in matches if match['greeter_id'] in greeters]
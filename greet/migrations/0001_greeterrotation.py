@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('destination', '0018_image_renditions'),
+        ('greeters', '0008_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GreeterRotation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_walk_date', models.DateField(blank=True, null=True, verbose_name='Date de la dernière balade')),
+                ('next_eligible_date', models.DateField(blank=True, null=True, verbose_name="Prochaine date d'éligibilité")),
+                ('walks_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de balades')),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='greeter_rotations', to='destination.destination')),
+                ('greeter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rotation', to='greeters.greeter')),
+            ],
+            options={
+                'verbose_name': 'Rotation greeter',
+                'verbose_name_plural': 'Rotations greeters',
+                'indexes': [models.Index(fields=['destination', 'last_walk_date'], name='greet_greet_destina_493b6f_idx')],
+            },
+        ),
+    ]
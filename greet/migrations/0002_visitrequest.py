@@ -0,0 +1,52 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cluster', '0002_cluster_admin_alt_cluster_cluster_admin_cluster_and_more'),
+        ('core', '0003_translationjob'),
+        ('destination', '0018_image_renditions'),
+        ('greet', '0001_greeterrotation'),
+        ('greeters', '0008_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('new', 'Nouvelle'), ('treatment', 'Traitement'), ('urgent', 'Urgente'), ('proposed', 'Proposée'), ('confirmed', 'Confirmée'), ('done', 'Réalisée'), ('reviewed', 'Avis clôturé'), ('anonymised', 'Anonymisée'), ('cancelled', 'Annulée')], default='new', max_length=15, verbose_name='Statut')),
+                ('state_changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date du dernier changement de statut')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date de la demande')),
+                ('visitor_first_name', models.CharField(default='', max_length=50, verbose_name='Prénom du visiteur')),
+                ('visitor_last_name', models.CharField(default='', max_length=50, verbose_name='Nom du visiteur')),
+                ('visitor_email', models.EmailField(default='', max_length=254, verbose_name='Courriel du visiteur')),
+                ('visitor_phone', models.CharField(blank=True, default='', max_length=20, verbose_name='Téléphone du visiteur')),
+                ('visitor_lang', models.CharField(choices=[('en-us', 'Anglais (US)'), ('fr', 'Français'), ('de', 'Allemand'), ('es', 'Espagnol')], default='fr', max_length=10, verbose_name='Langue de communication du visiteur')),
+                ('comments_visitor', models.TextField(blank=True, default='', max_length=1000, verbose_name='Commentaires du visiteur')),
+                ('walk_date', models.DateField(verbose_name='Date de la balade')),
+                ('group_size', models.PositiveSmallIntegerField(default=1, verbose_name='Nombre de participants')),
+                ('disability', models.BooleanField(default=False, verbose_name='Visiteur en situation de handicap')),
+                ('greeter_assigned_at', models.DateTimeField(blank=True, null=True, verbose_name="Date d'attribution au Greeter")),
+                ('next_reminder_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de la prochaine relance')),
+                ('pre_walk_reminder_sent', models.BooleanField(default=False)),
+                ('report_requested', models.BooleanField(default=False)),
+                ('review_requested', models.BooleanField(default=False)),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='visit_requests', to='destination.destination', verbose_name='Destination')),
+                ('greeter', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='visit_requests', to='greeters.greeter', verbose_name='Greeter')),
+                ('interests', models.ManyToManyField(blank=True, to='cluster.interestcenter', verbose_name="Centres d'intérêt")),
+                ('languages', models.ManyToManyField(blank=True, to='core.langueparlee', verbose_name='Langues parlées')),
+                ('periode', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='core.periode', verbose_name='Période de la journée')),
+            ],
+            options={
+                'verbose_name': 'Demande de visite',
+                'verbose_name_plural': 'Demandes de visite',
+                'indexes': [models.Index(fields=['destination', 'state', 'state_changed_at'], name='greet_visit_destina_eeb736_idx'), models.Index(fields=['destination', 'state', 'walk_date'], name='greet_visit_destina_23b8e9_idx'), models.Index(fields=['destination', 'state', 'next_reminder_at'], name='greet_visit_destina_7adb64_idx')],
+            },
+        ),
+    ]
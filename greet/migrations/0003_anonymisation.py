@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('destination', '0018_image_renditions'),
+        ('greet', '0002_visitrequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visitrequest',
+            name='anonymised_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Date d'anonymisation"),
+        ),
+        migrations.CreateModel(
+            name='AnonymisationWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_state_changed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('rows_total', models.PositiveIntegerField(default=0, verbose_name='Demandes anonymisées')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernière exécution')),
+                ('destination', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='anonymisation_watermark', to='destination.destination')),
+            ],
+            options={
+                'verbose_name': "Filigrane d'anonymisation",
+                'verbose_name_plural': "Filigranes d'anonymisation",
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def build_wall(apps, schema_editor):
+    Destination_data = apps.get_model('destination', 'Destination_data')
+    VisitRequest = apps.get_model('greet', 'VisitRequest')
+    WallEntry = apps.get_model('greet', 'WallEntry')
+
+    states_by_destination = {}
+    for data in Destination_data.objects.exclude(flag_modalités_dest='Gest').values(
+        'code_dest_data_id', 'flag_cg_T_dest', 'flag_cg_U_dest'
+    ):
+        states = ['new']
+        if data['flag_cg_T_dest']:
+            states.append('treatment')
+        if data['flag_cg_U_dest']:
+            states.append('urgent')
+        states_by_destination[data['code_dest_data_id']] = states
+
+    related = {'languages': {}, 'interests': {}}
+    for name, column in (('languages', 'langueparlee_id'), ('interests', 'interestcenter_id')):
+        through = VisitRequest._meta.get_field(name).remote_field.through
+        for visit_id, object_id in through.objects.values_list('visitrequest_id', column):
+            related[name].setdefault(visit_id, []).append(object_id)
+
+    entries = []
+    for visit in VisitRequest.objects.filter(greeter__isnull=True, destination_id__in=states_by_destination):
+        if visit.state not in states_by_destination[visit.destination_id]:
+            continue
+        entries.append(WallEntry(
+            visit_request_id=visit.pk, destination_id=visit.destination_id, state=visit.state,
+            walk_date=visit.walk_date, periode_id=visit.periode_id, group_size=visit.group_size,
+            visitor_lang=visit.visitor_lang, disability=visit.disability,
+            languages=sorted(related['languages'].get(visit.pk, [])),
+            interests=sorted(related['interests'].get(visit.pk, [])),
+            posted_at=visit.state_changed_at,
+        ))
+    WallEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_translationjob'),
+        ('destination', '0018_image_renditions'),
+        ('greet', '0003_anonymisation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WallEntry',
+            fields=[
+                ('visit_request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='wall_entry', serialize=False, to='greet.visitrequest')),
+                ('state', models.CharField(choices=[('new', 'Nouvelle'), ('treatment', 'Traitement'), ('urgent', 'Urgente'), ('proposed', 'Proposée'), ('confirmed', 'Confirmée'), ('done', 'Réalisée'), ('reviewed', 'Avis clôturé'), ('anonymised', 'Anonymisée'), ('cancelled', 'Annulée')], max_length=15, verbose_name='Statut')),
+                ('walk_date', models.DateField(verbose_name='Date de la balade')),
+                ('group_size', models.PositiveSmallIntegerField(default=1, verbose_name='Nombre de participants')),
+                ('visitor_lang', models.CharField(default='fr', max_length=10, verbose_name='Langue de communication du visiteur')),
+                ('disability', models.BooleanField(default=False, verbose_name='Visiteur en situation de handicap')),
+                ('languages', models.JSONField(blank=True, default=list)),
+                ('interests', models.JSONField(blank=True, default=list)),
+                ('posted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date d'affichage sur le mur")),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wall_entries', to='destination.destination')),
+                ('periode', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.periode', verbose_name='Période de la journée')),
+            ],
+            options={
+                'verbose_name': 'Demande du mur C&G',
+                'verbose_name_plural': 'Mur C&G',
+                'indexes': [models.Index(fields=['destination', 'walk_date'], name='greet_walle_destina_d881ac_idx'), models.Index(fields=['destination', 'posted_at'], name='greet_walle_destina_a00646_idx')],
+            },
+        ),
+        migrations.RunPython(build_wall, migrations.RunPython.noop),
+    ]
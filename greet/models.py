@@ -1,3 +1,141 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from cluster.models import InterestCenter
+from core.models import LangueParlee, Periode
+from destination.models import Destination
+from greeters.models import Greeter
+
+###################################################################################################
+# Modèle Rotation des greeters : dernière balade et prochaine date d'éligibilité
+
+class GreeterRotation(models.Model):
+    greeter = models.OneToOneField(Greeter, on_delete=models.CASCADE, related_name='rotation')
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='greeter_rotations')
+    last_walk_date = models.DateField(blank=True, null=True, verbose_name=_("Date de la dernière balade"))
+    next_eligible_date = models.DateField(blank=True, null=True, verbose_name=_("Prochaine date d'éligibilité"))
+    walks_count = models.PositiveIntegerField(default=0, verbose_name=_("Nombre de balades"))
+
+    class Meta:
+        indexes = [models.Index(fields=['destination', 'last_walk_date'])]
+        verbose_name = "Rotation greeter"
+        verbose_name_plural = "Rotations greeters"
+
+    def __str__(self):
+        return f"{self.greeter_id} : {self.last_walk_date} -> {self.next_eligible_date}"
+
+###################################################################################################
+# Modèle Demande de visite : cycle de vie piloté par Destination_flux (greet.workflow)
+
+class VisitRequest(models.Model):
+    NEW = 'new'
+    TREATMENT = 'treatment'
+    URGENT = 'urgent'
+    PROPOSED = 'proposed'
+    CONFIRMED = 'confirmed'
+    DONE = 'done'
+    REVIEWED = 'reviewed'
+    ANONYMISED = 'anonymised'
+    CANCELLED = 'cancelled'
+
+    choices_state = (
+        (NEW, _("Nouvelle")),
+        (TREATMENT, _("Traitement")),
+        (URGENT, _("Urgente")),
+        (PROPOSED, _("Proposée")),
+        (CONFIRMED, _("Confirmée")),
+        (DONE, _("Réalisée")),
+        (REVIEWED, _("Avis clôturé")),
+        (ANONYMISED, _("Anonymisée")),
+        (CANCELLED, _("Annulée")),
+    )
+
+    destination = models.ForeignKey(Destination, on_delete=models.PROTECT, related_name='visit_requests', verbose_name=_("Destination"))
+    state = models.CharField(max_length=15, choices=choices_state, default=NEW, verbose_name=_("Statut"))
+    state_changed_at = models.DateTimeField(default=timezone.now, verbose_name=_("Date du dernier changement de statut"))
+    created_at = models.DateTimeField(default=timezone.now, verbose_name=_("Date de la demande"))
+
+    visitor_first_name = models.CharField(max_length=50, default="", verbose_name=_("Prénom du visiteur"))
+    visitor_last_name = models.CharField(max_length=50, default="", verbose_name=_("Nom du visiteur"))
+    visitor_email = models.EmailField(default="", verbose_name=_("Courriel du visiteur"))
+    visitor_phone = models.CharField(max_length=20, default="", blank=True, verbose_name=_("Téléphone du visiteur"))
+    visitor_lang = models.CharField(max_length=10, choices=settings.LANGUAGES, default='fr', verbose_name=_("Langue de communication du visiteur"))
+    comments_visitor = models.TextField(max_length=1000, default="", blank=True, verbose_name=_("Commentaires du visiteur"))
+
+    walk_date = models.DateField(verbose_name=_("Date de la balade"))
+    periode = models.ForeignKey(Periode, on_delete=models.PROTECT, blank=True, null=True, verbose_name=_("Période de la journée"))
+    group_size = models.PositiveSmallIntegerField(default=1, verbose_name=_("Nombre de participants"))
+    languages = models.ManyToManyField(LangueParlee, blank=True, verbose_name=_("Langues parlées"))
+    interests = models.ManyToManyField(InterestCenter, blank=True, verbose_name=_("Centres d'intérêt"))
+    disability = models.BooleanField(default=False, verbose_name=_("Visiteur en situation de handicap"))
+
+    greeter = models.ForeignKey(Greeter, on_delete=models.SET_NULL, blank=True, null=True, related_name='visit_requests', verbose_name=_("Greeter"))
+    greeter_assigned_at = models.DateTimeField(blank=True, null=True, verbose_name=_("Date d'attribution au Greeter"))
+
+    # Relances et courriels déjà envoyés par le moteur de workflow
+    next_reminder_at = models.DateTimeField(blank=True, null=True, verbose_name=_("Date de la prochaine relance"))
+    pre_walk_reminder_sent = models.BooleanField(default=False)
+    report_requested = models.BooleanField(default=False)
+    review_requested = models.BooleanField(default=False)
+    anonymised_at = models.DateTimeField(blank=True, null=True, verbose_name=_("Date d'anonymisation"))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['destination', 'state', 'state_changed_at']),
+            models.Index(fields=['destination', 'state', 'walk_date']),
+            models.Index(fields=['destination', 'state', 'next_reminder_at']),
+        ]
+        verbose_name = _("Demande de visite")
+        verbose_name_plural = _("Demandes de visite")
+
+    def __str__(self):
+        return f"{self.destination_id} - {self.walk_date} - {self.get_state_display()}"
+
+###################################################################################################
+# Modèle Filigrane d'anonymisation RGPD : position atteinte par le job pour chaque destination
+
+class AnonymisationWatermark(models.Model):
+    destination = models.OneToOneField(Destination, on_delete=models.CASCADE, related_name='anonymisation_watermark')
+    last_state_changed_at = models.DateTimeField(blank=True, null=True)
+    last_pk = models.BigIntegerField(default=0)
+    rows_total = models.PositiveIntegerField(default=0, verbose_name=_("Demandes anonymisées"))
+    last_run_at = models.DateTimeField(blank=True, null=True, verbose_name=_("Dernière exécution"))
+
+    class Meta:
+        verbose_name = "Filigrane d'anonymisation"
+        verbose_name_plural = "Filigranes d'anonymisation"
+
+    def __str__(self):
+        return f"{self.destination_id} : {self.last_state_changed_at} / {self.last_pk}"
+
+###################################################################################################
+# Modèle Mur C&G : demandes ouvertes proposées aux greeters, tenu à jour de façon incrémentale (greet.wall)
+
+class WallEntry(models.Model):
+    visit_request = models.OneToOneField(VisitRequest, on_delete=models.CASCADE, primary_key=True, related_name='wall_entry')
+    destination = models.ForeignKey(Destination, on_delete=models.CASCADE, related_name='wall_entries')
+    state = models.CharField(max_length=15, choices=VisitRequest.choices_state, verbose_name=_("Statut"))
+    walk_date = models.DateField(verbose_name=_("Date de la balade"))
+    periode = models.ForeignKey(Periode, on_delete=models.SET_NULL, blank=True, null=True, verbose_name=_("Période de la journée"))
+    group_size = models.PositiveSmallIntegerField(default=1, verbose_name=_("Nombre de participants"))
+    visitor_lang = models.CharField(max_length=10, default='fr', verbose_name=_("Langue de communication du visiteur"))
+    disability = models.BooleanField(default=False, verbose_name=_("Visiteur en situation de handicap"))
+    # Identifiants LangueParlee et InterestCenter de la demande, recopiés pour une lecture sans jointure
+    languages = models.JSONField(default=list, blank=True)
+    interests = models.JSONField(default=list, blank=True)
+    posted_at = models.DateTimeField(default=timezone.now, verbose_name=_("Date d'affichage sur le mur"))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['destination', 'walk_date']),
+            models.Index(fields=['destination', 'posted_at']),
+        ]
+        verbose_name = _("Demande du mur C&G")
+        verbose_name_plural = _("Mur C&G")
+
+    def __str__(self):
+        return f"{self.destination_id} - {self.walk_date} - {self.get_state_display()}"
+
+###################################################################################################
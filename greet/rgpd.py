@@ -0,0 +1,121 @@
+###################################################################################################
+# Anonymisation RGPD des demandes de visite (Destination_flux.flux_rgpd_dest)
+# Job reprenable : chaque destination garde un filigrane (state_changed_at, pk) ; un passage
+# ne parcourt que les demandes devenues expirées depuis, par pagination par clé et par paquets.
+
+import datetime
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from destination.models import Destination_flux
+from greet.models import AnonymisationWatermark, VisitRequest
+
+# Statuts à partir desquels les données personnelles du visiteur ne sont plus utiles
+EXPIRABLE_STATES = (VisitRequest.DONE, VisitRequest.REVIEWED, VisitRequest.CANCELLED)
+
+# Champs personnels effacés et valeur de remplacement
+PERSONAL_FIELDS = {
+    'visitor_first_name': '',
+    'visitor_last_name': '',
+    'visitor_email': '',
+    'visitor_phone': '',
+    'comments_visitor': '',
+}
+
+
+def get_chunk_size():
+    return getattr(settings, 'GREET_RGPD_CHUNK_SIZE', 1000)
+
+
+def _after_watermark(watermark):
+    """Demandes situées après le filigrane dans l'ordre (state_changed_at, pk)."""
+    if watermark.last_state_changed_at is None:
+        return Q()
+    return (Q(state_changed_at__gt=watermark.last_state_changed_at)
+            | Q(state_changed_at=watermark.last_state_changed_at, pk__gt=watermark.last_pk))
+
+
+def expired_requests(destination_id, cutoff, watermark):
+    return VisitRequest.objects.filter(
+        _after_watermark(watermark),
+        destination_id=destination_id,
+        state__in=EXPIRABLE_STATES,
+        state_changed_at__lte=cutoff,
+    )
+
+
+def anonymise_destination(destination_id, retention_days, now=None, max_rows=None, chunk_size=None):
+    """
+    Anonymise les demandes expirées d'une destination, paquet par paquet.
+    Chaque paquet est validé avec l'avancée du filigrane : une interruption reprend au paquet suivant.
+    Retourne (lignes anonymisées, lignes restantes).
+    """
+    now = now or timezone.now()
+    chunk_size = chunk_size or get_chunk_size()
+    cutoff = now - datetime.timedelta(days=retention_days)
+    watermark, created = AnonymisationWatermark.objects.get_or_create(destination_id=destination_id)
+
+    processed = 0
+    while max_rows is None or processed < max_rows:
+        limit = chunk_size if max_rows is None else min(chunk_size, max_rows - processed)
+        chunk = list(
+            expired_requests(destination_id, cutoff, watermark)
+            .order_by('state_changed_at', 'pk')
+            .values_list('pk', 'state_changed_at')[:limit]
+        )
+        if not chunk:
+            break
+
+        with transaction.atomic():
+            VisitRequest.objects.filter(pk__in=[pk for pk, changed_at in chunk]).update(
+                state=VisitRequest.ANONYMISED, anonymised_at=now, **PERSONAL_FIELDS
+            )
+            watermark.last_pk, watermark.last_state_changed_at = chunk[-1]
+            watermark.rows_total += len(chunk)
+            watermark.last_run_at = now
+            watermark.save()
+        processed += len(chunk)
+
+        if len(chunk) < limit:
+            break
+
+    remaining = expired_requests(destination_id, cutoff, watermark).count()
+    if not processed:
+        AnonymisationWatermark.objects.filter(pk=watermark.pk).update(last_run_at=now)
+    return processed, remaining
+
+
+def run_anonymisation(now=None, max_rows_per_destination=None):
+    """
+    Passage complet sur toutes les destinations dont flux_rgpd_dest est renseigné.
+    Retourne un rapport : lignes traitées, débit (lignes/s) et reste à traiter par destination.
+    """
+    now = now or timezone.now()
+    started = time.monotonic()
+    report = {'destinations': {}, 'rows': 0, 'remaining': 0}
+
+    fluxes = Destination_flux.objects.filter(flux_rgpd_dest__gt=0).values_list(
+        'code_dest_flux_id', 'flux_rgpd_dest'
+    )
+    for destination_id, retention_days in fluxes:
+        destination_started = time.monotonic()
+        rows, remaining = anonymise_destination(
+            destination_id, retention_days, now=now, max_rows=max_rows_per_destination
+        )
+        elapsed = time.monotonic() - destination_started
+        report['destinations'][destination_id] = {
+            'rows': rows,
+            'remaining': remaining,
+            'rows_per_second': round(rows / elapsed, 1) if elapsed and rows else 0,
+        }
+        report['rows'] += rows
+        report['remaining'] += remaining
+
+    elapsed = time.monotonic() - started
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['rows'] / elapsed, 1) if elapsed and report['rows'] else 0
+    return report
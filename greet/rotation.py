@@ -0,0 +1,189 @@
+###################################################################################################
+# Rotation équitable des greeters : respect de frequency_greeter (jours entre deux balades)
+# et de dispersion_param_dest, ordre « le moins récemment sollicité d'abord »
+# L'écart est vérifié de part et d'autre de chaque balade réservée du greeter (passée ou à venir) :
+# une demande peut porter sur une date antérieure à une balade déjà confirmée.
+# L'écart est calculé au chargement à partir des paramètres actuels ; leur modification
+# incrémente la version des tables concernées (core.signals).
+
+import bisect
+import datetime
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from destination.models import Destination
+from greet.models import GreeterRotation, VisitRequest
+from greeters.models import Greeter
+
+# Balades réservées prises en compte : confirmées ou réalisées, sur la dernière année et à venir
+BOOKED_STATES = (VisitRequest.CONFIRMED, VisitRequest.DONE, VisitRequest.REVIEWED)
+WALKS_WINDOW_DAYS = 366
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def _version_key(destination_id):
+    return f"greet:rotation:version:{destination_id}"
+
+
+def _bump(destination_id):
+    try:
+        cache.incr(_version_key(destination_id))
+    except ValueError:
+        cache.set(_version_key(destination_id), 1, None)
+    return cache.get(_version_key(destination_id), 0)
+
+
+def invalidate_rotation(destination_ids):
+    """Écart modifié (frequency_greeter, dispersion_param_dest) : les tables sont rechargées."""
+    for destination_id in set(destination_ids):
+        if destination_id is not None:
+            _bump(destination_id)
+
+
+def greeter_destination_ids(greeter_id):
+    """Destinations dont la table contient le greeter : ligne de rotation ou balades réservées."""
+    return {
+        *GreeterRotation.objects.filter(greeter_id=greeter_id).values_list('destination_id', flat=True),
+        *VisitRequest.objects.filter(greeter_id=greeter_id, state__in=BOOKED_STATES).values_list(
+            'destination_id', flat=True
+        ).distinct(),
+    }
+
+
+class RotationTable:
+    """
+    Table compacte d'une destination : greeter_id -> (dernière balade, écart en jours,
+    balades réservées triées) en ordinaux de dates. Éligibilité par recherche dichotomique
+    parmi les balades du greeter, clé d'ordre LRU en O(1).
+    """
+
+    def __init__(self, destination_id, entries):
+        self.destination_id = destination_id
+        self.entries = entries
+
+    def is_eligible(self, greeter_id, date):
+        """Vrai si la date est à au moins `écart` jours de chacune des balades réservées du greeter."""
+        entry = self.entries.get(greeter_id)
+        if entry is None or not entry[1]:
+            return True
+        last_walk, gap, walks = entry
+        day = date.toordinal()
+        index = bisect.bisect_left(walks, day)
+        # Balade suivante (ou le jour même), puis balade précédente
+        if index < len(walks) and walks[index] - day < gap:
+            return False
+        if index > 0 and day - walks[index - 1] < gap:
+            return False
+        return True
+
+    def lru_key(self, greeter_id):
+        """Clé de tri : les greeters jamais sollicités d'abord, puis la balade la plus ancienne."""
+        entry = self.entries.get(greeter_id)
+        return entry[0] if entry and entry[0] is not None else 0
+
+    def update(self, greeter_id, last_walk_date, gap, walk_dates=()):
+        """Ligne de rotation du greeter ; walk_dates s'ajoute à ses balades réservées déjà connues."""
+        entry = self.entries.get(greeter_id)
+        walks = set(entry[2]) if entry else set()
+        walks.update(walk_date.toordinal() for walk_date in walk_dates)
+        if last_walk_date:
+            walks.add(last_walk_date.toordinal())
+        self.entries[greeter_id] = (
+            last_walk_date.toordinal() if last_walk_date else None,
+            gap,
+            tuple(sorted(walks)),
+        )
+
+
+def _load_table(destination_id):
+    """
+    Trois requêtes : paramètre de la destination, lignes de rotation et balades réservées.
+    Un greeter sans ligne de rotation mais avec des balades réservées figure dans la table.
+    """
+    dispersion = Destination.objects.filter(pk=destination_id).values_list(
+        'dispersion_param_dest', flat=True
+    ).first()
+    # greeter_id -> [frequency_greeter, dernière balade enregistrée, balades réservées]
+    greeters = {}
+    for greeter_id, frequency, last_walk_date in GreeterRotation.objects.filter(
+        destination_id=destination_id
+    ).values_list('greeter_id', 'greeter__frequency_greeter', 'last_walk_date'):
+        greeters[greeter_id] = [frequency, last_walk_date, []]
+    since = timezone.localdate() - datetime.timedelta(days=WALKS_WINDOW_DAYS)
+    for greeter_id, frequency, walk_date in VisitRequest.objects.filter(
+        destination_id=destination_id, greeter__isnull=False, state__in=BOOKED_STATES, walk_date__gte=since
+    ).values_list('greeter_id', 'greeter__frequency_greeter', 'walk_date'):
+        greeters.setdefault(greeter_id, [frequency, None, []])[2].append(walk_date)
+
+    table = RotationTable(destination_id, {})
+    today = timezone.localdate()
+    for greeter_id, (frequency, last_walk_date, walk_dates) in greeters.items():
+        if last_walk_date is None:
+            # Ordre LRU sans ligne de rotation : dernière balade réservée passée
+            last_walk_date = max((walk_date for walk_date in walk_dates if walk_date <= today), default=None)
+        table.update(greeter_id, last_walk_date, rotation_gap(frequency, dispersion), walk_dates)
+    return table
+
+
+def get_rotation_table(destination_id):
+    """Table de rotation de la destination (chargée au premier appel ou après invalidation, puis mémoire)."""
+    version = cache.get(_version_key(destination_id), 0)
+    with _tables_lock:
+        cached = _tables.get(destination_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    table = _load_table(destination_id)
+    with _tables_lock:
+        _tables[destination_id] = (version, table)
+    return table
+
+
+def rotation_gap(frequency_greeter, dispersion_param_dest):
+    """
+    Nombre de jours entre deux balades d'un greeter : frequency_greeter,
+    avec dispersion_param_dest comme minimum imposé par la destination.
+    """
+    return max(frequency_greeter or 0, dispersion_param_dest or 0)
+
+
+def record_walk(greeter_id, walk_date):
+    """
+    Enregistre une balade confirmée : met à jour la ligne de rotation du greeter
+    et, de façon incrémentale, la table en mémoire de sa destination.
+    """
+    greeter = Greeter.objects.select_related('user').get(pk=greeter_id)
+    destination_id = greeter.user.code_dest_id
+    dispersion = Destination.objects.filter(pk=destination_id).values_list(
+        'dispersion_param_dest', flat=True
+    ).first()
+    gap = rotation_gap(greeter.frequency_greeter, dispersion)
+
+    with transaction.atomic():
+        rotation, created = GreeterRotation.objects.select_for_update().get_or_create(
+            greeter_id=greeter_id, defaults={'destination_id': destination_id}
+        )
+        rotation.destination_id = destination_id
+        rotation.walks_count += 1
+        # Une balade antérieure à la dernière connue ne recule pas la rotation
+        if rotation.last_walk_date is None or walk_date >= rotation.last_walk_date:
+            rotation.last_walk_date = walk_date
+            rotation.next_eligible_date = walk_date + datetime.timedelta(days=gap)
+        rotation.save()
+
+    def refresh():
+        # Les autres processus rechargent ; celui-ci met sa table à jour sans relecture
+        version = _bump(destination_id)
+        with _tables_lock:
+            cached = _tables.get(destination_id)
+            if cached:
+                cached[1].update(greeter_id, rotation.last_walk_date, gap, [walk_date])
+                _tables[destination_id] = (version, cached[1])
+
+    transaction.on_commit(refresh)
+    return rotation
@@ -0,0 +1,36 @@
+from celery import shared_task
+
+from greet import wall
+from greet.rgpd import run_anonymisation
+from greet.workflow import run_workflow_tick
+
+###################################################################################################
+# Tâche périodique (Celery beat) du workflow des demandes de visite
+
+@shared_task
+def workflow_tick():
+    return run_workflow_tick()
+
+
+###################################################################################################
+# Tâche nocturne (Celery beat) d'anonymisation RGPD des demandes de visite
+
+@shared_task
+def anonymise_visit_requests():
+    return run_anonymisation()
+
+
+###################################################################################################
+# Tâche quotidienne (Celery beat) des courriels périodiques du mur C&G
+
+@shared_task
+def send_wall_digests():
+    return wall.send_wall_digests()
+
+
+###################################################################################################
+# Tâche nocturne (Celery beat) de retrait des demandes passées du mur C&G
+
+@shared_task
+def prune_wall():
+    return wall.prune_wall()
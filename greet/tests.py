@@ -1,3 +1,289 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from cluster.models import Cluster
+from core.models import Beneficiaire, Email_Mailjet, Language_communication, Pays, TrancheAge
+from core.tasks import send_email_mailjet_batch
+from destination.models import Destination, Destination_data, Destination_flux
+from greet import rotation
+from greet.models import AnonymisationWatermark, GreeterRotation, VisitRequest
+from greet.rgpd import anonymise_destination, run_anonymisation
+from greet.workflow import EMAIL_PRE_WALK, EMAIL_VISITOR_REMINDER, run_workflow_tick
+from greeters.models import Greeter
+
+User = get_user_model()
+
+
+###################################################################################################
+# Moteur de workflow des demandes de visite
+
+class WorkflowTickTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        today = cls.now.date()
+        country = Pays.objects.create(code_iso='FRA', nom_pays='France')
+        cluster = Cluster.objects.create(code_cluster='NA', name_cluster='Nouvelle-Aquitaine', statut_cluster='Active')
+        cls.destination = Destination.objects.create(code_cluster=cluster, code_dest='BDX', name_dest='Bordeaux',
+                                                     country_dest=country, URL_retry_dest='https://example.com')
+        Destination_data.objects.create(
+            code_dest_data=cls.destination,
+            beneficiaire_don_dest=Beneficiaire.objects.create(nom_beneficiaire='Association'),
+            lang_default_dest=Language_communication.objects.create(code='fr', name='Français'),
+        )
+        Destination_flux.objects.create(
+            code_dest_flux=cls.destination,
+            flux_treatement_dest=2, flux_urgency_dest=5,
+            flux_frequence_relance_visiteur_dest=3, flux_delai_pre_balade_dest=2,
+        )
+        Email_Mailjet.objects.create(code_email=EMAIL_VISITOR_REMINDER, name_email='Relance visiteur',
+                                     lang_email='fr', id_mailjet_email=101)
+        Email_Mailjet.objects.create(code_email=EMAIL_PRE_WALK, name_email='Rappel avant balade',
+                                     lang_email='fr', id_mailjet_email=102)
+
+        def visit(**fields):
+            fields.setdefault('walk_date', today + datetime.timedelta(days=10))
+            return VisitRequest.objects.create(destination=cls.destination, visitor_first_name='Vera',
+                                               visitor_last_name='Visiteur', visitor_email='vera@example.com',
+                                               **fields)
+
+        days = datetime.timedelta(days=1)
+        cls.recent = visit(created_at=cls.now - 3 * days)
+        cls.old = visit(created_at=cls.now - 6 * days)
+        cls.fresh = visit(created_at=cls.now)
+        cls.proposed = visit(state=VisitRequest.PROPOSED, next_reminder_at=cls.now - days)
+        cls.upcoming = visit(state=VisitRequest.CONFIRMED, walk_date=today + days)
+        cls.past = visit(state=VisitRequest.CONFIRMED, walk_date=today - days)
+
+    def _run(self):
+        with mock.patch.object(send_email_mailjet_batch, 'delay') as delay:
+            with self.captureOnCommitCallbacks() as callbacks:
+                stats = run_workflow_tick(self.now)
+            # Aucun courriel avant le commit des paquets
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+        return stats, [message for call in delay.call_args_list for message in call.args[0]]
+
+    def test_state_transitions(self):
+        stats, messages = self._run()
+        states = dict(VisitRequest.objects.values_list('pk', 'state'))
+        self.assertEqual(states[self.recent.pk], VisitRequest.TREATMENT)
+        self.assertEqual(states[self.old.pk], VisitRequest.URGENT)
+        self.assertEqual(states[self.fresh.pk], VisitRequest.NEW)
+        self.assertEqual(states[self.proposed.pk], VisitRequest.PROPOSED)
+        self.assertEqual(states[self.upcoming.pk], VisitRequest.CONFIRMED)
+        self.assertEqual(states[self.past.pk], VisitRequest.DONE)
+        self.assertEqual(stats['treatment'], 2)
+        self.assertEqual(stats['urgent'], 1)
+        self.assertEqual(stats['done'], 1)
+
+    def test_emails_enqueued_after_commit(self):
+        stats, messages = self._run()
+        self.assertEqual(stats['emails'], 2)
+        self.assertEqual(sorted((message['CustomID'], message['TemplateID']) for message in messages), sorted([
+            (f"visit-{self.proposed.pk}", 101), (f"visit-{self.upcoming.pk}", 102),
+        ]))
+        self.proposed.refresh_from_db()
+        self.assertEqual(self.proposed.next_reminder_at, self.now + datetime.timedelta(days=3))
+
+    def test_pre_walk_not_sent_for_past_walks(self):
+        self._run()
+        self.upcoming.refresh_from_db()
+        self.past.refresh_from_db()
+        self.assertTrue(self.upcoming.pre_walk_reminder_sent)
+        self.assertFalse(self.past.pre_walk_reminder_sent)
+
+    def test_second_tick_sends_nothing(self):
+        self._run()
+        stats, messages = self._run()
+        self.assertEqual(messages, [])
+        self.assertEqual(stats, {'emails': 0})
+
+
+###################################################################################################
+# Anonymisation RGPD
+
+class AnonymisationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        days = datetime.timedelta(days=1)
+        country = Pays.objects.create(code_iso='FRA', nom_pays='France')
+        cluster = Cluster.objects.create(code_cluster='NA', name_cluster='Nouvelle-Aquitaine', statut_cluster='Active')
+        cls.destination = Destination.objects.create(code_cluster=cluster, code_dest='BDX', name_dest='Bordeaux',
+                                                     country_dest=country, URL_retry_dest='https://example.com')
+        cls.other_destination = Destination.objects.create(code_cluster=cluster, code_dest='ARC',
+                                                           name_dest='Arcachon', country_dest=country,
+                                                           URL_retry_dest='https://example.com')
+        Destination_flux.objects.create(code_dest_flux=cls.destination, flux_rgpd_dest=30)
+        # Durée non renseignée : destination ignorée
+        Destination_flux.objects.create(code_dest_flux=cls.other_destination, flux_rgpd_dest=0)
+
+        def visit(destination, state, age, **fields):
+            return VisitRequest.objects.create(
+                destination=destination, state=state, state_changed_at=cls.now - age,
+                walk_date=(cls.now - age).date(), visitor_first_name='Vera', visitor_last_name='Visiteur',
+                visitor_email='vera@example.com', visitor_phone='0600000000', comments_visitor='Merci', **fields
+            )
+
+        # Expirées, dans l'ordre (state_changed_at, pk) ; les deux premières à la même date
+        cls.expired = [
+            visit(cls.destination, VisitRequest.DONE, 40 * days),
+            visit(cls.destination, VisitRequest.CANCELLED, 40 * days),
+            visit(cls.destination, VisitRequest.REVIEWED, 35 * days),
+            visit(cls.destination, VisitRequest.DONE, 31 * days),
+        ]
+        cls.expired.sort(key=lambda request: (request.state_changed_at, request.pk))
+        cls.recent = visit(cls.destination, VisitRequest.DONE, 29 * days)
+        cls.open = visit(cls.destination, VisitRequest.CONFIRMED, 60 * days)
+        cls.already = visit(cls.destination, VisitRequest.ANONYMISED, 90 * days, anonymised_at=cls.now - 60 * days)
+        cls.other = visit(cls.other_destination, VisitRequest.DONE, 400 * days)
+
+    def _anonymised(self):
+        return set(VisitRequest.objects.filter(anonymised_at=self.now).values_list('pk', flat=True))
+
+    def test_cutoff_from_flux(self):
+        report = run_anonymisation(now=self.now)
+        self.assertEqual(self._anonymised(), {request.pk for request in self.expired})
+        for request in self.expired:
+            request.refresh_from_db()
+            self.assertEqual(request.state, VisitRequest.ANONYMISED)
+            self.assertEqual((request.visitor_first_name, request.visitor_email, request.visitor_phone,
+                              request.comments_visitor), ('', '', '', ''))
+        for request in (self.recent, self.open, self.other):
+            request.refresh_from_db()
+            self.assertEqual(request.visitor_email, 'vera@example.com')
+        self.assertEqual(report['rows'], 4)
+        self.assertNotIn(self.other_destination.pk, report['destinations'])
+
+    def test_anonymised_requests_are_skipped(self):
+        run_anonymisation(now=self.now)
+        self.already.refresh_from_db()
+        self.assertEqual(self.already.anonymised_at, self.now - datetime.timedelta(days=60))
+        self.assertNotIn(self.already.pk, self._anonymised())
+
+    def test_watermark_resumes_across_chunks(self):
+        rows, remaining = anonymise_destination(self.destination.pk, 30, now=self.now, max_rows=3, chunk_size=2)
+        self.assertEqual((rows, remaining), (3, 1))
+        self.assertEqual(self._anonymised(), {request.pk for request in self.expired[:3]})
+        watermark = AnonymisationWatermark.objects.get(destination=self.destination)
+        self.assertEqual((watermark.last_state_changed_at, watermark.last_pk),
+                         (self.expired[2].state_changed_at, self.expired[2].pk))
+
+        # Reprise après le filigrane
+        rows, remaining = anonymise_destination(self.destination.pk, 30, now=self.now, chunk_size=2)
+        self.assertEqual((rows, remaining), (1, 0))
+        watermark.refresh_from_db()
+        self.assertEqual(watermark.rows_total, 4)
+        self.assertEqual(watermark.last_pk, self.expired[3].pk)
+
+        # Passage suivant : rien à faire, la date d'exécution avance quand même
+        later = self.now + datetime.timedelta(hours=1)
+        self.assertEqual(anonymise_destination(self.destination.pk, 30, now=later), (0, 0))
+        watermark.refresh_from_db()
+        self.assertEqual(watermark.last_run_at, later)
+
+    def test_report(self):
+        report = run_anonymisation(now=self.now, max_rows_per_destination=3)
+        entry = report['destinations'][self.destination.pk]
+        self.assertEqual((entry['rows'], entry['remaining']), (3, 1))
+        self.assertEqual((report['rows'], report['remaining']), (3, 1))
+        self.assertGreater(entry['rows_per_second'], 0)
+        self.assertGreater(report['rows_per_second'], 0)
+        self.assertIn('seconds', report)
+
+        report = run_anonymisation(now=self.now)
+        self.assertEqual((report['rows'], report['remaining']), (1, 0))
+
+
+###################################################################################################
+# Rotation équitable des greeters
+
+class RotationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        country = Pays.objects.create(code_iso='FRA', nom_pays='France')
+        cluster = Cluster.objects.create(code_cluster='NA', name_cluster='Nouvelle-Aquitaine', statut_cluster='Active')
+        cls.destination = Destination.objects.create(code_cluster=cluster, code_dest='BDX', name_dest='Bordeaux',
+                                                     country_dest=country, URL_retry_dest='https://example.com',
+                                                     dispersion_param_dest=2)
+        age = TrancheAge.objects.create()
+
+        def greeter(name, frequency):
+            user = User.objects.create_user(f"{name}@example.com", name.capitalize(), 'Greeter')
+            user.code_dest = cls.destination
+            user.save()
+            return Greeter.objects.create(user=user, country_greeter=country, age_greeter=age,
+                                          arrival_greeter=cls.today, frequency_greeter=frequency)
+
+        cls.recorded = greeter('gaston', 5)
+        cls.booked = greeter('gisele', 5)
+        GreeterRotation.objects.create(greeter=cls.recorded, destination=cls.destination, walks_count=1,
+                                       last_walk_date=cls.today, next_eligible_date=cls.today)
+        # Balade confirmée sans ligne de rotation (créée hors record_walk)
+        VisitRequest.objects.create(destination=cls.destination, greeter=cls.booked, state=VisitRequest.CONFIRMED,
+                                    walk_date=cls.today, visitor_first_name='Vera', visitor_last_name='Visiteur',
+                                    visitor_email='vera@example.com')
+
+    def setUp(self):
+        cache.clear()
+        rotation._tables.clear()
+
+    def _eligible(self, greeter, days):
+        table = rotation.get_rotation_table(self.destination.pk)
+        return table.is_eligible(greeter.pk, self.today + datetime.timedelta(days=days))
+
+    def assertGap(self, greeter, gap):
+        for days in (gap - 1, -(gap - 1)):
+            self.assertFalse(self._eligible(greeter, days), days)
+        for days in (gap, -gap):
+            self.assertTrue(self._eligible(greeter, days), days)
+
+    def test_booked_walk_without_rotation_row(self):
+        self.assertGap(self.booked, 5)
+        self.assertEqual(rotation.get_rotation_table(self.destination.pk).lru_key(self.booked.pk),
+                         rotation.get_rotation_table(self.destination.pk).lru_key(self.recorded.pk))
+
+    def test_gap_follows_greeter_frequency(self):
+        self.assertGap(self.recorded, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booked.frequency_greeter = 10
+            self.booked.save()
+        self.assertGap(self.booked, 10)
+        self.assertGap(self.recorded, 5)
+
+    def test_gap_follows_destination_dispersion(self):
+        self.assertGap(self.recorded, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.destination.dispersion_param_dest = 8
+            self.destination.save(update_fields=['dispersion_param_dest'])
+        self.assertGap(self.recorded, 8)
+        self.assertGap(self.booked, 8)
+
+    def test_unrelated_save_keeps_table(self):
+        table = rotation.get_rotation_table(self.destination.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recorded.save(update_fields=['arrival_greeter'])
+            self.recorded.save()
+            self.destination.save()
+        with self.assertNumQueries(0):
+            self.assertIs(rotation.get_rotation_table(self.destination.pk), table)
 
-# Create your tests here.
+    def test_record_walk_updates_cached_table(self):
+        rotation.get_rotation_table(self.destination.pk)
+        walk_date = self.today + datetime.timedelta(days=20)
+        with self.captureOnCommitCallbacks(execute=True):
+            rotation.record_walk(self.recorded.pk, walk_date)
+        # Mise à jour incrémentale : pas de rechargement
+        with self.assertNumQueries(0):
+            table = rotation.get_rotation_table(self.destination.pk)
+        self.assertFalse(table.is_eligible(self.recorded.pk, walk_date + datetime.timedelta(days=4)))
+        self.assertTrue(table.is_eligible(self.recorded.pk, walk_date + datetime.timedelta(days=5)))
+        self.assertTrue(table.is_eligible(self.recorded.pk, self.today + datetime.timedelta(days=10)))
@@ -1,6 +1,7 @@
-from django.urls import include, path
+from django.urls import path
 
-from users import views as account_views
+from greet import views as greet_views
 
 urlpatterns = [
-]
\ No newline at end of file
+    path('greet/wall/', greet_views.WallView.as_view(), name='greet_wall'),
+]
@@ -1,3 +1,16 @@
-from django.shortcuts import render
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import TemplateView
 
-# Create your views here.
+from greet.wall import get_wall
+
+###################################################################################################
+# Vue Mur C&G : demandes ouvertes de la destination de l'utilisateur
+
+class WallView(LoginRequiredMixin, TemplateView):
+    template_name = 'greet/wall.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        destination_id = self.request.user.code_dest_id
+        context['wall'] = get_wall(destination_id) if destination_id else []
+        return context
@@ -0,0 +1,274 @@
+###################################################################################################
+# Mur C&G (Greet & Greet) : table matérialisée des demandes ouvertes de chaque destination
+# Tenue à jour par demande modifiée (signaux, workflow) ; le mur et le courriel périodique C&G
+# la lisent en une requête, puis depuis le cache, sans reparcourir l'historique des demandes.
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import get_language
+
+from core.mailjet import MAILJET_MAX_MESSAGES, get_mailjet_template_id, template_message
+from core.models import Email_Mailjet
+from core.tasks import send_email_mailjet_batch
+from destination.models import Destination_data
+from greet.models import VisitRequest, WallEntry
+from greeters.models import Greeter
+
+# Code du template Mailjet du courriel périodique C&G
+EMAIL_WALL_DIGEST = 'CGMUR'
+
+# Type de gestion sans mur : les demandes sont attribuées par le gestionnaire
+MANAGER_ONLY = 'Gest'
+
+# Champs de Destination_data qui déterminent les statuts affichés (wall_states)
+WALL_SETTINGS_FIELDS = ('flag_modalités_dest', 'flag_cg_T_dest', 'flag_cg_U_dest')
+
+logger = logging.getLogger(__name__)
+
+WALL_FIELDS = ('state', 'walk_date', 'periode_id', 'group_size', 'visitor_lang', 'disability',
+               'languages', 'interests')
+
+
+def get_cache_timeout():
+    return getattr(settings, 'GREET_WALL_CACHE_TIMEOUT', 3600)
+
+
+def _version_key(destination_id):
+    return f"greet:wall:version:{destination_id}"
+
+
+def invalidate_wall(destination_id):
+    """Invalide le mur mis en cache d'une destination (toutes langues, tous processus)."""
+    try:
+        cache.incr(_version_key(destination_id))
+    except ValueError:
+        cache.set(_version_key(destination_id), 1, None)
+
+
+###################################################################################################
+# Règles d'affichage
+
+def wall_states(data):
+    """
+    Statuts affichés sur le mur selon Destination_data : les nouvelles demandes,
+    plus Traitement (flag_cg_T_dest) et Urgent (flag_cg_U_dest). Aucun en gestion par gestionnaire.
+    """
+    if data['flag_modalités_dest'] == MANAGER_ONLY:
+        return ()
+    states = [VisitRequest.NEW]
+    if data['flag_cg_T_dest']:
+        states.append(VisitRequest.TREATMENT)
+    if data['flag_cg_U_dest']:
+        states.append(VisitRequest.URGENT)
+    return tuple(states)
+
+
+def _wall_settings(destination_ids):
+    return {
+        data['code_dest_data_id']: wall_states(data)
+        for data in Destination_data.objects.filter(code_dest_data_id__in=destination_ids).values(
+            'code_dest_data_id', *WALL_SETTINGS_FIELDS
+        )
+    }
+
+
+def _related_ids(through, column, visit_ids):
+    related = {}
+    for visit_id, object_id in through.objects.filter(visitrequest_id__in=visit_ids).values_list(
+        'visitrequest_id', column
+    ):
+        related.setdefault(visit_id, []).append(object_id)
+    return related
+
+
+def _entries(queryset, states_by_destination):
+    """Lignes WallEntry des demandes du queryset qui doivent figurer sur le mur."""
+    rows = list(queryset.filter(greeter__isnull=True).values(
+        'pk', 'destination_id', 'state', 'walk_date', 'periode_id', 'group_size', 'visitor_lang',
+        'disability', 'state_changed_at',
+    ))
+    rows = [row for row in rows if row['state'] in states_by_destination.get(row['destination_id'], ())]
+    visit_ids = [row['pk'] for row in rows]
+    languages = _related_ids(VisitRequest.languages.through, 'langueparlee_id', visit_ids)
+    interests = _related_ids(VisitRequest.interests.through, 'interestcenter_id', visit_ids)
+    return [
+        WallEntry(
+            visit_request_id=row['pk'],
+            destination_id=row['destination_id'],
+            state=row['state'],
+            walk_date=row['walk_date'],
+            periode_id=row['periode_id'],
+            group_size=row['group_size'],
+            visitor_lang=row['visitor_lang'],
+            disability=row['disability'],
+            languages=sorted(languages.get(row['pk'], [])),
+            interests=sorted(interests.get(row['pk'], [])),
+            posted_at=row['state_changed_at'],
+        )
+        for row in rows
+    ]
+
+
+###################################################################################################
+# Mise à jour incrémentale
+
+def refresh_wall(visit_ids):
+    """
+    Recalcule la présence sur le mur des demandes indiquées : ajout, mise à jour
+    ou retrait. La date d'affichage (posted_at) d'une demande déjà présente est conservée.
+    """
+    visit_ids = list(visit_ids)
+    if not visit_ids:
+        return
+    queryset = VisitRequest.objects.filter(pk__in=visit_ids)
+    destination_ids = set(queryset.values_list('destination_id', flat=True))
+    destination_ids.update(WallEntry.objects.filter(visit_request_id__in=visit_ids).values_list(
+        'destination_id', flat=True
+    ))
+    entries = _entries(queryset, _wall_settings(destination_ids))
+
+    with transaction.atomic():
+        WallEntry.objects.filter(visit_request_id__in=visit_ids).exclude(
+            visit_request_id__in=[entry.visit_request_id for entry in entries]
+        ).delete()
+        WallEntry.objects.bulk_create(
+            entries, update_conflicts=True, unique_fields=['visit_request'],
+            update_fields=['destination', *WALL_FIELDS],
+        )
+        for destination_id in destination_ids:
+            transaction.on_commit(lambda destination_id=destination_id: invalidate_wall(destination_id))
+
+
+def rebuild_wall(destination_id):
+    """Reconstruit le mur d'une destination (changement des paramètres C&G)."""
+    states = _wall_settings([destination_id])
+    queryset = VisitRequest.objects.filter(
+        destination_id=destination_id, state__in=states.get(destination_id, ())
+    )
+    entries = _entries(queryset, states)
+    with transaction.atomic():
+        WallEntry.objects.filter(destination_id=destination_id).delete()
+        WallEntry.objects.bulk_create(entries, batch_size=500)
+        transaction.on_commit(lambda: invalidate_wall(destination_id))
+
+
+def prune_wall(today=None):
+    """Retire du mur les demandes dont la date de balade est passée ; retourne le nombre de lignes supprimées."""
+    today = today or timezone.localdate()
+    past = WallEntry.objects.filter(walk_date__lt=today)
+    destination_ids = set(past.values_list('destination_id', flat=True).distinct())
+    if not destination_ids:
+        return 0
+    with transaction.atomic():
+        deleted, _ = past.delete()
+        for destination_id in destination_ids:
+            transaction.on_commit(lambda destination_id=destination_id: invalidate_wall(destination_id))
+    return deleted
+
+
+###################################################################################################
+# Lecture
+
+def get_wall(destination_id, today=None):
+    """
+    Demandes ouvertes du mur, balades à venir par date : une requête, puis le cache
+    (clé par version de la destination, langue et jour).
+    """
+    today = today or timezone.localdate()
+    version = cache.get(_version_key(destination_id), 0)
+    key = f"greet:wall:{destination_id}:{version}:{get_language()}:{today.isoformat()}"
+    wall = cache.get(key)
+    if wall is None:
+        wall = [
+            {
+                'visit_request_id': entry.visit_request_id,
+                'state': entry.state,
+                'walk_date': entry.walk_date,
+                'periode': str(entry.periode) if entry.periode else '',
+                'group_size': entry.group_size,
+                'visitor_lang': entry.visitor_lang,
+                'disability': entry.disability,
+                'languages': entry.languages,
+                'interests': entry.interests,
+                'posted_at': entry.posted_at,
+            }
+            for entry in WallEntry.objects.filter(destination_id=destination_id, walk_date__gte=today)
+            .select_related('periode').order_by('walk_date', 'visit_request_id')
+        ]
+        cache.set(key, wall, get_cache_timeout())
+    return wall
+
+
+###################################################################################################
+# Courriel périodique C&G
+
+def _digest_message(greeter, template_id, wall, new_since, destination_name):
+    requests = [
+        {
+            'walk_date': entry['walk_date'].isoformat(),
+            'periode': entry['periode'],
+            'group_size': entry['group_size'],
+            'urgent': entry['state'] == VisitRequest.URGENT,
+        }
+        for entry in wall
+    ]
+    variables = {
+        'first_name': greeter['user__first_name'],
+        'destination': destination_name,
+        'nb_requests': len(wall),
+        'nb_new_requests': sum(1 for entry in wall if entry['posted_at'] >= new_since),
+        'requests': requests,
+    }
+    name = f"{greeter['user__first_name']} {greeter['user__last_name']}"
+    return template_message(greeter['user__email'], name, template_id, variables)
+
+
+def send_wall_digests(today=None):
+    """
+    Envoie le courriel C&G aux greeters actifs des destinations dont date_cg_mail_dest est échue,
+    puis reporte cette date de periode_mail_cg_dest jours.
+    Retourne {destination: nombre de courriels}.
+    """
+    today = today or timezone.localdate()
+    stats = {}
+    due = Destination_data.objects.filter(date_cg_mail_dest__lte=today).exclude(
+        flag_modalités_dest=MANAGER_ONLY
+    ).values('pk', 'code_dest_data_id', 'code_dest_data__name_dest', 'periode_mail_cg_dest',
+             'date_cg_mail_dest', 'lang_default_dest__code')
+
+    for data in due:
+        destination_id = data['code_dest_data_id']
+        period = datetime.timedelta(days=data['periode_mail_cg_dest'] or 7)
+        wall = get_wall(destination_id, today)
+        # Nouvelles demandes : affichées depuis le précédent courriel
+        new_since = timezone.make_aware(datetime.datetime.combine(data['date_cg_mail_dest'] - period,
+                                                                  datetime.time.min))
+
+        messages = []
+        if wall:
+            greeters = Greeter.objects.filter(
+                user__is_active=True, user__code_dest_id=destination_id, statut_greeter='Active'
+            ).values('user__email', 'user__first_name', 'user__last_name', 'user__lang_com')
+            for greeter in greeters:
+                try:
+                    template_id = get_mailjet_template_id(EMAIL_WALL_DIGEST, greeter['user__lang_com'],
+                                                          data['lang_default_dest__code'])
+                except Email_Mailjet.DoesNotExist:
+                    logger.error("Template Mailjet '%s' introuvable pour la langue '%s'",
+                                 EMAIL_WALL_DIGEST, greeter['user__lang_com'])
+                    continue
+                messages.append(_digest_message(greeter, template_id, wall, new_since,
+                                                data['code_dest_data__name_dest']))
+
+        with transaction.atomic():
+            Destination_data.objects.filter(pk=data['pk']).update(date_cg_mail_dest=today + period)
+            for start in range(0, len(messages), MAILJET_MAX_MESSAGES * 10):
+                batch = messages[start:start + MAILJET_MAX_MESSAGES * 10]
+                transaction.on_commit(lambda batch=batch: send_email_mailjet_batch.delay(batch))
+        stats[destination_id] = len(messages)
+    return stats
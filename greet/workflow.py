@@ -0,0 +1,283 @@
+###################################################################################################
+# Moteur de workflow des demandes de visite piloté par Destination_flux
+# Exécuté périodiquement (Celery beat) : pour chaque destination, chaque règle sélectionne
+# les demandes échues par une requête indexée (destination, statut, date), puis les traite
+# par paquets (update sur une liste d'identifiants), une transaction par paquet ; les courriels
+# d'un paquet partent en tâches groupées après son commit.
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.mailjet import MAILJET_MAX_MESSAGES, get_mailjet_template_id, template_message
+from core.models import Email_Mailjet
+from core.tasks import send_email_mailjet_batch
+from destination.models import Destination_flux
+from greet.models import VisitRequest
+from greet.rotation import record_walk
+from greet.wall import refresh_wall
+
+# Codes des templates Mailjet utilisés par le workflow
+EMAIL_GREETER_REMINDER = 'RLGRT'
+EMAIL_VISITOR_REMINDER = 'RLVIS'
+EMAIL_PRE_WALK = 'PREBA'
+EMAIL_REPORT_REQUEST = 'CRGRT'
+EMAIL_REVIEW_REQUEST = 'AVVIS'
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATES = (VisitRequest.NEW, VisitRequest.TREATMENT, VisitRequest.URGENT)
+
+# Champs de Destination_flux lus à chaque passage
+FLUX_FIELDS = (
+    'flux_treatement_dest', 'flux_urgency_dest',
+    'flux_delai_max_greeter_dest', 'flux_frequence_relance_greeter_dest',
+    'flux_delai_visiteur_max_dest', 'flux_frequence_relance_visiteur_dest',
+    'flux_delai_pre_balade_dest', 'flux_delai_compte_rendu_dest',
+    'flux_delai_envoi_avis_dest', 'flux_delai_avis_max_dest',
+)
+
+# Valeurs lues pour construire les courriels
+MESSAGE_FIELDS = (
+    'pk', 'walk_date', 'visitor_first_name', 'visitor_last_name', 'visitor_email', 'visitor_lang',
+    'greeter__user__email', 'greeter__user__first_name', 'greeter__user__last_name',
+    'greeter__user__lang_com', 'destination__name_dest',
+)
+
+
+def get_chunk_size():
+    return getattr(settings, 'GREET_WORKFLOW_CHUNK_SIZE', 500)
+
+
+###################################################################################################
+# Règles
+
+def _days(value):
+    return datetime.timedelta(days=value)
+
+
+def workflow_rules(flux, now):
+    """
+    Règles applicables à une destination, dans l'ordre du cycle de vie.
+    Chaque règle : (nom, filtre, mises à jour, [(code courriel, destinataire)]).
+    Un délai à 0 dans Destination_flux désactive la règle correspondante.
+    """
+    today = now.date()
+    rules = []
+
+    # Passage en Traitement puis en Urgent selon l'ancienneté de la demande
+    if flux['flux_treatement_dest']:
+        rules.append(('treatment',
+                      {'state': VisitRequest.NEW,
+                       'created_at__lte': now - _days(flux['flux_treatement_dest'])},
+                      {'state': VisitRequest.TREATMENT, 'state_changed_at': now}, []))
+    if flux['flux_urgency_dest']:
+        rules.append(('urgent',
+                      {'state__in': (VisitRequest.NEW, VisitRequest.TREATMENT),
+                       'created_at__lte': now - _days(flux['flux_urgency_dest'])},
+                      {'state': VisitRequest.URGENT, 'state_changed_at': now}, []))
+
+    # Attribution au Greeter : relances puis retrait si le délai de réponse est dépassé
+    if flux['flux_delai_max_greeter_dest']:
+        rules.append(('greeter_timeout',
+                      {'state__in': OPEN_STATES, 'greeter__isnull': False,
+                       'greeter_assigned_at__lte': now - _days(flux['flux_delai_max_greeter_dest'])},
+                      {'greeter': None, 'greeter_assigned_at': None, 'next_reminder_at': None}, []))
+    if flux['flux_frequence_relance_greeter_dest']:
+        rules.append(('greeter_reminder',
+                      {'state__in': OPEN_STATES, 'greeter__isnull': False, 'next_reminder_at__lte': now},
+                      {'next_reminder_at': now + _days(flux['flux_frequence_relance_greeter_dest'])},
+                      [(EMAIL_GREETER_REMINDER, 'greeter')]))
+
+    # Proposition au visiteur : relances puis annulation sans réponse
+    if flux['flux_delai_visiteur_max_dest']:
+        rules.append(('visitor_timeout',
+                      {'state': VisitRequest.PROPOSED,
+                       'state_changed_at__lte': now - _days(flux['flux_delai_visiteur_max_dest'])},
+                      {'state': VisitRequest.CANCELLED, 'state_changed_at': now, 'next_reminder_at': None}, []))
+    if flux['flux_frequence_relance_visiteur_dest']:
+        rules.append(('visitor_reminder',
+                      {'state': VisitRequest.PROPOSED, 'next_reminder_at__lte': now},
+                      {'next_reminder_at': now + _days(flux['flux_frequence_relance_visiteur_dest'])},
+                      [(EMAIL_VISITOR_REMINDER, 'visitor')]))
+
+    # Balade confirmée : rappel avant la balade, puis réalisée le lendemain
+    if flux['flux_delai_pre_balade_dest']:
+        rules.append(('pre_walk',
+                      {'state': VisitRequest.CONFIRMED, 'pre_walk_reminder_sent': False,
+                       'walk_date__gte': today,
+                       'walk_date__lte': today + _days(flux['flux_delai_pre_balade_dest'])},
+                      {'pre_walk_reminder_sent': True},
+                      [(EMAIL_PRE_WALK, 'visitor'), (EMAIL_PRE_WALK, 'greeter')]))
+    rules.append(('done',
+                  {'state': VisitRequest.CONFIRMED, 'walk_date__lt': today},
+                  {'state': VisitRequest.DONE, 'state_changed_at': now}, []))
+
+    # Après la balade : compte-rendu du Greeter, avis du visiteur, clôture
+    if flux['flux_delai_compte_rendu_dest']:
+        rules.append(('report_request',
+                      {'state': VisitRequest.DONE, 'report_requested': False,
+                       'walk_date__lte': today - _days(flux['flux_delai_compte_rendu_dest'])},
+                      {'report_requested': True},
+                      [(EMAIL_REPORT_REQUEST, 'greeter')]))
+    if flux['flux_delai_envoi_avis_dest']:
+        rules.append(('review_request',
+                      {'state': VisitRequest.DONE, 'review_requested': False,
+                       'walk_date__lte': today - _days(flux['flux_delai_envoi_avis_dest'])},
+                      {'review_requested': True},
+                      [(EMAIL_REVIEW_REQUEST, 'visitor')]))
+    if flux['flux_delai_avis_max_dest']:
+        rules.append(('reviewed',
+                      {'state': VisitRequest.DONE,
+                       'walk_date__lte': today - _days(flux['flux_delai_avis_max_dest'])},
+                      {'state': VisitRequest.REVIEWED, 'state_changed_at': now}, []))
+
+    return rules
+
+
+###################################################################################################
+# Courriels
+
+def _build_message(row, code_email, recipient, destination_lang):
+    if recipient == 'greeter':
+        email = row['greeter__user__email']
+        name = f"{row['greeter__user__first_name']} {row['greeter__user__last_name']}"
+        lang = row['greeter__user__lang_com']
+    else:
+        email = row['visitor_email']
+        name = f"{row['visitor_first_name']} {row['visitor_last_name']}"
+        lang = row['visitor_lang']
+    if not email:
+        return None
+
+    try:
+        template_id = get_mailjet_template_id(code_email, lang, destination_lang)
+    except Email_Mailjet.DoesNotExist:
+        logger.error("Template Mailjet '%s' introuvable pour la langue '%s'", code_email, lang)
+        return None
+
+    variables = {
+        'visitor_first_name': row['visitor_first_name'],
+        'greeter_first_name': row['greeter__user__first_name'] or '',
+        'destination': row['destination__name_dest'],
+        'walk_date': row['walk_date'].isoformat(),
+    }
+    return template_message(email, name, template_id, variables, custom_id=f"visit-{row['pk']}")
+
+
+def _enqueue_messages(messages):
+    """Une tâche Mailjet par lot de messages, planifiée après le commit."""
+    batch_size = MAILJET_MAX_MESSAGES * 10
+    for start in range(0, len(messages), batch_size):
+        batch = messages[start:start + batch_size]
+        transaction.on_commit(lambda batch=batch: send_email_mailjet_batch.delay(batch))
+
+
+###################################################################################################
+# Exécution
+
+def _apply_rule(destination_id, lookup, updates, emails, destination_lang, chunk_size):
+    """
+    Traite une règle par paquets en parcourant les identifiants (pagination par clé).
+    Retourne (demandes traitées, courriels envoyés).
+    """
+    queryset = VisitRequest.objects.filter(destination_id=destination_id, **lookup)
+    processed = sent = 0
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1]
+
+        with transaction.atomic():
+            # La condition est rejouée sous verrou : une ligne modifiée entre-temps n'est ni mise à jour
+            # ni destinataire d'un courriel, et les courriels portent sur les lignes mises à jour
+            matched = list(queryset.filter(pk__in=chunk).select_for_update().values_list('pk', flat=True))
+            if matched:
+                messages = []
+                if emails:
+                    for row in VisitRequest.objects.filter(pk__in=matched).values(*MESSAGE_FIELDS):
+                        for code_email, recipient in emails:
+                            message = _build_message(row, code_email, recipient, destination_lang)
+                            if message:
+                                messages.append(message)
+
+                processed += VisitRequest.objects.filter(pk__in=matched).update(**updates)
+                # L'update ne déclenche pas les signaux : le mur C&G est mis à jour pour le paquet
+                if 'state' in updates or 'greeter' in updates:
+                    refresh_wall(matched)
+                _enqueue_messages(messages)
+                sent += len(messages)
+        if len(chunk) < chunk_size:
+            break
+    return processed, sent
+
+
+def run_workflow_tick(now=None):
+    """
+    Fait avancer toutes les demandes de visite échues.
+    Retourne les compteurs {règle: nombre de demandes traitées}.
+    """
+    now = now or timezone.now()
+    chunk_size = get_chunk_size()
+    stats = {'emails': 0}
+
+    fluxes = Destination_flux.objects.values(
+        'code_dest_flux_id', 'code_dest_flux__destination_data__lang_default_dest__code', *FLUX_FIELDS
+    )
+    for flux in fluxes:
+        destination_id = flux['code_dest_flux_id']
+        destination_lang = flux['code_dest_flux__destination_data__lang_default_dest__code']
+        for name, lookup, updates, emails in workflow_rules(flux, now):
+            count, sent = _apply_rule(destination_id, lookup, updates, emails, destination_lang, chunk_size)
+            if count:
+                stats[name] = stats.get(name, 0) + count
+            stats['emails'] += sent
+    return stats
+
+
+###################################################################################################
+# Transitions déclenchées par les utilisateurs (attribution, proposition, confirmation)
+
+def _set_state(visit, state, **fields):
+    now = timezone.now()
+    visit.state = state
+    visit.state_changed_at = now
+    for name, value in fields.items():
+        setattr(visit, name, value)
+    visit.save(update_fields=['state', 'state_changed_at', *fields])
+    return visit
+
+
+def assign_greeter(visit, greeter):
+    """Attribue la demande à un Greeter ; la première relance suit la fréquence du flux."""
+    now = timezone.now()
+    frequency = Destination_flux.objects.filter(code_dest_flux_id=visit.destination_id).values_list(
+        'flux_frequence_relance_greeter_dest', flat=True
+    ).first()
+    visit.greeter = greeter
+    visit.greeter_assigned_at = now
+    visit.next_reminder_at = now + _days(frequency) if frequency else None
+    visit.save(update_fields=['greeter', 'greeter_assigned_at', 'next_reminder_at'])
+    return visit
+
+
+def propose(visit):
+    """Le Greeter a accepté : la proposition est envoyée au visiteur."""
+    frequency = Destination_flux.objects.filter(code_dest_flux_id=visit.destination_id).values_list(
+        'flux_frequence_relance_visiteur_dest', flat=True
+    ).first()
+    next_reminder_at = timezone.now() + _days(frequency) if frequency else None
+    return _set_state(visit, VisitRequest.PROPOSED, next_reminder_at=next_reminder_at)
+
+
+def confirm(visit):
+    """Le visiteur a confirmé : la balade compte dans la rotation du Greeter."""
+    _set_state(visit, VisitRequest.CONFIRMED, next_reminder_at=None)
+    if visit.greeter_id:
+        record_walk(visit.greeter_id, visit.walk_date)
+    return visit
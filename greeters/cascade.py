@@ -0,0 +1,172 @@
+###################################################################################################
+# Cascade cluster -> destination du formulaire Greeter (autocompletion_form_greeter.js)
+# Les listes d'options d'un cluster et d'une destination sont construites une fois par langue,
+# gardées en mémoire du processus puis dans le cache Django, et identifiées par des numéros
+# de version : l'ETag se calcule sans construire la réponse et les signaux n'ont qu'à
+# incrémenter la version concernée, après le commit (core.signals).
+# Une version absente du cache (redémarrage, éviction) repart d'une horodate en nanosecondes
+# et non de 0 : un ETag antérieur ne peut pas resservir et renvoyer un 304 périmé.
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.utils.translation import get_language
+
+from cluster.models import Cluster, Experience_Greeter, InterestCenter
+from destination.models import Destination, Destination_data, List_places
+
+GLOBAL_VERSION_KEY = 'greeters:cascade:version'
+
+# Au-delà, la mémoire du processus est vidée (les entrées de versions périmées ne servent plus)
+LOCAL_MAX_ENTRIES = 500
+
+_local_payloads = {}
+_local_lock = threading.Lock()
+
+
+def get_cache_timeout():
+    return getattr(settings, 'GREETER_CASCADE_CACHE_TIMEOUT', 24 * 3600)
+
+
+def _version_key(scope, object_id):
+    return f"greeters:cascade:{scope}:{object_id}:version"
+
+
+def _seed():
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _seed(), None)
+
+
+def invalidate_cluster(cluster_id):
+    _bump(_version_key('cluster', cluster_id))
+
+
+def invalidate_destination(destination_id):
+    _bump(_version_key('destination', destination_id))
+
+
+def invalidate_all():
+    """Données de référence partagées (centres d'intérêt, lieux, langues, pays) modifiées."""
+    _bump(GLOBAL_VERSION_KEY)
+    with _local_lock:
+        _local_payloads.clear()
+
+
+###################################################################################################
+# Construction des listes d'options
+
+def build_cluster_payload(cluster_id):
+    # Requêtes sur les managers des modèles traduits : les libellés suivent la langue active
+    if not Cluster.objects.filter(pk=cluster_id).exists():
+        return {}
+    return {
+        'destinations': list(Destination.objects.filter(code_cluster_id=cluster_id).order_by('name_dest')
+                             .values('id', name=models.F('code_dest'))),
+        'interests': list(InterestCenter.objects.filter(profil_interet_cluster=cluster_id)
+                          .values('id', name=models.F('interest_center'))),
+        'experiences': list(Experience_Greeter.objects.filter(list_experience_cluster=cluster_id)
+                            .values('id', name=models.F('experience_greeter'))),
+    }
+
+
+def build_destination_payload(destination_id):
+    # Identifiants seulement pour le pays et les langues : les libellés viennent du paquet
+    # des tables de référence (core.bundle), mis en cache par le navigateur
+    destination = Destination.objects.filter(pk=destination_id).values('country_dest_id').first()
+    if destination is None:
+        return {}
+    payload = {
+        'places': list(List_places.objects.filter(destinations=destination_id).values('id', 'list_places_dest')),
+        'pays_id': destination['country_dest_id'],
+    }
+
+    dest_data = Destination_data.objects.filter(code_dest_data_id=destination_id).values(
+        'pk', 'lang_default_dest_id'
+    ).first()
+    if dest_data:
+        lang_ids = set(Destination_data.langs_com_dest.through.objects.filter(
+            destination_data_id=dest_data['pk']
+        ).values_list('language_communication_id', flat=True))
+        lang_ids.add(dest_data['lang_default_dest_id'])
+        payload['lang_ids'] = sorted(lang_ids)
+        payload['default_lang'] = dest_data['lang_default_dest_id']
+    return payload
+
+
+BUILDERS = {
+    'cluster': build_cluster_payload,
+    'destination': build_destination_payload,
+}
+
+
+###################################################################################################
+# Lecture (mémoire du processus, puis cache Django, puis base)
+
+def get_versions(cluster_id, destination_id):
+    """Versions (globale, cluster, destination) lues en un seul accès au cache."""
+    keys = [GLOBAL_VERSION_KEY]
+    if cluster_id:
+        keys.append(_version_key('cluster', cluster_id))
+    if destination_id:
+        keys.append(_version_key('destination', destination_id))
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        # add() : un seul processus fixe la graine, les autres relisent la sienne
+        for key in missing:
+            cache.add(key, _seed(), None)
+        values.update(cache.get_many(missing))
+    return {key: values.get(key, 0) for key in keys}
+
+
+def get_etag(cluster_id, destination_id, versions, lang=None):
+    raw = f"{lang or get_language()}|{cluster_id}|{destination_id}|" + '|'.join(
+        f"{key}={value}" for key, value in sorted(versions.items())
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _payload(scope, object_id, versions, lang):
+    version = f"{versions[GLOBAL_VERSION_KEY]}.{versions[_version_key(scope, object_id)]}"
+    key = f"greeters:cascade:{scope}:{object_id}:{version}:{lang}"
+    with _local_lock:
+        payload = _local_payloads.get(key)
+    if payload is None:
+        payload = cache.get(key)
+        if payload is None:
+            payload = BUILDERS[scope](object_id)
+            cache.set(key, payload, get_cache_timeout())
+        with _local_lock:
+            if len(_local_payloads) >= LOCAL_MAX_ENTRIES:
+                _local_payloads.clear()
+            _local_payloads[key] = payload
+    return payload
+
+
+def get_cascade_data(cluster_id, destination_id, versions=None):
+    """Réponse de get_cluster_dest_data pour un cluster et/ou une destination."""
+    lang = get_language()
+    versions = versions or get_versions(cluster_id, destination_id)
+    data = {
+        'interests': [],
+        'experiences': [],
+        'lang_ids': [],
+        'places': [],
+        'default_lang': None,
+        'pays_id': None,
+    }
+    if cluster_id:
+        data.update(_payload('cluster', cluster_id, versions, lang))
+    if destination_id:
+        data.update(_payload('destination', destination_id, versions, lang))
+    return data
@@ -17,6 +17,8 @@ from crispy_forms.bootstrap import TabHolder, Tab
 from cluster.models import Cluster
 from destination.models import Destination,Destination_data,List_places
 from core.models import Language_communication
+from core.reference import (ReferenceModelChoiceField, ReferenceModelMultipleChoiceField,
+                            find_ids, get_object)
 from django.utils import timezone
 
 User=get_user_model()
@@ -27,9 +29,9 @@ class GreeterCombinedForm(HelpTextTooltipMixin, forms.ModelForm):
     first_name = forms.CharField(label=_("Prénom"), help_text=_("Saisir le prénom du Greeter"))
     last_name = forms.CharField(label=_("Nom"), help_text=_("Saisir le nom du Greeter"))
     cellphone = forms.CharField(label=_("Téléphone Mobile"), help_text=_("Saisir le numéro de téléphone mobile du Greeter"))
-    lang_com = forms.ModelChoiceField(
+    lang_com = ReferenceModelChoiceField(
         label=_("Langue de communication"),
-        queryset=Language_communication.objects.none(),  # On va définir le queryset dans __init__ pour filtrer selon le groupe de l'admin
+        queryset=Language_communication.objects.all(),  # Choix restreints dans __init__ (limit_to) selon le groupe de l'admin
         widget=forms.Select(attrs={'class': 'form-control'}),
         help_text=_("Saisir la langue de communication du Greeter")
         )
@@ -98,6 +100,12 @@ class GreeterCombinedForm(HelpTextTooltipMixin, forms.ModelForm):
         'arrival_greeter': forms.DateInput(attrs={'type': 'date','class': 'form-control'}),
         'departure_greeter': forms.DateInput(attrs={'type': 'date','class': 'form-control'}),
         }
+        # Choix servis par le registre des tables de référence (sans requête)
+        field_classes = {
+            'country_greeter': ReferenceModelChoiceField,
+            'langues_parlées_greeter': ReferenceModelMultipleChoiceField,
+            'disponibility_time_greeter': ReferenceModelMultipleChoiceField,
+        }
     
     
     def clean(self):
@@ -156,10 +164,10 @@ class GreeterCombinedForm(HelpTextTooltipMixin, forms.ModelForm):
         self.admin = kwargs.pop('admin_greeter', None)
         super().__init__(*args, **kwargs)
 
-        # Si le formulaire est soumis (POST), on élargit le queryset pour 
-        # permettre la validation des données envoyées par AJAX
-        if self.is_bound:
-            self.fields['lang_com'].queryset = Language_communication.objects.all()
+        # Si le formulaire est soumis (POST), toutes les langues restent valides
+        # pour permettre la validation des données envoyées par AJAX
+        if not self.is_bound:
+            self.fields['lang_com'].limit_to(())
         # 2. Récupération des objets liés pour filtrer les choix
         # On vérifie d'abord l'instance (Update), sinon on regarde l'admin (Create)
         current_cluster_code = None
@@ -199,7 +207,7 @@ class GreeterCombinedForm(HelpTextTooltipMixin, forms.ModelForm):
                 lang_ids = list(dest_data.langs_com_dest.values_list('id', flat=True))
                 if dest_data.lang_default_dest:
                     lang_ids.append(dest_data.lang_default_dest.id)
-                    self.fields['lang_com'].queryset = Language_communication.objects.filter(id__in=lang_ids).distinct()
+                    self.fields['lang_com'].limit_to(lang_ids)
             except (Destination.DoesNotExist, Destination_data.DoesNotExist):
                 pass
 
@@ -218,15 +226,13 @@ class GreeterCombinedForm(HelpTextTooltipMixin, forms.ModelForm):
             user = self.instance.user
             if user.lang_com:
             
-                try:
-                    lang_obj = Language_communication.objects.get(code=user.lang_com)
-                    self.fields['lang_com'].initial = lang_obj
-                    # On s'assure que le queryset contient au moins cette langue pour l'affichage
-                    self.fields['lang_com'].queryset = Language_communication.objects.filter(code=user.lang_com)
+                lang_ids = find_ids(Language_communication, 'code', [user.lang_com])
+                if lang_ids:
+                    self.fields['lang_com'].initial = get_object(Language_communication, lang_ids[0])
+                    # On s'assure que les choix contiennent au moins cette langue pour l'affichage
+                    self.fields['lang_com'].limit_to(lang_ids)
                     # Supprime le choix vide "---------"
                     self.fields['lang_com'].empty_label = None 
-                except Language_communication.DoesNotExist:
-                    pass
         
             self.fields['lang_com'].disabled = True
             
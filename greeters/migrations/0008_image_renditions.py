@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('greeters', '0007_alter_greeter_list_places_greeter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greeter',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='greetertype',
+            name='photo_greet_type_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
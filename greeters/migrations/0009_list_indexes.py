@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cluster', '0002_cluster_admin_alt_cluster_cluster_admin_cluster_and_more'),
+        ('core', '0003_translationjob'),
+        ('destination', '0018_image_renditions'),
+        ('greeters', '0008_image_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='greeter',
+            index=models.Index(fields=['statut_greeter', 'id'], name='greeters_gr_statut__5f62ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greeter',
+            index=models.Index(fields=['city_greeter', 'id'], name='greeters_gr_city_gr_66ae12_idx'),
+        ),
+    ]
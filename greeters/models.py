@@ -3,6 +3,7 @@ from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         Group, PermissionsMixin)
 from django.db import models
 from users.models import CustomUser
+from core.images import RenditionsMixin
 from core.models import TrancheAge,LangueParlee, Pays, Periode
 from cluster.models import Experience_Greeter, InterestCenter
 from destination.models import List_places
@@ -13,7 +14,7 @@ from django.utils.translation import gettext_lazy as _
 
 # Modèle du Greeter
 
-class Greeter(models.Model):
+class Greeter(RenditionsMixin, models.Model):
     
     choices_statut= (
         ('Drafts', _("Brouillon")),
@@ -52,6 +53,7 @@ class Greeter(models.Model):
     age_greeter=models.ForeignKey(TrancheAge, on_delete=models.PROTECT,limit_choices_to={'id__gt': 2},verbose_name=_("Tranche d'âge"),help_text=_("Saisir la tranche d'âge du Greeter"))
     experiences_greeters=models.ManyToManyField(Experience_Greeter,verbose_name=_('Expériences de Greeter'),help_text=_("Cocher les expériences de Greeter"))
     photo = models.ImageField (upload_to ='photos_profil/',default='photos_profil/default.jpg',blank=True,null=True, verbose_name=_('Photo de profil'), help_text=_("Taille : 200 px *200 px"))
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio_greeter=models.TextField(max_length=1500,default="",verbose_name=_('Biographie'),blank=True,null=True, help_text=_("Saisir la biographie du Greeter"))
     handicap_greeter=models.BooleanField(default=False,verbose_name=_('Accepte des balades avec des personnes ayant un handicap'),help_text=_("Saisir si le Greeter accepte des balades avec des personnes ayant un handicap"))
     visibily_greeter=models.BooleanField(default=False,verbose_name=_('Accepte que sa photo soit transmise au visiteur'),help_text=_("Saisir si le Greeter accepte que sa photo soit transmise au visiteur"))
@@ -71,6 +73,13 @@ class Greeter(models.Model):
     modif_greeter=models.DateTimeField(auto_now=True,blank=True,null=True,verbose_name=_('Date de dernière modification'),help_text=_("Saisir la date de dernière modification du Greeter"))
     name_correcteur_greeter=models.CharField(max_length=30,default="",blank=True,null=True,verbose_name=_('Nom du correcteur'),help_text=_("Saisir le nom du correcteur"))
     correction_greeter=models.TextField(max_length=1000,default="",blank=True,null=True,verbose_name=_('Corrections de la fiche Greeter'), help_text=_("Saisir les corrections de la fiche Greeter"))
+
+    class Meta:
+        # Tris proposés par la liste des greeters (pagination par clé, core.listing)
+        indexes = [
+            models.Index(fields=['statut_greeter', 'id']),
+            models.Index(fields=['city_greeter', 'id']),
+        ]
                                     
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name}"
@@ -95,7 +104,7 @@ class Indisponibility(models.Model):
 
 # Modèle du greet-type
 
-class GreeterType(models.Model):
+class GreeterType(RenditionsMixin, models.Model):
     greeter_greet_type=models.ForeignKey(Greeter, on_delete=models.CASCADE, related_name='greet_types')
     langue_greet_type=models.CharField(max_length=20 ,default="",verbose_name=_('Langue du greet-type'),help_text=_("Saisir la langue parlée du greet-type"))
     titre_greet_type=models.CharField(max_length=50,default="",verbose_name=_('Titre du greet-type'),help_text=_("Saisir le titre du greet-type dans la langue du greet-type"))
@@ -104,6 +113,7 @@ class GreeterType(models.Model):
     maps_greet_type=models.URLField(max_length=200,default="",blank=True,null=True, verbose_name=_('Lien Google Maps'),help_text=_("Saisir le lien Google Maps du lieu de rendez-vous"))
     description_greet_type=models.TextField(max_length=500,default="",verbose_name=_('Description'),help_text=_("Saisir la description du greet-type"))
     photo_greet_type=models.ImageField(upload_to ='photos_profil/',default='photos_profil/default.jpg', verbose_name=_('Photo du greet-type'), help_text=_("Taille : 1200 px * 900 px"))
+    photo_greet_type_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.greeter.user.first_name} {self.greeter.user.last_name} -greet-type {self.description_greet_type}"
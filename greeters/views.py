@@ -12,7 +12,9 @@ from django.contrib import messages as django_messages
 from django.shortcuts import redirect
 from django.utils.translation import gettext as _
 from django.contrib.auth import get_user_model
-from core.tasks import envoyer_email_creation_utilisateur, resize_image_task
+from core.listing import ListQueryMixin
+from core.roles import user_in_groups
+from core.tasks import envoyer_email_creation_utilisateur, generate_image_renditions
 
 User = get_user_model()
 
@@ -20,7 +22,7 @@ class AuthorRequiredCreateGreeterMixin(UserPassesTestMixin):
     
     def test_func(self):
         allowed_groups = ['SuperAdmin','Admin','Referent']
-        return self.request.user.is_authenticated and self.request.user.groups.filter(name__in=allowed_groups).exists()
+        return self.request.user.is_authenticated and user_in_groups(self.request.user, *allowed_groups)
     
     def handle_no_permission(self):
         django_messages.error(self.request, "Vous n'avez pas les droits nécessaires pour créer un Greeter.")
@@ -76,8 +78,8 @@ class GreeterCreateView(LoginRequiredMixin,AuthorRequiredCreateGreeterMixin,Crea
 
                 # 3. Lancement de la tâche Celery pour la photo
                 if greeter.photo: 
-                    transaction.on_commit(lambda: resize_image_task.delay(
-                        app_label='greeters', model_name='Greeter', object_id=greeter.id, field_name ='photo', width=200, height=200))
+                    transaction.on_commit(lambda: generate_image_renditions.delay(
+                        app_label='greeters', model_name='Greeter', object_id=greeter.id, field_name='photo'))
 
                 # 4. Envoi du courriel pour la création du mot de passe 
                 transaction.on_commit(
@@ -102,7 +104,8 @@ class GreeterCreateView(LoginRequiredMixin,AuthorRequiredCreateGreeterMixin,Crea
 
 # Mise à jour d'un Greeter existant avec son utilisateur lié
 
-from django.views.generic import UpdateView, ListView
+from django.views import View
+from django.views.generic import UpdateView
 from django.db import transaction
 from django.urls import reverse_lazy
 from django.contrib import messages as django_messages
@@ -153,15 +156,16 @@ class GreeterUpdateView(LoginRequiredMixin, AuthorRequiredCreateGreeterMixin, Up
                 
                 user.save()
 
-                # 2. Sauvegarde du Greeter
+                # 2. Sauvegarde du Greeter (manifeste de l'ancienne photo vidé dans le même enregistrement)
+                if 'photo' in form.changed_data:
+                    form.instance.reset_renditions('photo')
                 greeter = form.save()
 
                 # 3. Gestion de la photo (Celery)
                 if 'photo' in form.changed_data and greeter.photo:
-                    transaction.on_commit(lambda: resize_image_task.delay(
+                    transaction.on_commit(lambda: generate_image_renditions.delay(
                         app_label='greeters', model_name='Greeter', 
-                        object_id=greeter.id, field_name='photo', 
-                        width=200, height=200))
+                        object_id=greeter.id, field_name='photo'))
 
                 django_messages.success(self.request, _("Le greeter {} a été mis à jour.").format(user.get_full_name()))
                 return super().form_valid(form)
@@ -173,15 +177,30 @@ class GreeterUpdateView(LoginRequiredMixin, AuthorRequiredCreateGreeterMixin, Up
 ###################################################################################################
 # Vue Liste des greeters
 
-class GreeterListView(LoginRequiredMixin, ListView):
-    model = Greeter
+class GreeterListView(LoginRequiredMixin, ListQueryMixin, View):
     template_name = 'greeters/greeter_list.html'
     context_object_name = 'greeters'
-    paginate_by = 20
+    filter_fields = {
+        'statut': 'statut_greeter',
+        'destination': 'user__code_dest_id',
+        'langue': 'langues_parlées_greeter',
+        'jour': 'disponibility_day_greeter__contains',
+        'interet': 'interest_greeter',
+    }
+    ordering_choices = {
+        'id': ('pk',),
+        'statut': ('statut_greeter', 'pk'),
+        'ville': ('city_greeter', 'pk'),
+    }
+    # Le template n'affiche que l'utilisateur : aucune ManyToMany à précharger
+    select_related = ('user',)
+    json_fields = ('id', 'user__first_name', 'user__last_name', 'user__email', 'city_greeter', 'statut_greeter')
 
-    def get_queryset(self):
-        # Optimisation des requêtes pour éviter le N+1
-        return Greeter.objects.select_related('user', 'country_greeter').all()
+    def get(self, request, *args, **kwargs):
+        return self.list_response(request, Greeter.objects.all(), {
+            'statut_choices': Greeter.choices_statut,
+            'day_choices': Greeter.choices_day,
+        })
 
 ###################################################################################################
 
@@ -206,66 +225,29 @@ class GreeterDetailView(LoginRequiredMixin, DetailView):
 ###################################################################################################
 
 #Vue Ajax pour mettre à jour dynamiquement les destinations, le pays et les langues de communication disponibles, les centres d'intérêts, expérioences Greeter, thèmes  en fonction de la destination sélectionnée dans le formulaire de création ou de mise à jour d'un Greeter
-from django.db import models
-from django.http import JsonResponse
-from cluster.models import Cluster
-from destination.models import Destination, Destination_data, Language_communication
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags, quote_etag
+from greeters.cascade import get_cascade_data, get_etag, get_versions
 
 def get_cluster_dest_data(request):
     # Récupération des IDs depuis la requête AJAX
     id_cluster = request.GET.get('code_cluster')
     id_dest = request.GET.get('code_dest')
-    
-    print(f"Requête AJAX reçue avec id_cluster={id_cluster} et id_dest={id_dest}")
-    
-    data = {
-        'interests': [],
-        'experiences': [],
-        'langs': [],
-        'places': [],
-        'default_lang': None,
-        'pays_id': None,
-        'pays_name': None
-    }
+    cluster_id = int(id_cluster) if id_cluster and id_cluster.isdigit() else None
+    dest_id = int(id_dest) if id_dest and id_dest.isdigit() else None
 
     try:
-        # 1. Traitement du Cluster (Destinations, Intérêts et Expériences)
-        if id_cluster and id_cluster.isdigit():
-            cluster = Cluster.objects.filter(id=id_cluster).first()
-            print(f"Cluster trouvé: {cluster}") 
-            if cluster:
-                #Récupération des destinations liées au cluster
-                destinations = Destination.objects.filter(code_cluster=cluster).order_by('name_dest')    
-                data['destinations'] = list(destinations.values('id', name=models.F('code_dest')))
-                # Récupération des centres d'intérêt et des expériences liés au cluster
-                data['interests'] = list(cluster.interest_center.values('id', name=models.F('interest_center')))
-                data['experiences'] = list(cluster.experience_greeter.values('id', name=models.F('experience_greeter')))
-        # 2. Traitement de la Destination (Pays, Lieux et Langues)
-        if id_dest and id_dest.isdigit():
-            dest = Destination.objects.filter(id=id_dest).first()
-            if dest:
-                # Récupération des lieux (votre erreur indiquait le champ 'list_places_dest')
-                data['places'] = list(dest.list_places_dest.values('id', 'list_places_dest'))
-                data['pays_id'] = dest.country_dest.id
-                data['pays_name'] = dest.country_dest.nom_pays
-                # Récupération des données liées via le OneToOneField (related_name='destination_data')
-                # On utilise filter().first() pour éviter l'erreur si la relation n'existe pas
-                dest_data = Destination_data.objects.filter(code_dest_data=dest).first()
-                
-                if dest_data:
-                    # Gestion des langues
-                    lang_ids = list(dest_data.langs_com_dest.values_list('id', flat=True))
-                    if dest_data.lang_default_dest:
-                        lang_ids.append(dest_data.lang_default_dest.id)
-                    
-                    langs = Language_communication.objects.filter(id__in=lang_ids).distinct()
-                    print(f"Langues trouvées pour la destination: {langs}")
-                    data['langs'] = list(langs.values('id', 'name'))
-                    
-                    if dest_data.lang_default_dest:
-                        data['default_lang'] = dest_data.lang_default_dest.id
-
-        return JsonResponse(data)
+        # L'ETag ne dépend que des versions en cache : un 304 ne construit aucune donnée
+        versions = get_versions(cluster_id, dest_id)
+        etag = quote_etag(get_etag(cluster_id, dest_id, versions))
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse(get_cascade_data(cluster_id, dest_id, versions))
+        response['ETag'] = etag
+        # Le navigateur revalide à chaque appel (If-None-Match) au lieu de retélécharger
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
     except Exception as e:
         print(f"Erreur Python dans la vue : {str(e)}")
@@ -15,6 +15,11 @@ document.addEventListener('DOMContentLoaded', function() {
     const pathParts = window.location.pathname.split('/');
     const lang = pathParts[1] || 'fr'; 
 
+    // Libellés des tables de référence : paquet à URL versionnée, chargé une fois (cache du navigateur)
+    const referenceData = window.REFERENCE_BUNDLE_URL
+        ? fetch(window.REFERENCE_BUNDLE_URL).then(response => response.json()).catch(() => ({}))
+        : Promise.resolve({});
+
     /**
      * Met à jour les cases à cocher dynamiquement
      */
@@ -109,8 +114,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
 
                 // 4. Langues et Pays
-                if (data.langs) {
-                    updateSelect('#id_lang_com', data.langs, data.default_lang);
+                if (data.lang_ids) {
+                    // Liste vide : la liste déroulante est vidée
+                    referenceData.then(reference => {
+                        const names = new Map((reference.communication_languages || []).map(l => [l.id, l.name]));
+                        const langs = data.lang_ids.map(id => ({ id: id, name: names.get(id) || id }));
+                        updateSelect('#id_lang_com', langs, data.default_lang);
+                    });
                 }
 
                 if (data.pays_id) {   
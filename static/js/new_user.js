@@ -21,21 +21,6 @@ document.addEventListener('DOMContentLoaded', function() {
     console.log("Boutons de création détectés :", newUserButtons.length);
     console.log("Contexte formulaire détecté :", formType);
 
-    /**
-     * Vide tous les sélecteurs d'utilisateurs
-     */
-    function clearUserSelects() {
-        const userSelectIds = [
-            'id_admin_cluster', 'id_admin_alt_cluster', 'id_manager_dest', 
-            'id_referent_dest', 'id_matcher_dest', 'id_matcher_alt_dest', 'id_finance_dest'
-        ];
-        console.log("[Clean] Vidage des sélecteurs d'utilisateurs.");
-        userSelectIds.forEach(id => {
-            const select = document.getElementById(id);
-            if (select) select.innerHTML = '<option value="">---------</option>';
-        });
-    }
-
     /**
      * Récupère le jeton CSRF
      */
@@ -62,77 +47,14 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 
     /**
-     * Rafraîchit les selects selon les codes Cluster et Destination
+     * Rafraîchit les sélecteurs d'utilisateurs (static/js/user_picker.js, chargé avant ce script) ;
+     * forceValue est sélectionné dans targetId.
      */
     async function refreshUserSelectFields(forceValue, targetId) {
-        const clusterCode = clusterField?.value || '';
-        const destCode = destField?.value || '';
-        
-        console.log(`[Refresh] Début (Form: ${formType}, Cluster: ${clusterCode}, Dest: ${destCode})`);
-        
-        // --- LOGIQUE DE FILTRAGE STRICTE ---
-        if (formType === 'destination') {
-            // Dans le formulaire Destination, les deux sont obligatoires
-            if (!clusterCode || !destCode) {
-                console.warn("[Refresh] Annulé : Cluster ou Destination manquant pour le mode 'destination'.");
-                clearUserSelects();
-                return;
-            }
-        } else {
-            // Dans le formulaire Cluster (ou autre), seul le cluster est obligatoire
-            if (!clusterCode) {
-                console.warn("[Refresh] Annulé : ClusterCode obligatoire.");
-                clearUserSelects();
-                return;
-            }
-        }
-
-        const params = new URLSearchParams({ code_cluster: clusterCode, code_dest: destCode });
-        console.log("[Fetch] Récupération des utilisateurs avec params :", params.toString());
-        
-        try {
-            const response = await fetch(`${getBaseUrl()}?${params.toString()}`);
-            if (!response.ok) throw new Error(`Erreur HTTP: ${response.status}`);
-            
-            const users = await response.json();
-            console.log(`[Fetch] Utilisateurs reçus (${users.length}) :`, users);
-            const userSelectIds = [
-                'id_admin_cluster', 'id_admin_alt_cluster', 'id_manager_dest', 
-                'id_referent_dest', 'id_matcher_dest', 'id_matcher_alt_dest', 'id_finance_dest'
-            ];
-
-            userSelectIds.forEach(id => {
-                const select = document.getElementById(id);
-                if (select) {
-                    const currentVal = select.value;
-                    console.log(`[A mettre à jour] Champ '${id}' (Valeur forcée: ${forceValue || 'aucune'})`);
-                    
-                    select.innerHTML = '<option value="">---------</option>';
-                    users.forEach(u => select.add(new Option(u.text, u.id)));
-                    
-                    // Mise à jour de la sélection
-                    if (id === targetId && forceValue) {
-                        select.value = forceValue;
-                        console.log(`[Selection] Champ '${id}' fixé sur le nouvel utilisateur ID: ${forceValue}`);
-                    } else {
-                        select.value = currentVal;
-                    }
-                }
-            });
-        } catch (err) { 
-            console.error("Erreur rafraîchissement:", err);
-            clearUserSelects(); 
-        }
+        console.log(`[Refresh] Sélecteurs (Form: ${formType}, Cluster: ${clusterField?.value || ''}, Dest: ${destField?.value || ''})`);
+        if (window.UserPicker) await window.UserPicker.refresh(forceValue, targetId);
     }
 
-    // Écouteurs sur les changements de code
-    [clusterField, destField].forEach(el => {
-        el?.addEventListener('change', () => {
-            console.log(`[Event] Changement sur ${el.id}`);
-            refreshUserSelectFields();
-        });
-    });
-
     /**
      * Gestion de la création d'utilisateur via SweetAlert2
      */
@@ -148,8 +70,10 @@ document.addEventListener('DOMContentLoaded', function() {
 
             let langOptions = "";
             try {
-                const res = await fetch(`/${document.documentElement.lang || 'fr'}/core/get-languages/`);
-                const langs = await res.json();
+                // Paquet des tables de référence (URL versionnée, en cache du navigateur), sinon l'API des langues
+                const res = await fetch(window.REFERENCE_BUNDLE_URL || `/${document.documentElement.lang || 'fr'}/core/get-languages/`);
+                const data = await res.json();
+                const langs = Array.isArray(data) ? data : data.communication_languages;
                 langOptions = langs.map(l => `<option value="${l.code}">${l.name}</option>`).join('');
             } catch (e) { console.error("Erreur langues:", e); }
 
@@ -0,0 +1,125 @@
+/**
+ * Sélecteur d'utilisateurs paginé (core.user_picker, vue UserPickerView).
+ * Les listes déroulantes rendues par UserPickerSelect (attributs data-user-picker / data-picker-url)
+ * ne contiennent que la valeur actuelle : ce script ajoute une recherche par préfixe et charge
+ * le périmètre page par page (limit, cursor) selon les codes Cluster et Destination du formulaire.
+ */
+(function() {
+    'use strict';
+
+    const PAGE_SIZE = 20;
+    const SEARCH_DELAY = 300;
+    const EMPTY_OPTION = '<option value="">---------</option>';
+
+    // Liste déroulante -> { term, cursor, more }
+    const pickers = new Map();
+
+    function formContext() {
+        return {
+            code_cluster: document.getElementById('id_code_cluster')?.value || '',
+            code_dest: document.getElementById('id_code_dest')?.value || '',
+        };
+    }
+
+    // Le périmètre 'destination' n'a de sens qu'avec le cluster et la destination
+    function hasContext(select, context) {
+        if (!context.code_cluster) return false;
+        return select.dataset.userPicker !== 'destination' || !document.getElementById('id_code_dest') || !!context.code_dest;
+    }
+
+    function clear(select) {
+        const state = pickers.get(select);
+        select.innerHTML = EMPTY_OPTION;
+        state.cursor = null;
+        state.more.hidden = true;
+    }
+
+    /**
+     * Charge la première page (append=false) ou la page suivante du périmètre.
+     * forceValue : utilisateur à sélectionner (nouvel utilisateur créé via la modale).
+     */
+    async function load(select, append, forceValue) {
+        const state = pickers.get(select);
+        const context = formContext();
+        if (!hasContext(select, context)) {
+            clear(select);
+            return;
+        }
+
+        const current = forceValue ? String(forceValue) : select.value;
+        const params = new URLSearchParams({
+            scope: select.dataset.userPicker,
+            code_cluster: context.code_cluster,
+            code_dest: context.code_dest,
+            q: state.term,
+            limit: PAGE_SIZE,
+        });
+        if (append && state.cursor) params.set('cursor', state.cursor);
+        // Valeur actuelle : renvoyée en première page même hors de la recherche, si elle est dans le périmètre
+        if (current) params.append('selected', current);
+
+        const response = await fetch(`${select.dataset.pickerUrl}?${params.toString()}`);
+        if (!response.ok) throw new Error(`Erreur HTTP: ${response.status}`);
+        const page = await response.json();
+
+        if (!append) select.innerHTML = EMPTY_OPTION;
+        page.results.forEach(user => {
+            if (!select.querySelector(`option[value="${user.id}"]`)) select.add(new Option(user.text, user.id));
+        });
+        select.value = current;
+        state.cursor = page.next;
+        state.more.hidden = !page.next;
+    }
+
+    function attach(select) {
+        const search = document.createElement('input');
+        search.type = 'search';
+        search.className = 'form-control form-control-sm mb-1';
+        search.placeholder = gettext('Rechercher un utilisateur');
+        select.before(search);
+
+        const more = document.createElement('button');
+        more.type = 'button';
+        more.className = 'btn btn-sm btn-link px-0';
+        more.textContent = gettext('Plus de résultats');
+        more.hidden = true;
+        select.after(more);
+
+        pickers.set(select, { term: '', cursor: null, more: more });
+
+        let timer = null;
+        search.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                pickers.get(select).term = search.value.trim();
+                load(select, false).catch(err => console.error("Erreur sélecteur utilisateurs:", err));
+            }, SEARCH_DELAY);
+        });
+        more.addEventListener('click', () => {
+            load(select, true).catch(err => console.error("Erreur sélecteur utilisateurs:", err));
+        });
+    }
+
+    /**
+     * Recharge la première page de tous les sélecteurs ; forceValue est sélectionné dans targetId.
+     */
+    function refresh(forceValue, targetId) {
+        return Promise.all(Array.from(pickers.keys()).map(select =>
+            load(select, false, select.id === targetId ? forceValue : null)
+                .catch(err => {
+                    console.error("Erreur sélecteur utilisateurs:", err);
+                    clear(select);
+                })
+        ));
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('select[data-user-picker]').forEach(attach);
+        ['id_code_cluster', 'id_code_dest'].forEach(id => {
+            document.getElementById(id)?.addEventListener('change', () => refresh());
+        });
+        refresh();
+    });
+
+    window.UserPicker = { refresh: refresh };
+})();
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('cluster', '0002_cluster_admin_alt_cluster_cluster_admin_cluster_and_more'),
+        ('destination', '0018_image_renditions'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='users_custo_last_na_1a0c91_idx'),
+        ),
+    ]
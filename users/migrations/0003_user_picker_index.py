@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('cluster', '0002_cluster_admin_alt_cluster_cluster_admin_cluster_and_more'),
+        ('destination', '0018_image_renditions'),
+        ('users', '0002_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['code_cluster', 'code_dest', 'is_active', 'last_name', 'first_name'], name='users_custo_code_cl_d9ed08_idx'),
+        ),
+    ]
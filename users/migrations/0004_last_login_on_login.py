@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_picker_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='last_login',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernière connexion'),
+        ),
+    ]
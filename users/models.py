@@ -54,12 +54,21 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
-    last_login = models.DateTimeField(auto_now=True)
+    # Mise à jour à la connexion uniquement (signal user_logged_in), pas à chaque enregistrement
+    last_login = models.DateTimeField(blank=True, null=True, verbose_name=_("Dernière connexion"))
 
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name','cellphone','lang_com']
 
+    class Meta:
+        # Tri de la liste des utilisateurs (pagination par clé, core.listing)
+        indexes = [
+            models.Index(fields=['last_name', 'first_name', 'id']),
+            # Sélecteur d'utilisateurs par périmètre cluster/destination (core.user_picker)
+            models.Index(fields=['code_cluster', 'code_dest', 'is_active', 'last_name', 'first_name']),
+        ]
+
     def get_full_name(self):
         """Retourne le prénom et le nom avec un espace entre les deux."""
         full_name = f"{self.first_name} {self.last_name}"
@@ -14,7 +14,8 @@ from django.utils.translation import gettext_lazy as _
 from django.views import View
 
 
-from core.models import Email_Mailjet
+from core.listing import ListQueryMixin
+from core.mailjet import get_mailjet_template_id
 from users.forms import  UserCreationForm, UserUpdateForm
 from users.models import CustomUser
 from users.tasks import reset_password
@@ -32,7 +33,7 @@ class UserCreateView(View):
             user = form.save()
             domain = get_current_site(request).domain
             code_email="SETPW" # code_email reset password
-            id_template_mailjet= Email_Mailjet.objects.get(code_email=code_email, lang_email=settings.LANGUAGE_CODE).id_mailjet_email
+            id_template_mailjet= get_mailjet_template_id(code_email, settings.LANGUAGE_CODE)
             reset_password (user.id,domain, id_template_mailjet)
             messages.success(request, _("L'utilisateur {} a été créé. Un email lui a été envoyé pour définir son mot de passe.").format(user.email))
             return redirect('user_list')
@@ -60,11 +61,21 @@ class UserUpdateView(View):
 
 
 
-class UserListView(View):
+class UserListView(ListQueryMixin, View):
     User = get_user_model()
+    template_name = 'users/user_list.html'
+    context_object_name = 'users'
+    filter_fields = {
+        'cluster': 'code_cluster_id',
+        'destination': 'code_dest_id',
+        'actif': 'is_active',
+    }
+    ordering_choices = {'id': ('pk',), 'nom': ('last_name', 'first_name', 'pk')}
+    json_fields = ('id', 'first_name', 'last_name', 'email')
+
     def get(self, request, *args, **kwargs):
-        users = CustomUser.objects.exclude(is_superuser=True).exclude(groups__name='Greeter').order_by('id')
-        return render(request, 'users/user_list.html', {'users': users})
+        users = CustomUser.objects.exclude(is_superuser=True).exclude(groups__name='Greeter')
+        return self.list_response(request, users)
 
 
 
@@ -81,7 +92,7 @@ def custom_password_reset (request):
                 user = User.objects.get(email=email)
                 domain = get_current_site(request).domain
                 code_email="RESPW" # code_email reset password
-                id_template_mailjet= Email_Mailjet.objects.get(code_email=code_email, lang_email=user.lang_com).id_mailjet_email
+                id_template_mailjet= get_mailjet_template_id(code_email, user.lang_com)
                 reset_password (user.id,domain, id_template_mailjet)
                 return redirect('password_reset_done')
             else :